@@ -0,0 +1,169 @@
+"""
+Correlaciones y betas móviles entre cada acción y cada serie macro (`ACTIVOS_MACRO`).
+
+Usa sumas acumuladas de x, y, x², y² y xy, de modo que cada paso de la ventana cuesta O(1)
+independiente de su largo. El resultado es un cubo float32 (fecha × acción × macro) guardado en `.npz`.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+ARCHIVO_ACCIONES = config.ARCHIVO_ACCIONES_MASTER
+ARCHIVO_MACRO = config.ARCHIVO_MACRO
+ARCHIVO_SALIDA = config.ARCHIVO_CORRELACIONES_MACRO
+VENTANA = config.VENTANA_CORRELACION_MACRO
+MINIMO_OBSERVACIONES = config.MINIMO_OBSERVACIONES_CORRELACION
+
+
+def cargar_precios_acciones(path_acciones=ARCHIVO_ACCIONES):
+    """Panel de cierres (fecha × ticker) leyendo solo las columnas necesarias del master."""
+    df_acciones = pd.read_csv(path_acciones, sep=';', decimal=',', usecols=['date', 'ticker', 'close'])
+    df_acciones['date'] = pd.to_datetime(df_acciones['date'], format='mixed').dt.normalize()
+    return df_acciones.pivot_table(index='date', columns='ticker', values='close', aggfunc='last').sort_index()
+
+
+def retornos_logaritmicos(precios):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(precios.where(precios > 0)).diff().to_numpy(dtype=np.float64)
+
+
+def cargar_paneles_retornos(path_acciones=ARCHIVO_ACCIONES, path_macro=ARCHIVO_MACRO):
+    """
+    Retorna (fechas, tickers, retornos_acciones, macros, retornos_macro) alineados en las fechas de
+    las acciones. Los retornos son logarítmicos; la serie macro se propaga hacia adelante para cubrir
+    feriados distintos entre mercados.
+    """
+    precios = cargar_precios_acciones(path_acciones)
+
+    df_macro = pd.read_csv(path_macro, sep=';', decimal=',')
+    df_macro['date'] = pd.to_datetime(df_macro['date'], format='mixed').dt.normalize()
+    df_macro = df_macro.set_index('date').sort_index()
+    df_macro = df_macro[~df_macro.index.duplicated(keep='last')]
+    df_macro = df_macro.reindex(df_macro.index.union(precios.index)).ffill().reindex(precios.index)
+
+    return precios.index, precios.columns, retornos_logaritmicos(precios), df_macro.columns, retornos_logaritmicos(df_macro)
+
+
+def _suma_movil(acumulada, ventana):
+    """Suma sobre la ventana [t-ventana+1, t] a partir de una suma acumulada con fila cero inicial."""
+    resultado = acumulada[ventana:] - acumulada[:-ventana]
+    relleno = acumulada[1:ventana]  # primeras filas: ventana incompleta
+    return np.concatenate([relleno, resultado], axis=0)
+
+
+def correlaciones_moviles(retornos_x, retornos_y, ventana=VENTANA, minimo=MINIMO_OBSERVACIONES):
+    """
+    Correlación y beta móviles de cada columna de `retornos_x` (T × S) contra cada columna de
+    `retornos_y` (T × M). Retorna dos cubos float32 (T × S × M); beta es la pendiente de x sobre y.
+
+    Los pares con datos faltantes se manejan con máscara de validez por par, así que cada ventana
+    usa solo las fechas donde ambas series existen.
+    """
+    n_fechas, n_x = retornos_x.shape
+    n_y = retornos_y.shape[1]
+    corr = np.full((n_fechas, n_x, n_y), np.nan, dtype=np.float32)
+    beta = np.full((n_fechas, n_x, n_y), np.nan, dtype=np.float32)
+    if n_fechas == 0:
+        return corr, beta
+
+    valido_x = ~np.isnan(retornos_x)
+    # Centrar reduce la cancelación numérica de las sumas acumuladas en historias largas
+    x = np.where(valido_x, retornos_x - np.nanmean(retornos_x, axis=0), 0.0)
+    cero = np.zeros((1, n_x))
+
+    # Una serie macro a la vez: la memoria intermedia queda en O(T × S)
+    for j in range(n_y):
+        valido_y = ~np.isnan(retornos_y[:, j])
+        if not valido_y.any():
+            continue
+        y = np.where(valido_y, retornos_y[:, j] - np.nanmean(retornos_y[:, j]), 0.0)[:, None]
+        par = valido_x & valido_y[:, None]
+        xm = np.where(par, x, 0.0)
+        ym = np.where(par, y, 0.0)
+
+        n = _suma_movil(np.concatenate([cero, np.cumsum(par, axis=0)]), ventana)
+        sx = _suma_movil(np.concatenate([cero, np.cumsum(xm, axis=0)]), ventana)
+        sy = _suma_movil(np.concatenate([cero, np.cumsum(ym, axis=0)]), ventana)
+        sxx = _suma_movil(np.concatenate([cero, np.cumsum(xm * xm, axis=0)]), ventana)
+        syy = _suma_movil(np.concatenate([cero, np.cumsum(ym * ym, axis=0)]), ventana)
+        sxy = _suma_movil(np.concatenate([cero, np.cumsum(xm * ym, axis=0)]), ventana)
+
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr_j = cov / np.sqrt(var_x * var_y)
+            beta_j = cov / var_y
+        insuficiente = (n < minimo) | (var_x <= 0) | (var_y <= 0)
+        corr_j[insuficiente] = np.nan
+        beta_j[insuficiente] = np.nan
+        corr[:, :, j] = np.clip(corr_j, -1.0, 1.0)
+        beta[:, :, j] = beta_j
+
+    return corr, beta
+
+
+def guardar_cubo(path, fechas, tickers, macros, corr, beta, ventana=VENTANA):
+    np.savez(
+        path,
+        corr=corr,
+        beta=beta,
+        fechas=np.asarray(pd.DatetimeIndex(fechas).strftime('%Y-%m-%d'), dtype=str),
+        tickers=np.asarray(tickers, dtype=str),
+        macros=np.asarray(macros, dtype=str),
+        ventana=np.int32(ventana),
+    )
+
+
+def cargar_cubo(path=ARCHIVO_SALIDA):
+    """Carga el cubo guardado como diccionario de arreglos (corr, beta, fechas, tickers, macros, ventana)."""
+    with np.load(path) as datos:
+        return {clave: datos[clave] for clave in datos.files}
+
+
+def resumen_ultima_fecha(fechas, tickers, macros, corr, beta):
+    """Tabla larga (ticker, macro, corr, beta) con la última fecha disponible del cubo."""
+    indice = pd.MultiIndex.from_product([tickers, macros], names=['ticker', 'macro'])
+    return pd.DataFrame({
+        'corr': corr[-1].reshape(-1),
+        'beta': beta[-1].reshape(-1),
+    }, index=indice).dropna().reset_index().assign(fecha=pd.DatetimeIndex(fechas)[-1].strftime('%Y-%m-%d'))
+
+
+def main():
+    print("--- INICIANDO CORRELACIONES MÓVILES ACCIONES vs MACRO ---")
+    for archivo in (ARCHIVO_ACCIONES, ARCHIVO_MACRO):
+        if not os.path.exists(archivo):
+            print(f"!! ERROR: El archivo '{archivo}' no se encontró.")
+            return
+    try:
+        print("-> Cargando y alineando paneles de retornos...")
+        fechas, tickers, r_acciones, macros, r_macro = cargar_paneles_retornos(ARCHIVO_ACCIONES, ARCHIVO_MACRO)
+        print(f"   - {len(fechas)} fechas, {len(tickers)} acciones, {len(macros)} series macro")
+
+        print(f"-> Calculando correlaciones y betas (ventana {VENTANA} días)...")
+        corr, beta = correlaciones_moviles(r_acciones, r_macro)
+        guardar_cubo(ARCHIVO_SALIDA, fechas, tickers, macros, corr, beta)
+        print(f"-> Cubo guardado en '{ARCHIVO_SALIDA}' ({corr.nbytes / 1e6:.1f} MB por métrica)")
+
+        df_resumen = resumen_ultima_fecha(fechas, tickers, macros, corr, beta)
+        if not df_resumen.empty:
+            print("\n--- CORRELACIONES MÁS FUERTES (ÚLTIMA FECHA) ---")
+            df_resumen['abs_corr'] = df_resumen['corr'].abs()
+            top = df_resumen.sort_values('abs_corr', ascending=False).head(15)
+            print(top[['ticker', 'macro', 'corr', 'beta']].round(3).to_string(index=False))
+        print("\n--- ¡PROCESO COMPLETADO CON ÉXITO! ---")
+    except Exception as e:
+        print(f"\n!! Ocurrió un error inesperado: {e}")
+
+
+if __name__ == "__main__":
+    main()
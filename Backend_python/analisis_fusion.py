@@ -7,10 +7,15 @@ ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if ROOT not in sys.path:
     sys.path.append(ROOT)
 import config
+from Backend_python.base_tecnica import base_desde_marco, cargar_base_tecnica
+from Backend_python.instrumentacion import tramo
+from Backend_python.metricas import OPORTUNIDADES
 
 ARCHIVO_TECNICO = config.ARCHIVO_TECNICO
 ARCHIVO_FUNDAMENTAL = config.CSV_FUNDAMENTAL
 ARCHIVO_SALIDA_FUSION = config.ARCHIVO_OPORTUNIDADES
+# Columnas de la base técnica que usa la detección de divergencias
+COLUMNAS_TECNICAS = ['close', 'rsi_14']
 
 def detectar_divergencias(df_tecnico, df_fundamental):
     print("-> Fusionando bases de datos...")
@@ -28,7 +33,7 @@ def detectar_divergencias(df_tecnico, df_fundamental):
     
     # Rellenar datos fundamentales hacia adelante para cada ticker
     columnas_a_rellenar = df_fundamental.columns.drop(['ticker', 'year'])
-    df_fusionado[columnas_a_rellenar] = df_fusionado.groupby('ticker')[columnas_a_rellenar].ffill()
+    df_fusionado[columnas_a_rellenar] = df_fusionado.groupby('ticker', observed=True)[columnas_a_rellenar].ffill()
     
     # Filtrar solo registros con datos fundamentales
     df_fusionado = df_fusionado.dropna(subset=['salud_financiera'])
@@ -59,10 +64,23 @@ def detectar_divergencias(df_tecnico, df_fundamental):
     
     return oportunidades
 
-def main():
-    df_tecnico = pd.read_csv(ARCHIVO_TECNICO, sep=';', decimal=',')
-    df_fundamental = pd.read_csv(ARCHIVO_FUNDAMENTAL, sep=';', decimal=',')
-    oportunidades = detectar_divergencias(df_tecnico, df_fundamental)
+def main(df_tecnico=None):
+    """`df_tecnico`: base técnica ya en memoria (modo daemon); sin ella se lee ARCHIVO_TECNICO."""
+    with tramo("lectura CSV tecnico (fusión)", categoria='lectura') as medicion:
+        if df_tecnico is not None:
+            base = base_desde_marco(df_tecnico, COLUMNAS_TECNICAS)
+        else:
+            base = cargar_base_tecnica(ARCHIVO_TECNICO, COLUMNAS_TECNICAS)
+        df_tecnico = base.marco(COLUMNAS_TECNICAS)
+        print(f"   - Base técnica compacta: {len(base)} registros, {len(base.tickers)} tickers, {base.memoria_mb():.0f} MB")
+        df_fundamental = pd.read_csv(ARCHIVO_FUNDAMENTAL, sep=';', decimal=',')
+        medicion['filas_salida'] = len(df_tecnico)
+    with tramo("detección de divergencias", filas_entrada=len(df_tecnico)) as medicion:
+        oportunidades = detectar_divergencias(df_tecnico, df_fundamental)
+        medicion['filas_salida'] = sum(len(df) for _, df in oportunidades)
+    OPORTUNIDADES.limpiar()
+    for nombre_oportunidad, df_oportunidad in oportunidades:
+        OPORTUNIDADES.fijar(nombre_oportunidad, valor=len(df_oportunidad))
     
     if oportunidades:
         print("\nSe encontraron las siguientes OPORTUNIDADES DE DIVERGENCIA:")
@@ -0,0 +1,137 @@
+"""
+Escáner de adelanto/rezago (lead-lag) entre las series macro y cada acción.
+
+Calcula la correlación cruzada de retornos para todos los rezagos en [-MAX_LAG, +MAX_LAG] vía FFT
+(O(n log n) por par) y reporta el rezago pico, su fuerza y una significancia aproximada.
+Convención: rezago > 0 significa que la serie macro adelanta a la acción en ese número de días.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from scipy.special import erfc
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+from Backend_python.analisis_correlacion_macro import cargar_paneles_retornos
+
+ARCHIVO_ACCIONES = config.ARCHIVO_ACCIONES_MASTER
+ARCHIVO_MACRO = config.ARCHIVO_MACRO
+ARCHIVO_SALIDA = config.ARCHIVO_LEAD_LAG
+MAX_LAG = config.MAX_LAG_LEAD_LAG
+MINIMO_OBSERVACIONES = config.MINIMO_OBSERVACIONES_CORRELACION
+
+
+def _centrar(retornos):
+    """Centra cada columna sobre sus datos válidos y reemplaza faltantes por cero (no aportan a la suma)."""
+    valido = ~np.isnan(retornos)
+    centrado = np.where(valido, retornos - np.nanmean(retornos, axis=0), 0.0)
+    return centrado, valido
+
+
+def correlacion_cruzada_fft(retornos_x, retornos_y, max_lag=MAX_LAG):
+    """
+    Correlación cruzada normalizada de cada columna de `retornos_x` (T × S) contra cada columna de
+    `retornos_y` (T × M) para rezagos -max_lag..+max_lag.
+
+    Retorna (rezagos, cc, n_par), ambos de forma (S × M × rezagos); n_par es el número de fechas
+    donde las dos series tienen dato una vez desplazada la macro en cada rezago. Sin fechas no hay
+    rezagos que evaluar y los arreglos vuelven vacíos.
+    """
+    n_fechas = retornos_x.shape[0]
+    if n_fechas == 0:
+        vacio = (retornos_x.shape[1], retornos_y.shape[1], 0)
+        return np.arange(0), np.empty(vacio, dtype=np.float64), np.zeros(vacio, dtype=np.int64)
+    x, valido_x = _centrar(retornos_x)
+    y, valido_y = _centrar(retornos_y)
+    max_lag = min(max_lag, n_fechas - 1)
+    rezagos = np.arange(-max_lag, max_lag + 1)
+
+    # Relleno con ceros hasta una potencia de 2 para evitar el solapamiento circular de la FFT
+    nfft = 1 << int(np.ceil(np.log2(2 * n_fechas)))
+    fx = np.fft.rfft(x, n=nfft, axis=0)
+    fy = np.fft.rfft(y, n=nfft, axis=0)
+    # La misma correlación sobre las máscaras de datos válidos cuenta las fechas pareadas por rezago
+    fvx = np.fft.rfft(valido_x.astype(np.float64), n=nfft, axis=0)
+    fvy = np.fft.rfft(valido_y.astype(np.float64), n=nfft, axis=0)
+    norma = np.sqrt(np.outer((x * x).sum(axis=0), (y * y).sum(axis=0)))
+
+    cc = np.empty((x.shape[1], y.shape[1], len(rezagos)), dtype=np.float64)
+    n_par = np.empty(cc.shape, dtype=np.int64)
+    for j in range(y.shape[1]):
+        # r[k] = sum_t x[t] * y[t - k]: la macro en t-k contra la acción en t
+        completa = np.fft.irfft(fx * np.conj(fy[:, j])[:, None], n=nfft, axis=0)
+        cc[:, j, :] = completa[rezagos % nfft].T
+        pares = np.fft.irfft(fvx * np.conj(fvy[:, j])[:, None], n=nfft, axis=0)
+        n_par[:, j, :] = np.rint(pares[rezagos % nfft]).T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cc /= norma[:, :, None]
+    return rezagos, cc, n_par
+
+
+def escanear_lead_lag(tickers, macros, retornos_acciones, retornos_macro, max_lag=MAX_LAG, minimo=MINIMO_OBSERVACIONES):
+    """
+    Tabla con el rezago pico por par (ticker, macro), ordenada por fuerza. El p-valor usa la
+    aproximación normal r·√n, con n las fechas pareadas en el rezago pico, y corrige por Bonferroni
+    sobre la cantidad de rezagos evaluados.
+    """
+    columnas = ['ticker', 'macro', 'lag_pico', 'corr_pico', 'corr_lag0', 'z', 'p_valor', 'observaciones', 'lidera']
+    rezagos, cc, n_par = correlacion_cruzada_fft(retornos_acciones, retornos_macro, max_lag)
+    if len(rezagos) == 0:
+        return pd.DataFrame(columns=columnas)
+    cc_abs = np.nan_to_num(np.abs(cc), nan=-1.0)
+    idx_pico = cc_abs.argmax(axis=2)
+    corr_pico = np.take_along_axis(cc, idx_pico[:, :, None], axis=2)[:, :, 0]
+    n_pico = np.take_along_axis(n_par, idx_pico[:, :, None], axis=2)[:, :, 0]
+    corr_cero = cc[:, :, int(np.where(rezagos == 0)[0][0])]
+
+    z = np.abs(corr_pico) * np.sqrt(n_pico)
+    p_valor = np.minimum(1.0, erfc(z / np.sqrt(2.0)) * len(rezagos))
+
+    indice = pd.MultiIndex.from_product([tickers, macros], names=['ticker', 'macro'])
+    df = pd.DataFrame({
+        'lag_pico': rezagos[idx_pico].reshape(-1),
+        'corr_pico': corr_pico.reshape(-1),
+        'corr_lag0': corr_cero.reshape(-1),
+        'z': z.reshape(-1),
+        'p_valor': p_valor.reshape(-1),
+        'observaciones': n_pico.reshape(-1),
+    }, index=indice).reset_index()
+    df = df[(df['observaciones'] >= minimo) & df['corr_pico'].notna()]
+    df['lidera'] = np.select([df['lag_pico'] > 0, df['lag_pico'] < 0], ['macro', 'accion'], default='simultaneo')
+    return df.reindex(df['corr_pico'].abs().sort_values(ascending=False).index).reset_index(drop=True)
+
+
+def main():
+    print("--- INICIANDO ESCÁNER LEAD-LAG MACRO vs ACCIONES ---")
+    for archivo in (ARCHIVO_ACCIONES, ARCHIVO_MACRO):
+        if not os.path.exists(archivo):
+            print(f"!! ERROR: El archivo '{archivo}' no se encontró.")
+            return
+    try:
+        print("-> Cargando y alineando paneles de retornos...")
+        _, tickers, r_acciones, macros, r_macro = cargar_paneles_retornos(ARCHIVO_ACCIONES, ARCHIVO_MACRO)
+        print(f"-> Calculando correlación cruzada vía FFT (rezagos ±{MAX_LAG})...")
+        df_lead_lag = escanear_lead_lag(tickers, macros, r_acciones, r_macro)
+        df_lead_lag.to_csv(ARCHIVO_SALIDA, index=False, sep=';', decimal=',')
+        print(f"-> Tabla guardada en '{ARCHIVO_SALIDA}' ({len(df_lead_lag)} pares)")
+
+        lideres = df_lead_lag[(df_lead_lag['lidera'] == 'macro') & (df_lead_lag['p_valor'] < 0.05)]
+        print("\n--- INDICADORES MACRO ADELANTADOS (p < 0,05) ---")
+        if lideres.empty:
+            print("No se encontraron adelantos significativos.")
+        else:
+            cols = ['ticker', 'macro', 'lag_pico', 'corr_pico', 'corr_lag0', 'p_valor']
+            print(lideres[cols].head(20).round(4).to_string(index=False))
+        print("\n--- ¡PROCESO COMPLETADO CON ÉXITO! ---")
+    except Exception as e:
+        print(f"\n!! Ocurrió un error inesperado: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Barras intradía: descarga, almacenamiento particionado y remuestreo a marcos mayores.
+
+La barra base (INTERVALO_INTRADIA: '1m', '5m' o '15m') se descarga de Yahoo Finance y se guarda
+particionada por ticker y mes, en hora local de la bolsa:
+
+    output/intradia/base_5m/<ticker>/<AAAA-MM>.csv
+    output/intradia/marcos/<marco>/<ticker>/<AAAA-MM>.csv     (15m, 1h, 1d, 1w)
+    output/intradia/indicadores/<marco>/<ticker>.csv
+
+Una barra intradía es unas 100 veces el volumen de la diaria, así que nada se reescribe entero:
+`guardar_particiones` solo toca los meses con barras nuevas o corregidas y retorna, por ticker,
+la primera barra que cambió. Desde ahí `actualizar_marcos` recalcula cada marco a partir del inicio
+de la cubeta que la contiene (la última cubeta suele estar incompleta) y deja intacto lo anterior.
+
+El remuestreo es vectorizado: cada barra base recibe el inicio de su cubeta como entero (ns) y
+las cubetas se reducen con `np.maximum.reduceat` y afines sobre los cortes contiguos. Las
+cubetas intradía se alinean con la apertura (HORARIO_MERCADO), la diaria es el día calendario y
+la semanal empieza el lunes.
+
+Uso:
+    python3 Backend_python/barras_intradia.py [--intervalo 5m] [--marcos 15m 1h 1d 1w] [--tickers BCI]
+    python3 Backend_python/barras_intradia.py --remuestrear --indicadores 1h 1d
+"""
+
+import argparse
+import glob
+import numpy as np
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import os
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+from Backend_python.instrumentacion import tramo
+from Backend_python.metricas import FALLOS_DESCARGA, FILAS_ESCRITAS
+
+DIRECTORIO_INTRADIA = config.DIRECTORIO_INTRADIA
+INTERVALO_INTRADIA = config.INTERVALO_INTRADIA
+MARCOS_INTRADIA = config.MARCOS_INTRADIA
+
+COLUMNAS = ['date', 'ticker', 'open', 'high', 'low', 'close', 'volume']
+PRECIOS = ['open', 'high', 'low', 'close']
+# Largo de cada marco en minutos; '1d' y '1w' se alinean al calendario
+MINUTOS_MARCO = {'1m': 1, '5m': 5, '15m': 15, '30m': 30, '1h': 60, '1d': 1440, '1w': 7 * 1440}
+NS_MINUTO = 60 * 10**9
+NS_DIA = 1440 * NS_MINUTO
+
+
+def directorio_base(intervalo=INTERVALO_INTRADIA, directorio=DIRECTORIO_INTRADIA):
+    return os.path.join(directorio, f"base_{intervalo}")
+
+
+def directorio_marco(marco, directorio=DIRECTORIO_INTRADIA):
+    return os.path.join(directorio, 'marcos', marco)
+
+
+def _formato_fecha(marco):
+    return '%Y-%m-%d' if MINUTOS_MARCO[marco] >= 1440 else '%Y-%m-%d %H:%M:%S'
+
+
+def validar_marcos(marcos, intervalo=INTERVALO_INTRADIA):
+    """Lanza ValueError si algún marco no existe o no es mayor que la barra base."""
+    for marco in (intervalo, *marcos):
+        if marco not in MINUTOS_MARCO:
+            raise ValueError(f"Marco desconocido: {marco} (disponibles: {', '.join(MINUTOS_MARCO)})")
+    menores = [m for m in marcos if MINUTOS_MARCO[m] <= MINUTOS_MARCO[intervalo]]
+    if menores:
+        raise ValueError(f"Los marcos {', '.join(menores)} no son mayores que la barra base {intervalo}")
+
+
+# ---------------------------------------------------------------------------
+# Almacenamiento particionado por ticker y mes
+# ---------------------------------------------------------------------------
+
+def _leer_particion(path):
+    df = pd.read_csv(path, sep=';', decimal=',', float_precision='round_trip')
+    df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+    return df
+
+
+def tickers_guardados(directorio):
+    if not os.path.isdir(directorio):
+        return []
+    return sorted(t for t in os.listdir(directorio) if os.path.isdir(os.path.join(directorio, t)))
+
+
+def leer_particiones(directorio, ticker, desde=None):
+    """Barras de `ticker` en `directorio` desde `desde` (inclusive; None = todas), ordenadas por fecha."""
+    partes = sorted(glob.glob(os.path.join(directorio, ticker, '*.csv')))
+    if desde is not None:
+        mes = pd.Timestamp(desde).strftime('%Y-%m')
+        partes = [p for p in partes if os.path.basename(p)[:-4] >= mes]
+    if not partes:
+        return pd.DataFrame(columns=COLUMNAS)
+    df = pd.concat([_leer_particion(p) for p in partes], ignore_index=True)
+    if desde is not None:
+        df = df[df['date'] >= pd.Timestamp(desde)]
+    return df.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def ultima_barra(directorio, ticker):
+    """Fecha de la última barra guardada de `ticker` (solo lee la última partición) o None."""
+    partes = sorted(glob.glob(os.path.join(directorio, ticker, '*.csv')))
+    if not partes:
+        return None
+    fechas = _leer_particion(partes[-1])['date']
+    return fechas.max() if len(fechas) else None
+
+
+def guardar_particiones(df, directorio, formato='%Y-%m-%d %H:%M:%S'):
+    """
+    Fusiona `df` (varias barras por ticker) con las particiones por ticker y mes de `directorio`:
+    las barras nuevas se agregan y las repetidas se reemplazan. Solo se reescriben los meses con
+    cambios. Retorna {ticker: primera barra nueva o distinta} de los tickers que cambiaron.
+    """
+    cambios = {}
+    if df.empty:
+        return cambios
+    df = df[COLUMNAS]
+    meses = df['date'].dt.strftime('%Y-%m')
+    for (ticker, mes), parte in df.groupby([df['ticker'], meses], sort=True):
+        parte = parte.drop_duplicates('date', keep='last').sort_values('date')
+        path = os.path.join(directorio, str(ticker), f"{mes}.csv")
+        if os.path.exists(path):
+            existente = _leer_particion(path)
+            previo = existente.set_index('date').reindex(parte['date'])
+            iguales = np.isclose(previo[PRECIOS + ['volume']].to_numpy(dtype=float),
+                                 parte[PRECIOS + ['volume']].to_numpy(dtype=float), rtol=1e-9, atol=0)
+            distintas = ~iguales.all(axis=1)
+            if not distintas.any():
+                continue
+            primera = parte['date'].to_numpy()[distintas].min()
+            parte = pd.concat([existente, parte]).drop_duplicates('date', keep='last').sort_values('date')
+        else:
+            primera = parte['date'].min()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporal = path + '.tmp'
+        parte.to_csv(temporal, index=False, sep=';', decimal=',', date_format=formato)
+        os.replace(temporal, path)
+        primera = pd.Timestamp(primera)
+        cambios[ticker] = min(cambios.get(ticker, primera), primera)
+    return cambios
+
+
+# ---------------------------------------------------------------------------
+# Remuestreo
+# ---------------------------------------------------------------------------
+
+def _apertura_minutos():
+    horas, minutos = config.HORARIO_MERCADO[0].split(':')
+    return int(horas) * 60 + int(minutos)
+
+
+def claves_marco(ns, marco):
+    """Inicio (ns, hora local) de la cubeta de `marco` de cada fecha en `ns` (int64)."""
+    ns = np.asarray(ns, dtype=np.int64)
+    if marco == '1w':
+        dias = ns // NS_DIA
+        return (dias - (dias + 3) % 7) * NS_DIA  # 1970-01-01 fue jueves: el lunes queda 3 días antes
+    tamano = MINUTOS_MARCO[marco] * NS_MINUTO
+    if marco == '1d':
+        return ns - ns % tamano
+    # Alineadas con la apertura: con 09:30 las cubetas de 1h son 09:30, 10:30, ...
+    origen = (_apertura_minutos() * NS_MINUTO) % tamano
+    return ns - (ns - origen) % tamano
+
+
+def remuestrear(df, marco):
+    """Barras de `marco` desde las barras base de `df` (uno o más tickers)."""
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNAS)
+    df = df.dropna(subset=PRECIOS).sort_values(['ticker', 'date'], kind='stable')
+    codigos, tickers = pd.factorize(df['ticker'])
+    inicios = claves_marco(df['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64), marco)
+    cortes = np.flatnonzero(np.r_[True, (codigos[1:] != codigos[:-1]) | (inicios[1:] != inicios[:-1])])
+    finales = np.r_[cortes[1:], len(df)] - 1
+    return pd.DataFrame({
+        'date': inicios[cortes].astype('datetime64[ns]'),
+        'ticker': tickers[codigos[cortes]],
+        'open': df['open'].to_numpy(dtype=float)[cortes],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=float), cortes),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=float), cortes),
+        'close': df['close'].to_numpy(dtype=float)[finales],
+        'volume': np.add.reduceat(df['volume'].fillna(0).to_numpy(dtype=float), cortes),
+    })
+
+
+def actualizar_marcos(cambios, marcos=MARCOS_INTRADIA, intervalo=INTERVALO_INTRADIA, directorio=DIRECTORIO_INTRADIA):
+    """
+    Remuestrea los tickers de `cambios` ({ticker: primera barra base que cambió}, None = toda la
+    historia) a cada marco de `marcos`. Cada marco se recalcula desde la cubeta que contiene esa
+    barra. Retorna {marco: {ticker: primera barra del marco que cambió}}.
+    """
+    validar_marcos(marcos, intervalo)
+    base = directorio_base(intervalo, directorio)
+    resultado = {marco: {} for marco in marcos}
+    for ticker, desde in cambios.items():
+        inicios = {m: None if desde is None else pd.Timestamp(claves_marco([pd.Timestamp(desde).value], m)[0])
+                   for m in marcos}
+        # Se lee la base una sola vez, desde la cubeta más antigua de todos los marcos
+        barras = leer_particiones(base, ticker, desde=None if desde is None else min(inicios.values()))
+        for marco in marcos:
+            parte = barras if inicios[marco] is None else barras[barras['date'] >= inicios[marco]]
+            resultado[marco].update(guardar_particiones(remuestrear(parte, marco), directorio_marco(marco, directorio),
+                                                        _formato_fecha(marco)))
+    return resultado
+
+
+# ---------------------------------------------------------------------------
+# Indicadores por marco
+# ---------------------------------------------------------------------------
+
+def calcular_indicadores_marco(marco, tickers=None, intervalo=INTERVALO_INTRADIA, directorio=DIRECTORIO_INTRADIA):
+    """
+    Corre el motor de indicadores (por bloques, como el modo streaming) sobre las barras de
+    `marco` (puede ser la barra base) de cada ticker de `tickers` (None = todos) y escribe
+    indicadores/<marco>/<ticker>.csv. Retorna las filas escritas.
+    """
+    # motor_condor carga pandas_ta: se importa solo si se piden indicadores
+    from Backend_python.motor_condor import indicadores_por_bloques
+
+    origen = directorio_base(intervalo, directorio) if marco == intervalo else directorio_marco(marco, directorio)
+    destino = os.path.join(directorio, 'indicadores', marco)
+    os.makedirs(destino, exist_ok=True)
+    filas = 0
+    for ticker in tickers or tickers_guardados(origen):
+        barras = leer_particiones(origen, ticker)
+        if barras.empty:
+            continue
+        path = os.path.join(destino, f"{ticker}.csv")
+        temporal = path + '.tmp'
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        escritas = 0
+        for bloque in indicadores_por_bloques(barras):
+            bloque.to_csv(temporal, mode='a', header=not escritas, index=False, sep=';', decimal=',',
+                          date_format=_formato_fecha(marco))
+            escritas += len(bloque)
+        os.replace(temporal, path)
+        filas += escritas
+    FILAS_ESCRITAS.incrementar(f"intradia_indicadores_{marco}", valor=filas)
+    return filas
+
+
+# ---------------------------------------------------------------------------
+# Ingesta
+# ---------------------------------------------------------------------------
+
+def ingestar_intradia(tickers=None, intervalo=INTERVALO_INTRADIA, marcos=MARCOS_INTRADIA,
+                      directorio=DIRECTORIO_INTRADIA):
+    """
+    Descarga las barras base desde la última guardada de cada ticker (la última se vuelve a pedir
+    porque cambia durante la rueda), las fusiona con las particiones y remuestrea solo lo nuevo.
+    Retorna {ticker: primera barra base que cambió}.
+    """
+    # yfinance solo hace falta al descargar
+    from Backend_python.descargar_acciones import cargar_lista_tickers, descargar_intradia_para_ticker
+
+    validar_marcos(marcos, intervalo)
+    base = directorio_base(intervalo, directorio)
+    cambios = {}
+    for nemo in tickers or cargar_lista_tickers(config.CSV_ACCIONES):
+        try:
+            with tramo(f"descarga intradía {nemo}", categoria='descarga') as medicion:
+                df_t = descargar_intradia_para_ticker(nemo, intervalo, inicio=ultima_barra(base, nemo))
+                medicion['filas_salida'] = len(df_t)
+        except Exception as e:
+            FALLOS_DESCARGA.incrementar(nemo, 'error')
+            print(f"   ✗ Error al descargar {nemo} ({intervalo}): {e}")
+            continue
+        if df_t.empty:
+            FALLOS_DESCARGA.incrementar(nemo, 'sin_datos')
+            continue
+        nuevos = guardar_particiones(df_t, base)
+        FILAS_ESCRITAS.incrementar(f"intradia_{intervalo}", valor=len(df_t))
+        if nuevos:
+            print(f"   - {nemo}: {len(df_t)} barras {intervalo}, cambios desde {nuevos[nemo]}")
+        cambios.update(nuevos)
+    with tramo("remuestreo intradía", filas_entrada=len(cambios)):
+        actualizar_marcos(cambios, marcos, intervalo, directorio)
+    return cambios
+
+
+def agregar_argumentos(parser):
+    """Opciones de la ingesta intradía (`condor.py intraday` declara las mismas)."""
+    parser.add_argument('--intervalo', default=INTERVALO_INTRADIA, help="Barra base: 1m, 5m o 15m")
+    parser.add_argument('--marcos', nargs='+', default=list(MARCOS_INTRADIA), help="Marcos a construir")
+    parser.add_argument('--tickers', nargs='+', default=None, help="Tickers (por defecto los de CSV_ACCIONES)")
+    parser.add_argument('--remuestrear', action='store_true',
+                        help="No descarga: reconstruye los marcos desde la base guardada")
+    parser.add_argument('--indicadores', nargs='*', default=None,
+                        help="Marcos sobre los que calcular indicadores (sin valores: todos los de --marcos)")
+    return parser
+
+
+def main(args=None):
+    if args is None:
+        args = agregar_argumentos(argparse.ArgumentParser(
+            description="Barras intradía particionadas y remuestreo a marcos mayores")).parse_args()
+    intervalo = args.intervalo or INTERVALO_INTRADIA
+    marcos = args.marcos or list(MARCOS_INTRADIA)
+    try:
+        validar_marcos(marcos, intervalo)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 2
+
+    print(f"--- Barras intradía {intervalo} -> {', '.join(marcos)} ---")
+    if args.remuestrear:
+        tickers = args.tickers or tickers_guardados(directorio_base(intervalo))
+        with tramo("remuestreo intradía completo", filas_entrada=len(tickers)):
+            actualizar_marcos({t: None for t in tickers}, marcos, intervalo)
+        cambiados = tickers
+        print(f"✓ Marcos reconstruidos para {len(tickers)} tickers")
+    else:
+        cambiados = list(ingestar_intradia(args.tickers, intervalo, marcos))
+        print(f"✓ {len(cambiados)} tickers con barras nuevas")
+
+    if args.indicadores is not None and cambiados:
+        for marco in args.indicadores or marcos:
+            with tramo(f"indicadores intradía {marco}", categoria='indicadores') as medicion:
+                medicion['filas_salida'] = calcular_indicadores_marco(marco, cambiados, intervalo)
+            print(f"   - Indicadores {marco}: {medicion['filas_salida']} filas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Representación compacta en memoria de la base técnica (database_maestra_tecnica.csv).
+
+Leída tal cual, la base técnica es un DataFrame de unas 80 columnas float64 con el ticker como
+strings de Python y la fecha como datetime64, y cada `merge`, `rename` o filtro booleano posterior
+la copia entera. `cargar_base_tecnica` lee solo las columnas pedidas y las guarda como arreglos
+contiguos:
+
+- tickers como categoría: una lista ordenada de nombres y `offsets` (int64, largo n_tickers + 1);
+  las filas del ticker i son [offsets[i], offsets[i + 1]) y dentro de cada ticker van por fecha;
+- fechas como número de día desde 1970-01-01 (int32);
+- indicadores en float32; precios y volumen (COLUMNAS_FLOAT64) en float64, porque float32 no
+  representa exactamente precios con muchos decimales ni volúmenes grandes.
+
+Los accesos por ticker (`columna`, `rango`) retornan vistas sobre esos arreglos y `marco` arma un
+DataFrame que comparte la memoria de las columnas numéricas en lugar de copiarlas.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import os
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+ARCHIVO_TECNICO = config.ARCHIVO_TECNICO
+CLAVES = ('date', 'ticker')
+COLUMNAS_FLOAT64 = ('open', 'high', 'low', 'close', 'volume')
+
+
+class BaseTecnica:
+    """Base técnica ordenada por (ticker, fecha) con columnas en arreglos contiguos."""
+
+    def __init__(self, tickers, offsets, dias, valores):
+        self.tickers = tickers
+        self.offsets = offsets
+        self.dias = dias
+        self.valores = valores
+        self._posiciones = {ticker: i for i, ticker in enumerate(tickers)}
+        self._codigos = None
+
+    def __len__(self):
+        return len(self.dias)
+
+    @property
+    def columnas(self):
+        return list(self.valores)
+
+    def rango(self, ticker):
+        """slice de las filas de `ticker` (vacío si no está en la base)."""
+        i = self._posiciones.get(ticker)
+        if i is None:
+            return slice(0, 0)
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def columna(self, nombre, ticker=None):
+        """Arreglo de la columna `nombre` (de un ticker o de toda la base); es una vista, no una copia."""
+        valores = self.valores[nombre]
+        return valores if ticker is None else valores[self.rango(ticker)]
+
+    def fechas(self, ticker=None):
+        """Fechas como datetime64[D] (se derivan de los días int32, así que es un arreglo nuevo)."""
+        dias = self.dias if ticker is None else self.dias[self.rango(ticker)]
+        return dias.astype('datetime64[D]')
+
+    def codigos(self):
+        """Posición del ticker de cada fila en `tickers` (int32)."""
+        if self._codigos is None:
+            self._codigos = np.repeat(np.arange(len(self.tickers), dtype=np.int32), np.diff(self.offsets))
+        return self._codigos
+
+    def ultimas(self):
+        """Índice de la última barra de cada ticker."""
+        return self.offsets[1:] - 1
+
+    def marco(self, columnas=None, fechas=True):
+        """
+        DataFrame con 'ticker' (categoría), 'date' (si `fechas`) y `columnas` (None = todas). Las
+        columnas numéricas comparten memoria con la base: no modificarlas en el lugar.
+        """
+        columnas = self.columnas if columnas is None else list(columnas)
+        datos = {'ticker': pd.Categorical.from_codes(self.codigos(), categories=self.tickers)}
+        if fechas:
+            datos['date'] = self.fechas().astype('datetime64[ns]')
+        for nombre in columnas:
+            datos[nombre] = self.valores[nombre]
+        return pd.DataFrame(datos, copy=False)
+
+    def memoria_mb(self):
+        arreglos = [self.offsets, self.dias, *self.valores.values()]
+        return sum(a.nbytes for a in arreglos) / (1024 * 1024)
+
+
+def cargar_base_tecnica(path=ARCHIVO_TECNICO, columnas=None):
+    """
+    Lee `path` (formato de motor_condor: ';' y coma decimal) con solo `columnas` (None = todas)
+    y retorna una BaseTecnica. Lanza ValueError si falta alguna columna pedida.
+    """
+    disponibles = pd.read_csv(path, sep=';', decimal=',', nrows=0).columns.tolist()
+    faltantes = [c for c in (*CLAVES, *(columnas or ())) if c not in disponibles]
+    if faltantes:
+        raise ValueError(f"Columnas ausentes en {path}: {', '.join(faltantes)}")
+    columnas = [c for c in disponibles if c not in CLAVES] if columnas is None else list(dict.fromkeys(columnas))
+    # Tipos finales desde el parser: el CSV nunca pasa entero por float64 ni por strings de Python
+    tipos = {'date': 'category', 'ticker': 'category'}
+    tipos.update({c: np.float64 if c in COLUMNAS_FLOAT64 else np.float32 for c in columnas})
+    df = pd.read_csv(path, sep=';', decimal=',', usecols=[*CLAVES, *columnas], dtype=tipos)
+
+    dias_por_fecha = pd.to_datetime(df['date'].cat.categories).to_numpy().astype('datetime64[D]').astype(np.int32)
+    codigos_fecha = df['date'].cat.codes.to_numpy()
+    return _construir_base(df, columnas, dias_por_fecha[codigos_fecha], codigos_fecha >= 0)
+
+
+def base_desde_marco(df, columnas=None):
+    """
+    BaseTecnica de las `columnas` (None = todas) de un DataFrame técnico ya en memoria, como el que
+    mantiene el modo daemon, sin volver a leer el CSV. Las columnas se copian: la base no comparte
+    memoria con `df`. Lanza ValueError si falta alguna columna pedida.
+    """
+    faltantes = [c for c in (*CLAVES, *(columnas or ())) if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Columnas ausentes en la base técnica en memoria: {', '.join(faltantes)}")
+    columnas = [c for c in df.columns if c not in CLAVES] if columnas is None else list(dict.fromkeys(columnas))
+    tipos = {c: np.float64 if c in COLUMNAS_FLOAT64 else np.float32 for c in columnas}
+    datos = df[columnas].astype(tipos)
+    datos['ticker'] = df['ticker'].astype('category')
+    fechas = pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]')
+    validas = ~np.isnat(fechas)
+    dias = np.where(validas, fechas.astype(np.int64), 0).astype(np.int32)
+    return _construir_base(datos, columnas, dias, validas)
+
+
+def _construir_base(df, columnas, dias, fechas_validas):
+    """BaseTecnica desde `df` (ticker como categoría y `columnas` ya en su tipo final) y los días de cada fila."""
+    tickers = df['ticker'].cat.categories.astype(str)
+    orden_nombres = np.argsort(tickers.to_numpy(), kind='stable')
+    rango_nombre = np.empty(len(tickers), dtype=np.int32)
+    rango_nombre[orden_nombres] = np.arange(len(tickers), dtype=np.int32)
+    codigos_ticker = df['ticker'].cat.codes.to_numpy()
+
+    validas = (codigos_ticker >= 0) & fechas_validas
+    codigos = rango_nombre[codigos_ticker]
+    # El CSV suele venir ya ordenado por (ticker, fecha); solo se reordena si no lo está
+    clave = (codigos.astype(np.int64) << 32) | (dias.astype(np.int64) - np.iinfo(np.int32).min)
+    if validas.all() and np.all(clave[1:] >= clave[:-1]):
+        orden = None
+    else:
+        orden = np.flatnonzero(validas)
+        orden = orden[np.argsort(clave[orden], kind='stable')]
+        codigos, dias = codigos[orden], dias[orden]
+
+    valores = {}
+    for nombre in columnas:
+        arreglo = df[nombre].to_numpy()
+        valores[nombre] = np.ascontiguousarray(arreglo if orden is None else arreglo[orden])
+
+    conteos = np.bincount(codigos, minlength=len(tickers))
+    presentes = conteos > 0
+    offsets = np.concatenate(([0], np.cumsum(conteos[presentes]))).astype(np.int64)
+    tickers = pd.Index(tickers.to_numpy()[orden_nombres][presentes], name='ticker')
+    return BaseTecnica(tickers, offsets, np.ascontiguousarray(dias), valores)
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmark del pipeline sobre un mercado sintético.
+
+El generador produce OHLCV diario determinista (movimiento browniano geométrico con saltos de
+Poisson y volumen correlacionado con el tamaño del movimiento) para universos de 30 a 5.000
+tickers y de 1 a 20 años. Cada ticker usa su propia semilla, así que los precios de un universo
+chico son un prefijo exacto de los de uno grande. Los datos generados se guardan y se reutilizan
+entre corridas.
+
+Cada etapa (limpieza, indicadores, perfiles, fusión, exportación a MySQL y visualización) corre
+con los módulos reales del pipeline dentro de un directorio de trabajo propio, y se mide su
+tiempo de pared, CPU, RSS pico y filas/s. Las corridas se agregan a output/benchmark/resultados.jsonl
+y se comparan con una línea base guardada por escenario (tamaño + semilla): una etapa que tarda
+o consume más de TOLERANCIA_REGRESION_BENCHMARK sobre la base, o cuyas salidas cambian, se
+reporta como regresión y el proceso termina con código 1.
+
+Uso:
+    python3 Backend_python/benchmark.py --tickers 300 --anios 5 [--guardar-base]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+from Backend_python.instrumentacion import rss_actual_mb, rss_pico_mb
+
+DIRECTORIO_BENCHMARK = os.path.abspath(config.DIRECTORIO_BENCHMARK)
+ARCHIVO_RESULTADOS = os.path.join(DIRECTORIO_BENCHMARK, 'resultados.jsonl')
+ARCHIVO_LINEA_BASE = os.path.join(DIRECTORIO_BENCHMARK, 'linea_base.json')
+TOLERANCIA_REGRESION = config.TOLERANCIA_REGRESION_BENCHMARK
+# Diferencias absolutas por debajo de esto son ruido aunque superen la tolerancia relativa
+MIN_DIFERENCIA_S = 0.05
+MIN_DIFERENCIA_MB = 50
+
+RANGO_TICKERS = (30, 5000)
+RANGO_ANIOS = (1, 20)
+DIAS_POR_ANIO = 252
+FECHA_FINAL = '2024-12-31'
+SECTORES = ['Bancos', 'Retail', 'Minería', 'Energía', 'Forestal', 'Utilities', 'Telecomunicaciones', 'Inmobiliario']
+
+ETAPAS = ('limpieza', 'indicadores', 'perfiles', 'fusion', 'exportacion_db', 'visualizacion')
+
+
+# ---------------------------------------------------------------------------
+# Mercado sintético
+# ---------------------------------------------------------------------------
+
+def _generar_ticker(indice, fechas, semilla):
+    """OHLCV de un ticker: GBM con saltos; depende solo de (semilla, indice)."""
+    rng = np.random.default_rng([semilla, indice])
+    n = len(fechas)
+    dt = 1 / DIAS_POR_ANIO
+    mu = rng.normal(0.06, 0.08)
+    sigma = rng.uniform(0.15, 0.55)
+    saltos_por_anio = rng.uniform(0.5, 4.0)
+    precio_inicial = np.exp(rng.uniform(np.log(50), np.log(20000)))
+    volumen_base = np.exp(rng.uniform(np.log(1e4), np.log(5e6)))
+
+    z = rng.standard_normal(n)
+    saltos = rng.poisson(saltos_por_anio * dt, n) * rng.normal(-0.01, 0.06, n)
+    retornos = (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * z + saltos
+    close = precio_inicial * np.exp(np.cumsum(retornos))
+    anterior = np.concatenate(([precio_inicial], close[:-1]))
+    open_ = anterior * np.exp(rng.normal(0, 0.3 * sigma * np.sqrt(dt), n))
+    rango = np.abs(rng.normal(0, 0.6 * sigma * np.sqrt(dt), (2, n)))
+    high = np.maximum(open_, close) * np.exp(rango[0])
+    low = np.minimum(open_, close) * np.exp(-rango[1])
+    volumen = np.round(volumen_base * np.exp(rng.normal(0, 0.4, n)) * (1 + 0.5 * np.abs(z)) * (1 + 20 * np.abs(saltos)))
+    return pd.DataFrame({
+        'date': fechas, 'ticker': f"SIN{indice:04d}",
+        'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volumen,
+    })
+
+
+def generar_mercado(n_tickers, anios, semilla=42):
+    """
+    Retorna (df_master, df_acciones, df_fundamental) con el formato de acciones_master.csv,
+    CSV/acciones.csv y CSV/fundamental.csv para `n_tickers` tickers y `anios` años hábiles.
+    """
+    if not RANGO_TICKERS[0] <= n_tickers <= RANGO_TICKERS[1]:
+        raise ValueError(f"n_tickers debe estar entre {RANGO_TICKERS[0]} y {RANGO_TICKERS[1]}")
+    if not RANGO_ANIOS[0] <= anios <= RANGO_ANIOS[1]:
+        raise ValueError(f"anios debe estar entre {RANGO_ANIOS[0]} y {RANGO_ANIOS[1]}")
+    fechas = pd.bdate_range(end=FECHA_FINAL, periods=anios * DIAS_POR_ANIO).strftime('%Y-%m-%d')
+    df_master = pd.concat([_generar_ticker(i, fechas, semilla) for i in range(n_tickers)], ignore_index=True)
+
+    tickers = [f"SIN{i:04d}" for i in range(n_tickers)]
+    rng = np.random.default_rng([semilla, RANGO_TICKERS[1] + 1])  # stream propio, fuera del rango de tickers
+    df_acciones = pd.DataFrame({
+        'NEMOTECNICO': tickers,
+        'RAZON_SOCIAL': [f"Sintética {i:04d} S.A." for i in range(n_tickers)],
+        'INDUSTRIA': rng.choice(SECTORES, n_tickers),
+    })
+
+    years = list(range(int(fechas[0][:4]), int(fechas[-1][:4]) + 1))
+    n = n_tickers * len(years)
+    df_fundamental = pd.DataFrame({
+        'ticker': np.repeat(tickers, len(years)),
+        'year': np.tile(years, n_tickers),
+        'pe_ratio': rng.uniform(4, 40, n).round(2),
+        'pb_ratio': rng.uniform(0.4, 4, n).round(2),
+        'roe': rng.normal(0.12, 0.07, n).round(3),
+        'debt_to_equity': rng.uniform(0.05, 2, n).round(2),
+        'current_ratio': rng.uniform(0.5, 4, n).round(2),
+        'dividend_yield': rng.uniform(0, 0.1, n).round(3),
+    })
+    # Misma regla de salud financiera que generar_db_fundamental.py
+    df_fundamental['salud_financiera'] = np.select(
+        [(df_fundamental['roe'] > 0.15) & (df_fundamental['debt_to_equity'] < 1), df_fundamental['current_ratio'] < 1],
+        ['Alta', 'Riesgo'], default='Estable')
+    return df_master, df_acciones, df_fundamental
+
+
+def preparar_directorio(n_tickers, anios, semilla):
+    """
+    Crea (o reutiliza) el directorio de trabajo del escenario con CSV/ y output/. Los datos
+    generados se conservan entre corridas; cada etapa borra sus propias salidas antes de correr.
+    Retorna (directorio, segundos_de_generacion o None si se reutilizaron).
+    """
+    directorio = os.path.join(DIRECTORIO_BENCHMARK, f"trabajo_{n_tickers}x{anios}_s{semilla}")
+    master = os.path.join(directorio, config.ARCHIVO_ACCIONES_MASTER)
+    acciones = os.path.join(directorio, config.CSV_ACCIONES)
+    fundamental = os.path.join(directorio, config.CSV_FUNDAMENTAL)
+    for path in (master, acciones, fundamental):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(master):
+        return directorio, None
+    inicio = time.perf_counter()
+    df_master, df_acciones, df_fundamental = generar_mercado(n_tickers, anios, semilla)
+    df_acciones.to_csv(acciones, index=False)
+    df_fundamental.to_csv(fundamental, index=False, sep=';', decimal=',')
+    # El master se escribe al final y de forma atómica: su existencia marca datos completos
+    df_master.to_csv(f"{master}.tmp", index=False, sep=';', decimal=',')
+    os.replace(f"{master}.tmp", master)
+    return directorio, time.perf_counter() - inicio
+
+
+# ---------------------------------------------------------------------------
+# Medición
+# ---------------------------------------------------------------------------
+
+class MonitorMemoria:
+    """Muestrea el RSS en un hilo mientras dura el bloque `with`; `pico_mb` queda con el máximo."""
+
+    def __init__(self, intervalo=0.01):
+        self.intervalo = intervalo
+        self.pico_mb = None
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name='monitor-memoria', daemon=True)
+
+    def _muestrear(self):
+        while True:
+            actual = rss_actual_mb()
+            if actual is not None:
+                self.pico_mb = actual if self.pico_mb is None else max(self.pico_mb, actual)
+            if self._detener.wait(self.intervalo):
+                return
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb):
+        self._detener.set()
+        self._hilo.join()
+        if self.pico_mb is None:
+            self.pico_mb = rss_pico_mb()  # sin /proc: pico de todo el proceso
+        return False
+
+
+def medir_etapa(nombre, funcion, estado, filas_entrada, verbose=False):
+    """Ejecuta `funcion(estado)` midiendo tiempo, CPU y RSS pico. La función retorna métricas extra."""
+    resultado = {'etapa': nombre, 'filas_entrada': filas_entrada, 'error': None}
+    with MonitorMemoria() as monitor:
+        inicio, cpu = time.perf_counter(), time.process_time()
+        try:
+            with contextlib.ExitStack() as pila:
+                if not verbose:
+                    pila.enter_context(contextlib.redirect_stdout(pila.enter_context(open(os.devnull, 'w'))))
+                resultado.update(funcion(estado) or {})
+        except Exception as e:
+            resultado['error'] = f"{type(e).__name__}: {e}"
+        duracion = time.perf_counter() - inicio
+        resultado['cpu_s'] = time.process_time() - cpu
+    resultado['duracion_s'] = duracion
+    resultado['rss_pico_mb'] = monitor.pico_mb
+    resultado['filas_por_segundo'] = filas_entrada / duracion if filas_entrada and duracion > 0 else None
+    return resultado
+
+
+def _borrar(*paths):
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def _salida_nueva(path):
+    if not os.path.exists(path):
+        raise RuntimeError(f"la etapa no generó {path}")
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Etapas (corren con el directorio de trabajo como cwd; los módulos se importan al usarse)
+# ---------------------------------------------------------------------------
+
+def etapa_limpieza(estado):
+    from Backend_python import motor_condor
+    df = pd.read_csv(config.ARCHIVO_ACCIONES_MASTER, delimiter=';')
+    df = motor_condor.limpiar_y_estandarizar(df)
+    if df is None:
+        raise RuntimeError("limpiar_y_estandarizar no retornó datos")
+    estado['limpio'] = df
+    return {'filas_salida': len(df), 'control': float(df['close'].sum())}
+
+
+def etapa_indicadores(estado):
+    from Backend_python import motor_condor
+    df = estado.pop('limpio', None)
+    if df is None:  # sin la etapa de limpieza en esta corrida
+        df = motor_condor.limpiar_y_estandarizar(pd.read_csv(config.ARCHIVO_ACCIONES_MASTER, delimiter=';'))
+    df = motor_condor.calcular_indicadores_y_senales(df)
+    df.to_csv(config.ARCHIVO_TECNICO, index=False, decimal=',', sep=';')
+    control = float(df['rsi_14'].sum()) if 'rsi_14' in df.columns else None
+    return {'filas_salida': len(df), 'columnas_salida': len(df.columns), 'control': control}
+
+
+def etapa_perfiles(estado):
+    from Backend_python import generar_perfiles_de_acciones
+    _borrar(config.ARCHIVO_PERFILES)
+    generar_perfiles_de_acciones.main(reentrenar=True)
+    df = pd.read_csv(_salida_nueva(config.ARCHIVO_PERFILES), sep=';', encoding='utf-8-sig')
+    return {'filas_salida': len(df), 'distribucion': df['personalidad'].value_counts().sort_index().to_dict()}
+
+
+def etapa_fusion(estado):
+    from Backend_python import analisis_fusion
+    _borrar(config.ARCHIVO_OPORTUNIDADES)
+    analisis_fusion.main()
+    filas = len(pd.read_csv(config.ARCHIVO_OPORTUNIDADES, sep=';')) if os.path.exists(config.ARCHIVO_OPORTUNIDADES) else 0
+    return {'filas_salida': filas}
+
+
+def etapa_exportacion_db(estado):
+    if not estado['db']:
+        return {'omitida': "usar --db para exportar a la base configurada en config.py"}
+    from Backend_python.export_indicadores import ejecutar_export_indicadores
+    ejecutar_export_indicadores(config.ARCHIVO_TECNICO)
+    return {}
+
+
+def etapa_visualizacion(estado):
+    from Backend_python.visualizador_interactivo import VisualizadorCondor
+    _borrar(config.DIRECTORIO_CACHE_GRAFICOS)  # se mide el dibujo, no el caché
+    visualizador = VisualizadorCondor()
+    _salida_nueva(visualizador.crear_dashboard_completo())
+    return {}
+
+
+FUNCIONES_ETAPAS = {
+    'limpieza': etapa_limpieza,
+    'indicadores': etapa_indicadores,
+    'perfiles': etapa_perfiles,
+    'fusion': etapa_fusion,
+    'exportacion_db': etapa_exportacion_db,
+    'visualizacion': etapa_visualizacion,
+}
+
+
+def ejecutar_benchmark(n_tickers, anios, semilla=42, etapas=ETAPAS, db=False, verbose=False):
+    """Corre las etapas sobre el escenario y retorna el registro de la corrida."""
+    directorio, generacion_s = preparar_directorio(n_tickers, anios, semilla)
+    filas = n_tickers * anios * DIAS_POR_ANIO
+    corrida = {
+        'escenario': f"{n_tickers}x{anios}_s{semilla}",
+        'tickers': n_tickers, 'anios': anios, 'semilla': semilla, 'filas': filas,
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(), 'plataforma': platform.platform(),
+        'cpus': os.cpu_count(), 'pandas': pd.__version__, 'numpy': np.__version__,
+        'generacion_s': generacion_s,
+        'etapas': [],
+    }
+    anterior = os.getcwd()
+    os.chdir(directorio)
+    try:
+        estado = {'db': db}
+        for nombre in etapas:
+            print(f"-> {nombre}...", flush=True)
+            resultado = medir_etapa(nombre, FUNCIONES_ETAPAS[nombre], estado, filas, verbose=verbose)
+            corrida['etapas'].append(resultado)
+    finally:
+        os.chdir(anterior)
+    return corrida
+
+
+# ---------------------------------------------------------------------------
+# Resultados y línea base
+# ---------------------------------------------------------------------------
+
+def guardar_resultado(corrida, path=ARCHIVO_RESULTADOS):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(corrida, ensure_ascii=False) + '\n')
+    return path
+
+
+def cargar_linea_base(path=ARCHIVO_LINEA_BASE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def guardar_linea_base(corrida, path=ARCHIVO_LINEA_BASE):
+    bases = cargar_linea_base(path)
+    bases[corrida['escenario']] = corrida
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporal = f"{path}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(bases, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, path)
+    return path
+
+
+def _valida(etapa):
+    return etapa is not None and not etapa.get('error') and not etapa.get('omitida')
+
+
+def comparar_con_base(corrida, base, tolerancia=TOLERANCIA_REGRESION):
+    """Retorna la lista de regresiones (textos) de `corrida` respecto de `base`."""
+    regresiones = []
+    etapas_base = {etapa['etapa']: etapa for etapa in base['etapas']}
+    for etapa in corrida['etapas']:
+        previa = etapas_base.get(etapa['etapa'])
+        nombre = etapa['etapa']
+        if _valida(previa) and etapa.get('error'):
+            regresiones.append(f"{nombre}: falla ({etapa['error']}) y en la base funcionaba")
+            continue
+        if not (_valida(etapa) and _valida(previa)):
+            continue
+        if (etapa['duracion_s'] > previa['duracion_s'] * (1 + tolerancia)
+                and etapa['duracion_s'] - previa['duracion_s'] > MIN_DIFERENCIA_S):
+            regresiones.append(f"{nombre}: {etapa['duracion_s']:.2f} s vs {previa['duracion_s']:.2f} s en la base "
+                               f"({etapa['duracion_s'] / previa['duracion_s']:.2f}x)")
+        if (etapa.get('rss_pico_mb') and previa.get('rss_pico_mb')
+                and etapa['rss_pico_mb'] > previa['rss_pico_mb'] * (1 + tolerancia)
+                and etapa['rss_pico_mb'] - previa['rss_pico_mb'] > MIN_DIFERENCIA_MB):
+            regresiones.append(f"{nombre}: RSS pico {etapa['rss_pico_mb']:.0f} MB vs {previa['rss_pico_mb']:.0f} MB en la base")
+        for clave in ('filas_salida', 'columnas_salida', 'distribucion'):
+            if clave in previa and etapa.get(clave) != previa[clave]:
+                regresiones.append(f"{nombre}: {clave} cambió ({previa[clave]} -> {etapa.get(clave)})")
+        if previa.get('control') is not None and etapa.get('control') is not None:
+            if not np.isclose(etapa['control'], previa['control'], rtol=1e-6, atol=0):
+                regresiones.append(f"{nombre}: suma de control cambió ({previa['control']:.6g} -> {etapa['control']:.6g})")
+    return regresiones
+
+
+def imprimir_corrida(corrida, base=None):
+    etapas_base = {etapa['etapa']: etapa for etapa in base['etapas']} if base else {}
+    generacion = (f"generados en {corrida['generacion_s']:.1f} s" if corrida['generacion_s'] is not None
+                  else "datos reutilizados")
+    print(f"\n⏱️  BENCHMARK {corrida['escenario']}: {corrida['tickers']} tickers x {corrida['anios']} años "
+          f"= {corrida['filas']:,} filas ({generacion})")
+    print(f"   {'etapa':<16} {'tiempo':>9} {'CPU':>9} {'RSS pico':>10} {'filas/s':>12} {'vs base':>9}")
+    for etapa in corrida['etapas']:
+        if etapa.get('error') or etapa.get('omitida'):
+            motivo = f"✗ {etapa['error']}" if etapa.get('error') else f"- omitida ({etapa['omitida']})"
+            print(f"   {etapa['etapa']:<16} {motivo}")
+            continue
+        rss = f"{etapa['rss_pico_mb']:.0f} MB" if etapa.get('rss_pico_mb') else '-'
+        velocidad = f"{etapa['filas_por_segundo']:,.0f}" if etapa.get('filas_por_segundo') else '-'
+        previa = etapas_base.get(etapa['etapa'])
+        relativo = f"{etapa['duracion_s'] / previa['duracion_s']:.2f}x" if _valida(previa) and previa['duracion_s'] > 0 else '-'
+        print(f"   {etapa['etapa']:<16} {etapa['duracion_s']:>8.2f}s {etapa['cpu_s']:>8.2f}s {rss:>10} {velocidad:>12} {relativo:>9}")
+
+
+def agregar_argumentos(parser):
+    """Opciones de la suite (`condor.py bench suite` declara las mismas)."""
+    parser.add_argument('--tickers', type=int, default=30,
+                        help=f"Tickers del universo sintético ({RANGO_TICKERS[0]}-{RANGO_TICKERS[1]})")
+    parser.add_argument('--anios', type=int, default=1, help=f"Años de historia ({RANGO_ANIOS[0]}-{RANGO_ANIOS[1]})")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla del generador")
+    parser.add_argument('--etapas', nargs='+', choices=ETAPAS, default=list(ETAPAS),
+                        help="Etapas a medir (por defecto todas, en orden)")
+    parser.add_argument('--db', action='store_true',
+                        help="Incluye la exportación a MySQL (escribe en la base de config.py)")
+    parser.add_argument('--guardar-base', action='store_true',
+                        help="Guarda esta corrida como línea base de su escenario")
+    parser.add_argument('--verbose', action='store_true', help="Muestra la salida de cada etapa")
+    return parser
+
+
+def main(args=None):
+    if args is None:
+        args = agregar_argumentos(argparse.ArgumentParser(description="Benchmark del pipeline con datos sintéticos")).parse_args()
+    desconocidas = set(args.etapas or ()) - set(ETAPAS)
+    if desconocidas:
+        print(f"✗ Etapas desconocidas: {', '.join(sorted(desconocidas))} (opciones: {', '.join(ETAPAS)})")
+        return 2
+    etapas = [etapa for etapa in ETAPAS if not args.etapas or etapa in args.etapas]
+    try:
+        corrida = ejecutar_benchmark(args.tickers, args.anios, args.semilla, etapas, db=args.db, verbose=args.verbose)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 2
+    base = cargar_linea_base().get(corrida['escenario'])
+    imprimir_corrida(corrida, base)
+    print(f"\n✓ Resultados agregados a {guardar_resultado(corrida)}")
+
+    regresiones = comparar_con_base(corrida, base) if base else []
+    if args.guardar_base:
+        print(f"✓ Línea base de {corrida['escenario']} guardada en {guardar_linea_base(corrida)}")
+    elif base is None:
+        print(f"   - Sin línea base para {corrida['escenario']} (usar --guardar-base)")
+    elif regresiones:
+        print(f"\n✗ {len(regresiones)} regresiones respecto de la línea base ({base['fecha']}):")
+        for regresion in regresiones:
+            print(f"   - {regresion}")
+    else:
+        print(f"✓ Sin regresiones respecto de la línea base ({base['fecha']}, tolerancia {TOLERANCIA_REGRESION:.0%})")
+    return 1 if regresiones and not args.guardar_base else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Render de dashboards por paneles con caché en disco.
+
+Cada panel se describe con un diccionario (tipo de gráfico, datos ya agregados, título y opciones)
+y se dibuja en su propio PNG, cuyo nombre es el hash de los datos, las opciones, el tamaño, el DPI y
+el código de este módulo. Si nada cambió, el PNG ya existe y no se vuelve a dibujar; los paneles
+faltantes se dibujan en paralelo en procesos separados y luego se componen en la imagen final.
+"""
+
+import hashlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # render sin ventanas, también en los procesos trabajadores
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from PIL import Image
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+from Backend_python.huellas import hash_archivo
+from Backend_python.decimacion import METODO_DECIMACION, decimar_serie
+
+DIRECTORIO_CACHE = config.DIRECTORIO_CACHE_GRAFICOS
+DPI_FIGURA = config.DPI_FIGURA
+DPI_PREVIEW = config.DPI_PREVIEW
+MAX_ARCHIVOS_CACHE = 500
+
+
+def _actualizar_hash(digest, valor):
+    if isinstance(valor, pd.DataFrame):
+        digest.update(repr((list(valor.columns), list(valor.index), valor.dtypes.astype(str).tolist())).encode())
+        digest.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, pd.Series):
+        digest.update(repr((valor.name, str(valor.dtype))).encode())
+        digest.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, np.ndarray):
+        digest.update(repr((valor.dtype.str, valor.shape)).encode())
+        digest.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, dict):
+        for clave in sorted(valor, key=str):
+            digest.update(repr(clave).encode())
+            _actualizar_hash(digest, valor[clave])
+    else:
+        digest.update(repr(valor).encode())
+
+
+def clave_panel(panel, tamano, dpi):
+    """Hash del panel: sus datos, opciones, tamaño, DPI y el código que lo dibuja."""
+    digest = hashlib.sha256()
+    _actualizar_hash(digest, {'panel': panel, 'tamano': tuple(tamano), 'dpi': dpi, 'codigo': hash_archivo(__file__)})
+    return digest.hexdigest()
+
+
+def _dibujar(ax, panel):
+    tipo = panel['tipo']
+    datos = panel.get('datos')
+    opciones = panel.get('opciones', {})
+    estilo_plot = opciones.get('plot', {})
+    if tipo == 'pie':
+        ax.pie(datos.values, labels=datos.index, autopct='%1.1f%%', **estilo_plot)
+    elif tipo in ('bar', 'barh', 'line'):
+        datos.plot(kind=tipo, ax=ax, **estilo_plot)
+    elif tipo == 'heatmap':
+        sns.heatmap(datos, ax=ax, **estilo_plot)
+    elif tipo == 'hist':
+        ax.hist(datos, **estilo_plot)
+    elif tipo == 'serie':
+        # Cada columna se decima al ancho del eje en píxeles antes de dibujarla
+        ancho_px = ax.bbox.width
+        estilos = opciones.get('series', {})
+        for columna in datos.columns:
+            serie = decimar_serie(datos[columna], ancho_px, opciones.get('decimacion', METODO_DECIMACION))
+            ax.plot(serie.index, serie.to_numpy(), label=columna, **estilos.get(columna, {}))
+        for valor in opciones.get('lineas_h', []):
+            ax.axhline(valor, color='gray', linestyle='--', alpha=0.5)
+        if len(datos.columns) > 1:
+            ax.legend(loc='upper left')
+    elif tipo == 'texto':
+        ax.text(0.5, 0.5, panel.get('texto', ''), ha='center', va='center', transform=ax.transAxes)
+    if tipo == 'vacio':
+        return
+    if panel.get('titulo'):
+        ax.set_title(panel['titulo'], fontweight=opciones.get('peso_titulo', 'normal'))
+    if 'rotacion' in opciones:
+        ax.tick_params(axis='x', rotation=opciones['rotacion'])
+    if 'xlabel' in opciones:
+        ax.set_xlabel(opciones['xlabel'])
+    if 'ylabel' in opciones:
+        ax.set_ylabel(opciones['ylabel'])
+    if 'grid' in opciones:
+        ax.grid(True, alpha=opciones['grid'])
+
+
+def renderizar_panel(panel, tamano, dpi, destino):
+    """Dibuja un panel en `destino` (PNG de tamaño fijo, para poder componerlo en una grilla)."""
+    with plt.style.context(panel.get('estilo', 'default')):
+        fig = plt.figure(figsize=tamano, dpi=dpi)
+        ax = fig.add_subplot(1, 1, 1)
+        _dibujar(ax, panel)
+        if panel['tipo'] == 'vacio':
+            ax.set_axis_off()
+        fig.tight_layout()
+        temporal = f"{destino}.{os.getpid()}.tmp.png"
+        fig.savefig(temporal, dpi=dpi)
+        plt.close(fig)
+    os.replace(temporal, destino)
+    return destino
+
+
+def _renderizar_titulo(titulo, ancho, dpi, destino):
+    fig = plt.figure(figsize=(ancho, 0.8), dpi=dpi)
+    fig.text(0.5, 0.5, titulo, ha='center', va='center', fontsize=16, fontweight='bold')
+    temporal = f"{destino}.{os.getpid()}.tmp.png"
+    fig.savefig(temporal, dpi=dpi)
+    plt.close(fig)
+    os.replace(temporal, destino)
+    return destino
+
+
+def podar_cache(directorio_cache=DIRECTORIO_CACHE, max_archivos=MAX_ARCHIVOS_CACHE):
+    """Borra las imágenes usadas hace más tiempo cuando el caché supera `max_archivos`."""
+    archivos = [os.path.join(directorio_cache, nombre) for nombre in os.listdir(directorio_cache) if nombre.endswith('.png')]
+    if len(archivos) <= max_archivos:
+        return
+    archivos.sort(key=os.path.getmtime)
+    for path in archivos[:len(archivos) - max_archivos]:
+        os.remove(path)
+
+
+def renderizar_dashboard(paneles, destino, columnas, tamano_total, titulo=None, preview=False,
+                         procesos=None, directorio_cache=DIRECTORIO_CACHE, podar=True):
+    """
+    Compone `paneles` (lista de diccionarios, por filas) en una grilla de `columnas` columnas y la
+    guarda en `destino`. `tamano_total` es (ancho, alto) en pulgadas de la grilla de paneles.
+    Con `preview=True` se usa DPI_PREVIEW en vez de DPI_FIGURA (caché separado).
+    Retorna (destino, paneles_dibujados): 0 dibujados significa que todo salió del caché.
+    Con `podar=False` no se poda el caché (para lotes en paralelo, que podan una vez al final).
+    """
+    dpi = DPI_PREVIEW if preview else DPI_FIGURA
+    filas = -(-len(paneles) // columnas)
+    tamano = (tamano_total[0] / columnas, tamano_total[1] / filas)
+    os.makedirs(directorio_cache, exist_ok=True)
+
+    claves = [clave_panel(panel, tamano, dpi) for panel in paneles]
+    digest = hashlib.sha256(repr((claves, titulo, columnas)).encode())
+    mosaico = os.path.join(directorio_cache, f"mosaico_{digest.hexdigest()}.png")
+    if os.path.exists(mosaico):
+        os.utime(mosaico)  # marca de uso para podar_cache
+        os.makedirs(os.path.dirname(destino) or '.', exist_ok=True)
+        shutil.copyfile(mosaico, destino)
+        return destino, 0
+
+    rutas = [os.path.join(directorio_cache, f"panel_{clave}.png") for clave in claves]
+    faltantes = [(panel, tamano, dpi, ruta) for panel, ruta in zip(paneles, rutas) if not os.path.exists(ruta)]
+    procesos = procesos or min(len(faltantes), os.cpu_count() or 1)
+    if len(faltantes) > 1 and procesos > 1:
+        sys.stdout.flush()  # con fork, los trabajadores heredarían y repetirían la salida pendiente
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            list(pool.map(renderizar_panel, *zip(*faltantes)))
+    else:
+        for argumentos in faltantes:
+            renderizar_panel(*argumentos)
+
+    for ruta in rutas:
+        os.utime(ruta)
+    imagenes = [Image.open(ruta).convert('RGB') for ruta in rutas]
+    ancho, alto = imagenes[0].size
+    banda = None
+    if titulo:
+        ruta_titulo = os.path.join(directorio_cache, f"titulo_{hashlib.sha256(repr((titulo, tamano_total[0], dpi)).encode()).hexdigest()}.png")
+        if not os.path.exists(ruta_titulo):
+            _renderizar_titulo(titulo, tamano_total[0], dpi, ruta_titulo)
+        banda = Image.open(ruta_titulo).convert('RGB').resize((ancho * columnas, int(0.8 * dpi)))
+    alto_banda = banda.size[1] if banda is not None else 0
+    lienzo = Image.new('RGB', (ancho * columnas, alto_banda + alto * filas), 'white')
+    if banda is not None:
+        lienzo.paste(banda, (0, 0))
+    for i, imagen in enumerate(imagenes):
+        fila, columna = divmod(i, columnas)
+        lienzo.paste(imagen.resize((ancho, alto)), (columna * ancho, alto_banda + fila * alto))
+    temporal = f"{mosaico}.{os.getpid()}.tmp.png"
+    lienzo.save(temporal, dpi=(dpi, dpi))
+    os.replace(temporal, mosaico)
+    os.makedirs(os.path.dirname(destino) or '.', exist_ok=True)
+    shutil.copyfile(mosaico, destino)
+    if podar:
+        podar_cache(directorio_cache)
+    return destino, len(faltantes)
@@ -0,0 +1,146 @@
+"""
+Checkpoints durables para reanudar corridas fallidas del pipeline (`--resume`).
+
+- Por ticker: cada resultado parcial (descarga, indicadores) se guarda en su propio CSV apenas se
+  completa; el archivo mismo es la marca de completado. Un `meta.json` guarda el contexto de la
+  tarea (fecha de inicio, hash de la entrada, etc.) para no mezclar parciales de otra configuración.
+  Se escriben en cada corrida salvo con CHECKPOINTS_POR_TICKER = False, que los deja solo para `--resume`.
+- Por etapa: al terminar con éxito se registra la etapa junto al checksum de sus salidas; al
+  reanudar, las etapas registradas cuyas salidas no cambiaron no se vuelven a ejecutar.
+"""
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+from Backend_python.huellas import hash_archivo
+
+DIRECTORIO_CHECKPOINTS = config.DIRECTORIO_CHECKPOINTS
+CHECKPOINTS_POR_TICKER = config.CHECKPOINTS_POR_TICKER
+ARCHIVO_ETAPAS = os.path.join(DIRECTORIO_CHECKPOINTS, 'etapas.json')
+
+_lock_etapas = threading.Lock()
+
+
+def _escribir_json_atomico(path, contenido):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporal = f"{path}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temporal, path)
+
+
+def checkpoints_activos(reanudar):
+    """True si la tarea debe guardar parciales por ticker: con CHECKPOINTS_POR_TICKER (por defecto) o al reanudar."""
+    return reanudar or CHECKPOINTS_POR_TICKER
+
+
+class CheckpointTickers:
+    """
+    Resultados parciales por ticker de una tarea, guardados en output/checkpoints/<tarea>/. Con
+    `activo=False` no lee ni escribe nada: `iniciar` retorna un conjunto vacío y `guardar` no hace nada.
+    """
+
+    def __init__(self, tarea, contexto=None, directorio=DIRECTORIO_CHECKPOINTS, activo=True):
+        self.directorio = os.path.join(directorio, tarea)
+        self.contexto = contexto or {}
+        self.activo = activo
+        self._meta = os.path.join(self.directorio, 'meta.json')
+
+    def _archivo(self, ticker):
+        return os.path.join(self.directorio, f"{ticker}.csv")
+
+    def iniciar(self, reanudar):
+        """
+        Prepara el directorio de la tarea. Al reanudar se conservan los parciales solo si fueron
+        generados con el mismo contexto; en cualquier otro caso se parte de cero.
+        Retorna el conjunto de tickers ya completados.
+        """
+        completados = set()
+        if not self.activo:
+            return completados
+        if reanudar and os.path.exists(self._meta):
+            with open(self._meta, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('contexto') == self.contexto:
+                completados = {
+                    nombre[:-len('.csv')] for nombre in os.listdir(self.directorio) if nombre.endswith('.csv')
+                }
+            else:
+                print("   - Checkpoints generados con otra configuración; se descartan")
+        if not completados:
+            self.limpiar()
+            _escribir_json_atomico(self._meta, {'contexto': self.contexto, 'creado': datetime.now().isoformat()})
+        return completados
+
+    def guardar(self, ticker, df):
+        """Escribe el parcial de un ticker de forma atómica (un corte a mitad no deja un CSV truncado)."""
+        if not self.activo:
+            return
+        temporal = self._archivo(ticker) + '.tmp'
+        df.to_csv(temporal, index=False, sep=';', decimal=',')
+        os.replace(temporal, self._archivo(ticker))
+
+    def cargar(self, tickers):
+        """Carga los parciales de `tickers` en el orden dado."""
+        return [
+            pd.read_csv(self._archivo(ticker), sep=';', decimal=',', float_precision='round_trip')
+            for ticker in tickers
+        ]
+
+    def limpiar(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+
+def _cargar_etapas():
+    if not os.path.exists(ARCHIVO_ETAPAS):
+        return {}
+    try:
+        with open(ARCHIVO_ETAPAS, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def reiniciar_etapas():
+    """Inicia una corrida nueva: olvida los registros de etapas de corridas anteriores."""
+    with _lock_etapas:
+        if os.path.exists(ARCHIVO_ETAPAS):
+            os.remove(ARCHIVO_ETAPAS)
+
+
+def registrar_etapa(etapa):
+    with _lock_etapas:
+        registros = _cargar_etapas()
+        registros[etapa['id']] = {
+            'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'salidas': {path: hash_archivo(path) for path in etapa.get('salidas', [])},
+        }
+        _escribir_json_atomico(ARCHIVO_ETAPAS, registros)
+
+
+def etapa_completada(etapa):
+    """True si la etapa terminó en la corrida interrumpida y sus salidas siguen con el mismo checksum."""
+    with _lock_etapas:
+        registro = _cargar_etapas().get(etapa['id'])
+    if not registro:
+        return False
+    return all(
+        hash_archivo(path) is not None and hash_archivo(path) == registro['salidas'].get(path)
+        for path in etapa.get('salidas', [])
+    )
+
+
+def limpiar_todo():
+    """Borra todos los checkpoints (tras una corrida completa exitosa)."""
+    shutil.rmtree(DIRECTORIO_CHECKPOINTS, ignore_errors=True)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+CLI unificado del Agente Cóndor Andino.
+
+    python3 Backend_python/condor.py <subcomando> [opciones]
+
+Subcomandos: download, intraday, indicators, profile, fusion, export, viz, bench. Este archivo solo importa
+la biblioteca estándar; cada subcomando importa su módulo (y con él pandas, pandas_ta, sklearn,
+matplotlib o yfinance) recién al ejecutarse, así que un subcomando liviano no paga las
+importaciones de los demás. `--tiempos-import` muestra cuánto tardó en cargarse el módulo del
+subcomando; `bench` mide en procesos limpios el costo de importar cada módulo, `bench suite`
+corre la suite de benchmark con datos sintéticos (benchmark.py) y `bench equivalencia` compara
+motores de indicadores alternativos con la referencia (equivalencia_indicadores.py).
+"""
+
+import time
+_INICIO = time.perf_counter()
+
+import argparse
+import importlib
+import os
+import re
+import subprocess
+import sys
+
+# Raíz del proyecto en el path (sin importar config todavía: lo cargan los módulos)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+# Módulo que carga cada subcomando (bench mide estos mismos)
+MODULOS = {
+    'download': 'Backend_python.descargar_acciones',
+    'intraday': 'Backend_python.barras_intradia',
+    'indicators': 'Backend_python.motor_condor',
+    'profile': 'Backend_python.generar_perfiles_de_acciones',
+    'fusion': 'Backend_python.analisis_fusion',
+    'viz': 'Backend_python.visualizador_interactivo',
+}
+EXPORTACIONES = {
+    # tabla: (módulo, función, atributo de config con el CSV por defecto)
+    'indicadores': ('Backend_python.export_indicadores', 'ejecutar_export_indicadores', 'ARCHIVO_TECNICO'),
+    'fundamentales': ('Backend_python.export_fundamentales', 'ejecutar_export_fundamental', 'ARCHIVO_FUNDAMENTAL'),
+    'precios': ('Backend_python.ingesta', 'ejecutar_ingesta_precio_desde_csv', 'ARCHIVO_ACCIONES_MASTER'),
+}
+
+_tiempos_import = {}
+
+
+def importar(modulo):
+    """importlib.import_module registrando el tiempo de la primera carga."""
+    inicio = time.perf_counter()
+    cargado = importlib.import_module(modulo)
+    _tiempos_import.setdefault(modulo, time.perf_counter() - inicio)
+    return cargado
+
+
+# ---------------------------------------------------------------------------
+# Subcomandos
+# ---------------------------------------------------------------------------
+
+def cmd_download(args):
+    importar(MODULOS['download']).main(reanudar=args.resume)
+
+
+def cmd_intraday(args):
+    sys.exit(importar(MODULOS['intraday']).main(args))
+
+
+def cmd_indicators(args):
+    modulo = importar(MODULOS['indicators'])
+    if args.streaming:
+        modulo.main_streaming()
+    else:
+        modulo.main(reanudar=args.resume)
+
+
+def cmd_profile(args):
+    modulo = importar(MODULOS['profile'])
+    if args.regimenes:
+        modulo.main_regimenes()
+    else:
+        modulo.main(reentrenar=args.reentrenar)
+
+
+def cmd_fusion(args):
+    importar(MODULOS['fusion']).main()
+
+
+def cmd_export(args):
+    nombre_modulo, funcion, archivo = EXPORTACIONES[args.tabla]
+    modulo = importar(nombre_modulo)
+    config = importlib.import_module('config')
+    getattr(modulo, funcion)(args.csv or getattr(config, archivo))
+
+
+def cmd_viz(args):
+    if args.reportes:
+        importar('Backend_python.reportes_tickers').generar_reportes(procesos=args.procesos, preview=args.preview)
+        return
+    modulo = importar(MODULOS['viz'])
+    if not (args.ticker or args.grafico or args.dashboard):
+        modulo.main()
+        return
+    visualizador = modulo.VisualizadorCondor()
+    if args.ticker:
+        visualizador.analizar_ticker_especifico(args.ticker.upper())
+    if args.grafico:
+        visualizador.graficar_ticker(args.grafico.upper(), preview=args.preview)
+    if args.dashboard:
+        visualizador.crear_dashboard_completo(preview=args.preview)
+
+
+def medir_importacion(modulo, python=sys.executable):
+    """
+    Importa `modulo` en un proceso limpio con `-X importtime`. Retorna un diccionario con el tiempo
+    total, el tiempo de pared del proceso y el costo de cada paquete raíz.
+    """
+    inicio = time.perf_counter()
+    proceso = subprocess.run([python, '-X', 'importtime', '-c', f'import {modulo}'],
+                             cwd=ROOT, capture_output=True, text=True)
+    pared = time.perf_counter() - inicio
+    paquetes = {}
+    total_us = 0
+    patron = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+    for linea in proceso.stderr.splitlines():
+        coincidencia = patron.match(linea)
+        if not coincidencia:
+            continue
+        propio, _, _, nombre = coincidencia.groups()
+        # El tiempo propio de cada módulo se atribuye a su paquete raíz (pandas, sklearn, ...)
+        total_us += int(propio)
+        raiz = nombre.split('.')[0]
+        paquetes[raiz] = paquetes.get(raiz, 0) + int(propio) / 1e6
+    error = None
+    if proceso.returncode != 0:
+        ultima = [l for l in proceso.stderr.splitlines() if not l.startswith('import time:')]
+        error = ultima[-1] if ultima else f"código de salida {proceso.returncode}"
+    return {'modulo': modulo, 'total_s': total_us / 1e6, 'pared_s': pared, 'paquetes': paquetes, 'error': error}
+
+
+def cmd_bench(args):
+    if args.tipo == 'suite':
+        if args.anios is None:
+            args.anios = 1
+        sys.exit(importar('Backend_python.benchmark').main(args))
+    if args.tipo == 'equivalencia':
+        if args.anios is None:
+            args.anios = 2
+        sys.exit(importar('Backend_python.equivalencia_indicadores').main(args))
+    modulos = args.modulos or list(dict.fromkeys(
+        ['Backend_python.condor'] + list(MODULOS.values()) + [modulo for modulo, _, _ in EXPORTACIONES.values()]))
+    print(f"\n⏱️  TIEMPOS DE IMPORTACIÓN (proceso limpio, {sys.executable})")
+    print(f"   {'módulo':<45} {'import':>9} {'proceso':>9}   paquetes más costosos")
+    for modulo in modulos:
+        medicion = medir_importacion(modulo)
+        if medicion['error']:
+            print(f"   {modulo:<45} {'-':>9} {'-':>9}   ✗ {medicion['error']}")
+            continue
+        costosos = sorted(medicion['paquetes'].items(), key=lambda p: p[1], reverse=True)[:args.top]
+        detalle = ', '.join(f"{nombre} {segundos:.2f}s" for nombre, segundos in costosos)
+        print(f"   {modulo:<45} {medicion['total_s']:>8.2f}s {medicion['pared_s']:>8.2f}s   {detalle}")
+
+
+# ---------------------------------------------------------------------------
+# Argumentos
+# ---------------------------------------------------------------------------
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(prog='condor', description="CLI unificado del Agente Cóndor Andino")
+    parser.add_argument('--tiempos-import', action='store_true',
+                        help="Al terminar, muestra el tiempo de arranque y de importación del subcomando")
+    sub = parser.add_subparsers(dest='subcomando', required=True)
+
+    p = sub.add_parser('download', help="Descarga los precios históricos (descargar_acciones.py)")
+    p.add_argument('--resume', action='store_true', help="Reanuda desde los checkpoints por ticker")
+    p.set_defaults(funcion=cmd_download)
+
+    p = sub.add_parser('intraday', help="Barras intradía y remuestreo a marcos mayores (barras_intradia.py)")
+    p.add_argument('--intervalo', default=None, help="Barra base: 1m, 5m o 15m (por defecto INTERVALO_INTRADIA)")
+    p.add_argument('--marcos', nargs='+', default=None, help="Marcos a construir (por defecto MARCOS_INTRADIA)")
+    p.add_argument('--tickers', nargs='+', default=None, help="Tickers (por defecto los de CSV_ACCIONES)")
+    p.add_argument('--remuestrear', action='store_true', help="No descarga: reconstruye los marcos desde la base guardada")
+    p.add_argument('--indicadores', nargs='*', default=None,
+                   help="Marcos sobre los que calcular indicadores (sin valores: todos los de --marcos)")
+    p.set_defaults(funcion=cmd_intraday)
+
+    p = sub.add_parser('indicators', help="Calcula los indicadores técnicos (motor_condor.py)")
+    p.add_argument('--resume', action='store_true', help="Reanuda desde los checkpoints por ticker")
+    p.add_argument('--streaming', action='store_true',
+                   help="Particiona el master por ticker y calcula por bloques sin cargarlo entero")
+    p.set_defaults(funcion=cmd_indicators)
+
+    p = sub.add_parser('profile', help="Perfila las acciones (generar_perfiles_de_acciones.py)")
+    p.add_argument('--reentrenar', action='store_true', help="Reentrena el modelo de perfiles")
+    p.add_argument('--regimenes', action='store_true', help="Perfiles por ventana mensual")
+    p.set_defaults(funcion=cmd_profile)
+
+    p = sub.add_parser('fusion', help="Detecta oportunidades de divergencia (analisis_fusion.py)")
+    p.set_defaults(funcion=cmd_fusion)
+
+    p = sub.add_parser('export', help="Exporta una tabla a MySQL")
+    p.add_argument('tabla', choices=sorted(EXPORTACIONES))
+    p.add_argument('--csv', default=None, help="CSV de origen (por defecto el de config.py)")
+    p.set_defaults(funcion=cmd_export)
+
+    p = sub.add_parser('viz', help="Visualizador (sin opciones abre el menú interactivo)")
+    p.add_argument('--ticker', default=None, help="Muestra el análisis de un ticker y termina")
+    p.add_argument('--grafico', default=None, help="Grafica precio e indicadores de un ticker")
+    p.add_argument('--dashboard', action='store_true', help="Genera el dashboard completo")
+    p.add_argument('--reportes', action='store_true', help="Genera los reportes por ticker (reportes_tickers.py)")
+    p.add_argument('--procesos', type=int, default=None, help="Procesos para --reportes")
+    p.add_argument('--preview', action='store_true', help="Gráficos en baja resolución (DPI_PREVIEW)")
+    p.set_defaults(funcion=cmd_viz)
+
+    p = sub.add_parser('bench', help="Tiempos de importación por módulo, o la suite de benchmark con datos sintéticos")
+    p.add_argument('tipo', nargs='?', choices=('importaciones', 'suite', 'equivalencia'), default='importaciones',
+                   help="'importaciones' (por defecto), 'suite' (benchmark.py) o 'equivalencia' (equivalencia_indicadores.py)")
+    p.add_argument('--modulos', nargs='+', default=None, help="Módulos a medir (por defecto los de cada subcomando)")
+    p.add_argument('--top', type=int, default=3, help="Paquetes más costosos a listar por módulo")
+    # Opciones de la suite: se declaran aquí para no importar benchmark.py (numpy, pandas) al arrancar
+    p.add_argument('--tickers', type=int, default=30, help="Suite/equivalencia: tickers del universo sintético (30-5000)")
+    p.add_argument('--anios', type=int, default=None, help="Suite/equivalencia: años de historia (1-20; por defecto 1 y 2)")
+    p.add_argument('--semilla', type=int, default=42, help="Suite/equivalencia: semilla del generador")
+    p.add_argument('--etapas', nargs='+', default=None, help="Suite: etapas a medir (por defecto todas)")
+    p.add_argument('--db', action='store_true', help="Suite: incluye la exportación a MySQL")
+    p.add_argument('--guardar-base', action='store_true', help="Suite: guarda la corrida como línea base")
+    p.add_argument('--verbose', action='store_true', help="Suite/equivalencia: muestra la salida de cada etapa o motor")
+    p.add_argument('--motores', nargs='+', default=['paralelo'],
+                   help="Equivalencia: motores a comparar con la referencia ('paralelo', 'bloques' o 'modulo:funcion')")
+    p.add_argument('--fuentes', nargs='+', default=['sintetico', 'grabado'], help="Equivalencia: sintetico y/o grabado")
+    p.add_argument('--archivo', default=None, help="Equivalencia: CSV grabado (por defecto ARCHIVO_ACCIONES_MASTER)")
+    p.add_argument('--repeticiones', type=int, default=1, help="Equivalencia: corridas por motor (mejor tiempo)")
+    p.add_argument('--todas', action='store_true', help="Equivalencia: lista todas las columnas")
+    p.set_defaults(funcion=cmd_bench)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    arranque = time.perf_counter() - _INICIO
+    try:
+        args.funcion(args)
+    finally:
+        if args.tiempos_import:
+            print(f"\n⏱️  Arranque del CLI: {arranque * 1000:.0f} ms")
+            for modulo, segundos in _tiempos_import.items():
+                print(f"   import {modulo}: {segundos * 1000:.0f} ms")
+            print(f"   Total: {time.perf_counter() - _INICIO:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
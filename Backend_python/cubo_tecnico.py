@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Cubo técnico en disco (ticker × fecha × campo, float32) abierto con `numpy.memmap`.
+
+Los pools de procesos, los backtests y el visualizador leían cada uno la base técnica completa en
+su propia memoria. El cubo guarda los mismos datos una vez, en binario, y cualquier proceso lo
+abre con `CuboTecnico`: cortar un ticker (`ticker`), un campo (`campo`) o una serie (`serie`)
+retorna vistas sobre el archivo mapeado, sin copiar, y las páginas leídas quedan en el caché del
+sistema operativo compartidas entre todos los procesos.
+
+En DIRECTORIO_CUBO_TECNICO hay dos archivos:
+
+- valores.<generación>.f32: arreglo float32 en orden C con forma (tickers, capacidad_fechas,
+  campos); las celdas sin dato son NaN. Las filas de un ticker son contiguas.
+- indice.json: generación y nombre del archivo de valores vigente, tickers (en el orden en que
+  están guardados), fechas, campos, capacidad y forma.
+
+Un solo escritor a la vez (motor_condor); los lectores pueden abrir el cubo mientras se escribe.
+Toda escritura que cambie celdas visibles para el índice vigente va a un archivo de generación
+nueva y al final se reemplaza solo indice.json, de forma atómica: un lector ve la generación
+anterior completa o la nueva completa, nunca una mezcla. Los archivos de generaciones anteriores
+se borran después del cambio; en Linux los lectores que ya los tenían mapeados los siguen leyendo
+hasta reabrir el cubo (en Windows el borrado falla mientras estén mapeados y se reintenta en la
+próxima escritura).
+
+motor_condor construye el cubo junto con la base técnica y el modo incremental le agrega los
+tickers recalculados (`actualizar_cubo`): las fechas nuevas ocupan la capacidad reservada
+(FECHAS_RESERVA_CUBO) y los tickers nuevos se agregan al final del archivo. Si solo hay tickers
+nuevos se escriben en el archivo vigente, fuera de la región que describe el índice; reemplazar
+un ticker existente copia primero el archivo a una generación nueva. Una fecha intermedia o el fin
+de la capacidad obligan a reordenar el archivo completo (también en una generación nueva).
+
+Todos los campos se guardan en float32, incluido el volumen (exacto hasta ~16,7 millones; sobre
+eso conserva 7 dígitos significativos); el CSV de la base técnica sigue siendo la fuente exacta.
+
+Uso:
+    python3 Backend_python/cubo_tecnico.py --construir
+    python3 Backend_python/cubo_tecnico.py --ticker BCI --campos close rsi_14
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+from Backend_python.base_tecnica import BaseTecnica, cargar_base_tecnica
+
+DIRECTORIO_CUBO_TECNICO = config.DIRECTORIO_CUBO_TECNICO
+FECHAS_RESERVA_CUBO = config.FECHAS_RESERVA_CUBO
+# Nombre del archivo de valores en los cubos de formato 1 (sin generaciones)
+ARCHIVO_VALORES = 'valores.f32'
+ARCHIVO_INDICE = 'indice.json'
+# Versión del formato del cubo; los de formato 1 se siguen leyendo (archivo de valores fijo)
+FORMATO_CUBO = 2
+FORMATOS_LEGIBLES = (1, 2)
+CLAVES = ('date', 'ticker')
+
+
+def path_indice(directorio=DIRECTORIO_CUBO_TECNICO):
+    return os.path.join(directorio, ARCHIVO_INDICE)
+
+
+def path_valores(directorio, indice):
+    """Archivo de valores al que apunta `indice`."""
+    return os.path.join(directorio, indice['archivo'])
+
+
+def existe_cubo(directorio=DIRECTORIO_CUBO_TECNICO):
+    if not os.path.exists(path_indice(directorio)):
+        return False
+    return os.path.exists(path_valores(directorio, leer_indice(directorio)))
+
+
+def leer_indice(directorio=DIRECTORIO_CUBO_TECNICO):
+    with open(path_indice(directorio), 'r', encoding='utf-8') as f:
+        indice = json.load(f)
+    if indice.get('formato') not in FORMATOS_LEGIBLES:
+        raise ValueError(f"Cubo técnico con formato {indice.get('formato')} (se espera {FORMATO_CUBO}); reconstruir con --construir")
+    indice.setdefault('generacion', 0)
+    indice.setdefault('archivo', ARCHIVO_VALORES)
+    return indice
+
+
+def _archivo_generacion(directorio):
+    """(generación, nombre) del próximo archivo de valores: uno que ningún índice referencia aún."""
+    generacion = leer_indice(directorio)['generacion'] + 1 if os.path.exists(path_indice(directorio)) else 1
+    return generacion, f'valores.{generacion}.f32'
+
+
+def _retirar_generaciones(directorio, vigente):
+    """Borra los archivos de valores distintos de `vigente` (generaciones anteriores y restos)."""
+    for nombre in os.listdir(directorio):
+        if nombre.startswith('valores.') and nombre != vigente:
+            try:
+                os.remove(os.path.join(directorio, nombre))
+            except OSError:
+                pass  # mapeado por un lector en Windows: se reintenta en la próxima escritura
+
+
+def _escribir_indice(directorio, tickers, fechas, campos, capacidad, generacion, archivo):
+    """Publica la generación `archivo`: reemplaza el índice de forma atómica y retira las anteriores."""
+    indice = {
+        'formato': FORMATO_CUBO,
+        'generacion': int(generacion),
+        'archivo': archivo,
+        'dtype': 'float32',
+        'orden': ['ticker', 'fecha', 'campo'],
+        'forma': [len(tickers), int(capacidad), len(campos)],
+        'capacidad_fechas': int(capacidad),
+        'tickers': list(tickers),
+        'fechas': [str(f) for f in np.asarray(fechas, dtype=np.int64).astype('datetime64[D]')],
+        'campos': list(campos),
+    }
+    path = path_indice(directorio)
+    temporal = path + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False)
+    os.replace(temporal, path)
+    _retirar_generaciones(directorio, archivo)
+    return indice
+
+
+class CuboTecnico:
+    """Lector del cubo: todas las consultas retornan vistas sobre el archivo mapeado."""
+
+    def __init__(self, directorio=DIRECTORIO_CUBO_TECNICO):
+        for intento in range(3):
+            indice = leer_indice(directorio)
+            try:
+                self._abrir(directorio, indice)
+                break
+            except FileNotFoundError:
+                # Un escritor publicó otra generación entre leer el índice y abrir el archivo
+                if intento == 2:
+                    raise
+
+    def _abrir(self, directorio, indice):
+        self.directorio = directorio
+        self.generacion = indice['generacion']
+        self.tickers = indice['tickers']
+        self.campos = indice['campos']
+        self.fechas = np.array(indice['fechas'], dtype='datetime64[D]')
+        self.capacidad_fechas = indice['capacidad_fechas']
+        forma = (len(self.tickers), self.capacidad_fechas, len(self.campos))
+        if 0 in forma:
+            self.valores = np.full((len(self.tickers), len(self.fechas), len(self.campos)), np.nan, dtype=np.float32)
+        else:
+            mapa = np.memmap(path_valores(directorio, indice), dtype=np.float32, mode='r', shape=forma)
+            # Solo las fechas ocupadas; la capacidad reservada queda fuera de la vista
+            self.valores = mapa[:, :len(self.fechas), :]
+        self._posiciones = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._campos = {campo: i for i, campo in enumerate(self.campos)}
+
+    def __contains__(self, ticker):
+        return ticker in self._posiciones
+
+    def ticker(self, ticker):
+        """Matriz (fechas × campos) de `ticker`: un bloque contiguo del archivo."""
+        return self.valores[self._posiciones[ticker]]
+
+    def campo(self, campo):
+        """Matriz (tickers × fechas) de `campo` (vista con saltos: toca una página por cada pocas fechas)."""
+        return self.valores[:, :, self._campos[campo]]
+
+    def serie(self, ticker, campo):
+        return self.valores[self._posiciones[ticker], :, self._campos[campo]]
+
+    def posicion_fecha(self, fecha):
+        """Índice de `fecha` en el eje de fechas (o de la primera posterior)."""
+        return int(np.searchsorted(self.fechas, np.datetime64(pd.Timestamp(fecha).date(), 'D')))
+
+    def rango_ticker(self, ticker):
+        """slice de fechas entre la primera y la última barra con datos de `ticker`."""
+        con_datos = np.flatnonzero(~np.isnan(self.ticker(ticker)).all(axis=1))
+        return slice(0, 0) if con_datos.size == 0 else slice(int(con_datos[0]), int(con_datos[-1]) + 1)
+
+    def marco(self, ticker, campos=None):
+        """
+        DataFrame (índice: fecha) de `ticker` entre su primera y última barra. Sin `campos` comparte
+        memoria con el cubo; con `campos` copia solo esas columnas.
+        """
+        rango = self.rango_ticker(ticker)
+        bloque = self.ticker(ticker)[rango]
+        if campos is not None:
+            bloque = bloque[:, [self._campos[c] for c in campos]]
+        return pd.DataFrame(bloque, index=pd.DatetimeIndex(self.fechas[rango], name='date'),
+                            columns=self.campos if campos is None else list(campos), copy=False)
+
+
+# ---------------------------------------------------------------------------
+# Escritura
+# ---------------------------------------------------------------------------
+
+def _componentes(datos, campos=None):
+    """
+    (tickers, offsets, dias, valores) de `datos`, que puede ser una BaseTecnica o un DataFrame con
+    'ticker', 'date' y columnas numéricas (la salida de motor_condor). Las filas quedan agrupadas
+    por ticker; `valores` es {campo: float32}.
+    """
+    if isinstance(datos, BaseTecnica):
+        campos = datos.columnas if campos is None else list(campos)
+        valores = {c: datos.valores[c].astype(np.float32, copy=False) for c in campos}
+        return list(datos.tickers), datos.offsets, datos.dias.astype(np.int64), valores
+
+    if campos is None:
+        campos = [c for c in datos.columns if c not in CLAVES and pd.api.types.is_numeric_dtype(datos[c])]
+    faltantes = [c for c in campos if c not in datos.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas para el cubo técnico: {', '.join(faltantes)}")
+    codigos, tickers = pd.factorize(datos['ticker'].astype(str), sort=True)
+    dias = pd.to_datetime(datos['date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+    orden = np.lexsort((dias, codigos))
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(codigos, minlength=len(tickers))))).astype(np.int64)
+    valores = {c: pd.to_numeric(datos[c], errors='coerce').to_numpy(dtype=np.float32)[orden] for c in campos}
+    return list(tickers), offsets, dias[orden], valores
+
+
+def _volcar_tickers(mapa, filas, tickers, offsets, dias, valores, campos, fechas, reemplazar=True):
+    """
+    Escribe en `mapa` el bloque de cada ticker de `tickers` (fila destino en `filas`). Con
+    `reemplazar` las fechas ausentes quedan en NaN; sin él se conservan los valores previos.
+    """
+    columnas = [valores[c] for c in campos]
+    bloque = np.empty(mapa.shape[1:], dtype=np.float32)
+    for i, fila in enumerate(filas):
+        corte = slice(int(offsets[i]), int(offsets[i + 1]))
+        posiciones = np.searchsorted(fechas, dias[corte])
+        if reemplazar:
+            bloque.fill(np.nan)
+        else:
+            bloque[:] = mapa[fila]
+        for j, columna in enumerate(columnas):
+            bloque[posiciones, j] = columna[corte]
+        mapa[fila] = bloque
+
+
+def construir_cubo(datos=None, directorio=DIRECTORIO_CUBO_TECNICO, campos=None, reserva=FECHAS_RESERVA_CUBO,
+                   fechas=None):
+    """
+    Construye el cubo desde cero. `datos` es la salida de motor_condor (DataFrame) o una
+    BaseTecnica; None la carga de ARCHIVO_TECNICO. `fechas` agrega al eje fechas que todavía no
+    están en `datos` (para llenarlo después por partes sin reordenar). Retorna el índice escrito.
+    """
+    if datos is None:
+        datos = cargar_base_tecnica(columnas=campos)
+    tickers, offsets, dias, valores = _componentes(datos, campos)
+    campos = list(valores)
+    fechas = np.unique(dias) if fechas is None else np.union1d(
+        pd.to_datetime(pd.Index(fechas)).to_numpy().astype('datetime64[D]').astype(np.int64), dias)
+    capacidad = len(fechas) + reserva
+    os.makedirs(directorio, exist_ok=True)
+    generacion, archivo = _archivo_generacion(directorio)
+    path = os.path.join(directorio, archivo)
+    if tickers and campos:
+        mapa = np.memmap(path, dtype=np.float32, mode='w+', shape=(len(tickers), capacidad, len(campos)))
+        _volcar_tickers(mapa, range(len(tickers)), tickers, offsets, dias, valores, campos, fechas)
+        mapa.flush()
+        del mapa
+    else:
+        open(path, 'wb').close()
+    return _escribir_indice(directorio, tickers, fechas, campos, capacidad, generacion, archivo)
+
+
+class EscritorCubo:
+    """
+    Construye un cubo nuevo por partes con un solo memmap abierto: tickers, fechas y campos se fijan
+    al crearlo, `escribir` vuelca cada bloque (conserva las demás fechas del ticker) y `cerrar`
+    publica el índice una sola vez. Es la escritura del modo streaming de motor_condor.
+    """
+
+    def __init__(self, tickers, fechas, campos, directorio=DIRECTORIO_CUBO_TECNICO, reserva=FECHAS_RESERVA_CUBO):
+        self.directorio = directorio
+        self.tickers = sorted({str(t) for t in tickers})
+        self.campos = list(campos)
+        self.fechas = np.unique(pd.to_datetime(pd.Index(fechas)).to_numpy().astype('datetime64[D]').astype(np.int64))
+        self.capacidad = len(self.fechas) + reserva
+        self._posiciones = {ticker: i for i, ticker in enumerate(self.tickers)}
+        os.makedirs(directorio, exist_ok=True)
+        self.generacion, self.archivo = _archivo_generacion(directorio)
+        path = os.path.join(directorio, self.archivo)
+        if self.tickers and self.campos:
+            self.mapa = np.memmap(path, dtype=np.float32, mode='w+',
+                                  shape=(len(self.tickers), self.capacidad, len(self.campos)))
+            for fila in range(len(self.tickers)):
+                self.mapa[fila] = np.nan
+        else:
+            self.mapa = None
+            open(path, 'wb').close()
+
+    def escribir(self, datos):
+        """Escribe las filas de `datos` (DataFrame con 'ticker', 'date' y los campos del cubo)."""
+        tickers, offsets, dias, valores = _componentes(datos, self.campos)
+        desconocidos = [t for t in tickers if t not in self._posiciones]
+        if desconocidos:
+            raise ValueError(f"Tickers fuera del cubo en construcción: {', '.join(desconocidos)}")
+        if np.setdiff1d(dias, self.fechas).size:
+            raise ValueError("Fechas fuera del eje del cubo en construcción")
+        _volcar_tickers(self.mapa, [self._posiciones[t] for t in tickers], tickers, offsets, dias, valores,
+                        self.campos, self.fechas, reemplazar=False)
+
+    def cerrar(self):
+        """Vuelca el archivo y publica el índice. Retorna el índice escrito."""
+        if self.mapa is not None:
+            self.mapa.flush()
+            self.mapa = None
+        return _escribir_indice(self.directorio, self.tickers, self.fechas, self.campos, self.capacidad,
+                                self.generacion, self.archivo)
+
+
+def _reordenar(directorio, indice, fechas, reserva, archivo):
+    """
+    Copia el cubo de `indice` al archivo `archivo` (generación nueva) con un nuevo eje de fechas
+    `fechas` (superconjunto del actual). Retorna la nueva capacidad.
+    """
+    anteriores = np.array(indice['fechas'], dtype='datetime64[D]').astype(np.int64)
+    n_tickers, capacidad, n_campos = indice['forma']
+    nueva_capacidad = len(fechas) + reserva
+    origen = np.memmap(path_valores(directorio, indice), dtype=np.float32, mode='r', shape=(n_tickers, capacidad, n_campos))
+    destino = np.memmap(os.path.join(directorio, archivo), dtype=np.float32, mode='w+',
+                        shape=(n_tickers, nueva_capacidad, n_campos))
+    posiciones = np.searchsorted(fechas, anteriores)
+    bloque = np.empty((nueva_capacidad, n_campos), dtype=np.float32)
+    for fila in range(n_tickers):
+        bloque.fill(np.nan)
+        bloque[posiciones] = origen[fila, :len(anteriores)]
+        destino[fila] = bloque
+    destino.flush()
+    del origen, destino
+    return nueva_capacidad
+
+
+def actualizar_cubo(datos, directorio=DIRECTORIO_CUBO_TECNICO, reserva=FECHAS_RESERVA_CUBO, reemplazar=True):
+    """
+    Reemplaza en el cubo los tickers presentes en `datos` (todas sus fechas) y agrega los que no
+    estaban. Con `reemplazar=False` solo escribe las fechas de `datos` y conserva las demás (para
+    cargar un ticker por bloques). Sin cubo previo lo construye con `datos`. Retorna el índice escrito.
+    """
+    if not existe_cubo(directorio):
+        return construir_cubo(datos, directorio, reserva=reserva)
+    indice = leer_indice(directorio)
+    campos = indice['campos']
+    tickers, offsets, dias, valores = _componentes(datos, campos)
+    if not tickers:
+        return indice
+
+    fechas = np.array(indice['fechas'], dtype='datetime64[D]').astype(np.int64)
+    nuevas = np.setdiff1d(np.unique(dias), fechas)
+    capacidad = indice['capacidad_fechas']
+    generacion, archivo = indice['generacion'], indice['archivo']
+    existentes = {ticker: i for i, ticker in enumerate(indice['tickers'])}
+    agregados = [t for t in tickers if t not in existentes]
+    if nuevas.size:
+        todas = np.union1d(fechas, nuevas)
+        al_final = fechas.size == 0 or nuevas.min() > fechas.max()
+        if not al_final or len(todas) > capacidad:
+            # Fecha intermedia o sin capacidad: el eje de fechas cambia para todos los tickers
+            print(f"   - Reordenando el cubo técnico ({len(todas)} fechas)")
+            generacion, archivo = _archivo_generacion(directorio)
+            capacidad = _reordenar(directorio, indice, todas, reserva, archivo)
+        fechas = todas
+    if archivo == indice['archivo'] and len(agregados) < len(tickers):
+        # Se reescriben tickers que los lectores ya ven: copia en una generación nueva
+        generacion, archivo = _archivo_generacion(directorio)
+        shutil.copyfile(path_valores(directorio, indice), os.path.join(directorio, archivo))
+
+    tickers_cubo = indice['tickers'] + agregados
+    path = os.path.join(directorio, archivo)
+    if agregados:
+        # El ticker es el eje externo: los nuevos van al final sin mover los existentes
+        with open(path, 'r+b') as f:
+            f.truncate(len(tickers_cubo) * capacidad * len(campos) * np.dtype(np.float32).itemsize)
+    posiciones = {ticker: i for i, ticker in enumerate(tickers_cubo)}
+    mapa = np.memmap(path, dtype=np.float32, mode='r+', shape=(len(tickers_cubo), capacidad, len(campos)))
+    if agregados:
+        mapa[len(existentes):] = np.nan  # el archivo se extendió con ceros
+    _volcar_tickers(mapa, [posiciones[t] for t in tickers], tickers, offsets, dias, valores, campos, fechas, reemplazar)
+    mapa.flush()
+    del mapa
+    return _escribir_indice(directorio, tickers_cubo, fechas, campos, capacidad, generacion, archivo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cubo técnico en disco (ticker × fecha × campo, float32)")
+    parser.add_argument('--construir', action='store_true', help="Construye el cubo desde ARCHIVO_TECNICO")
+    parser.add_argument('--directorio', default=DIRECTORIO_CUBO_TECNICO, help="Directorio del cubo")
+    parser.add_argument('--ticker', default=None, help="Muestra las últimas barras de un ticker")
+    parser.add_argument('--campos', nargs='+', default=None, help="Campos a mostrar con --ticker")
+    parser.add_argument('--barras', type=int, default=5, help="Barras a mostrar con --ticker")
+    args = parser.parse_args()
+
+    if args.construir:
+        inicio = time.time()
+        indice = construir_cubo(directorio=args.directorio)
+        print(f"✓ Cubo técnico construido en {time.time() - inicio:.1f} s -> {args.directorio}")
+    elif not existe_cubo(args.directorio):
+        print(f"✗ No hay cubo técnico en {args.directorio} (usar --construir)")
+        return 1
+
+    cubo = CuboTecnico(args.directorio)
+    tamano = os.path.getsize(path_valores(args.directorio, leer_indice(args.directorio))) / (1024 * 1024)
+    rango = f"{cubo.fechas[0]} a {cubo.fechas[-1]}" if len(cubo.fechas) else "sin fechas"
+    print(f"   - {len(cubo.tickers)} tickers × {len(cubo.fechas)} fechas ({rango}, capacidad "
+          f"{cubo.capacidad_fechas}) × {len(cubo.campos)} campos, {tamano:.0f} MB")
+    if args.ticker:
+        if args.ticker not in cubo:
+            print(f"✗ {args.ticker} no está en el cubo")
+            return 1
+        print(cubo.marco(args.ticker, args.campos).tail(args.barras).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Decimación de series de tiempo para graficar historias largas.
+
+Una línea no puede mostrar más detalle que el ancho en píxeles del eje, así que antes de dibujar
+cada serie se reduce a un número de puntos proporcional a ese ancho:
+
+- 'lttb' (Largest-Triangle-Three-Buckets): conserva la forma visual eligiendo en cada cubeta el
+  punto que forma el triángulo de mayor área con sus vecinos; además se agregan siempre el mínimo
+  y el máximo globales.
+- 'minmax': conserva el mínimo y el máximo de cada cubeta (una cubeta por píxel), de modo que
+  ningún extremo local desaparece.
+
+El costo de dibujar queda acotado por el ancho del gráfico, no por el largo de la historia.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import os
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+METODO_DECIMACION = config.METODO_DECIMACION
+METODOS = ('lttb', 'minmax')
+
+
+def _como_float(x):
+    """Eje x como float64 (las fechas pasan a nanosegundos) para calcular áreas."""
+    if isinstance(x, (pd.DatetimeIndex, pd.Series)) and pd.api.types.is_datetime64_any_dtype(x):
+        return pd.DatetimeIndex(x).asi8.astype(np.float64)
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def indices_lttb(x, y, puntos):
+    """Índices (ordenados) de los `puntos` elegidos por LTTB, más el mínimo y máximo globales."""
+    largo = len(y)
+    if puntos >= largo or puntos < 3:
+        return np.arange(largo)
+    x = _como_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    # Primer y último punto fijos; el resto se reparte en puntos - 2 cubetas contiguas
+    bordes = np.linspace(1, largo - 1, puntos - 1).astype(np.int64)
+    indices = np.empty(puntos, dtype=np.int64)
+    indices[0], indices[-1] = 0, largo - 1
+    anterior = 0
+    for i in range(puntos - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        if i + 2 < len(bordes):
+            cx = x[fin:bordes[i + 2]].mean()
+            cy = y[fin:bordes[i + 2]].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        ax, ay = x[anterior], y[anterior]
+        areas = np.abs((ax - cx) * (y[inicio:fin] - ay) - (ax - x[inicio:fin]) * (cy - ay))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    extremos = [int(np.argmin(y)), int(np.argmax(y))]
+    return np.unique(np.concatenate([indices, extremos]))
+
+
+def indices_minmax(y, cubetas):
+    """Índices (ordenados) del mínimo y el máximo de cada una de `cubetas` cubetas, más los bordes."""
+    largo = len(y)
+    if 2 * cubetas >= largo or cubetas < 1:
+        return np.arange(largo)
+    y = np.asarray(y, dtype=np.float64)
+    inicios = np.linspace(0, largo, cubetas + 1).astype(np.int64)[:-1]
+    largos = np.diff(np.append(inicios, largo))
+    cubeta = np.repeat(np.arange(cubetas), largos)
+    elegidos = [np.array([0, largo - 1])]
+    for reduccion in (np.minimum, np.maximum):
+        extremos = np.repeat(reduccion.reduceat(y, inicios), largos)
+        candidatos = np.flatnonzero(y == extremos)
+        # Primer candidato de cada cubeta (puede haber empates)
+        _, primeros = np.unique(cubeta[candidatos], return_index=True)
+        elegidos.append(candidatos[primeros])
+    return np.unique(np.concatenate(elegidos))
+
+
+def decimar(x, y, ancho_px, metodo=METODO_DECIMACION):
+    """
+    Reduce la serie (x, y) para un eje de `ancho_px` píxeles. `y` no debe tener NaN.
+    Retorna (x, y) decimados del mismo tipo que la entrada (index/arreglo).
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método de decimación desconocido: {metodo} (opciones: {', '.join(METODOS)})")
+    ancho_px = max(int(ancho_px), 1)
+    if metodo == 'lttb':
+        indices = indices_lttb(x, y, ancho_px)
+    else:
+        indices = indices_minmax(y, ancho_px)
+    if len(indices) == len(y):
+        return x, y
+    return x[indices], np.asarray(y)[indices]
+
+
+def decimar_serie(serie, ancho_px, metodo=METODO_DECIMACION):
+    """Versión para pd.Series indexada por fecha: descarta NaN y decima. Retorna una pd.Series."""
+    serie = serie.dropna()
+    x, y = decimar(serie.index, serie.to_numpy(), ancho_px, metodo)
+    return pd.Series(y, index=x, name=serie.name)
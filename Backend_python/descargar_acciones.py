@@ -6,7 +6,7 @@ Lee `CSV/acciones.csv` (columna NEMOTECNICO) y usa el sufijo configurado para Ya
 
 import os
 import time
-from typing import List
+from typing import List, Optional, Set, Tuple
 import pandas as pd
 import yfinance as yf
 
@@ -19,6 +19,12 @@ try:
 except Exception as exc:
     raise RuntimeError("No se pudo importar config.py desde la raíz del proyecto.") from exc
 
+from Backend_python.checkpoints import CheckpointTickers, checkpoints_activos
+from Backend_python.instrumentacion import tramo
+from Backend_python.metricas import (
+    DURACION_DESCARGA, FALLOS_DESCARGA, FILAS_ESCRITAS, ULTIMA_DURACION_DESCARGA, registrar_ultimas_barras,
+)
+
 
 def cargar_lista_tickers(path_acciones_csv: str) -> List[str]:
     df = pd.read_csv(path_acciones_csv)
@@ -27,9 +33,9 @@ def cargar_lista_tickers(path_acciones_csv: str) -> List[str]:
     return tickers
 
 
-def descargar_ohlcv_para_ticker(nemo: str) -> pd.DataFrame:
-    yf_ticker = f"{nemo}{config.YF_SANTIAGO_SUFFIX}"
-    data = yf.download(yf_ticker, start=config.FECHA_INICIO, auto_adjust=False, progress=False)
+def descargar_ohlcv_para_ticker(nemo: str, inicio: Optional[str] = None, sufijo: Optional[str] = None) -> pd.DataFrame:
+    yf_ticker = f"{nemo}{config.YF_SANTIAGO_SUFFIX if sufijo is None else sufijo}"
+    data = yf.download(yf_ticker, start=inicio or config.FECHA_INICIO, auto_adjust=False, progress=False)
     if data.empty:
         return pd.DataFrame()
     
@@ -77,14 +83,78 @@ def descargar_ohlcv_para_ticker(nemo: str) -> pd.DataFrame:
     return data[required_cols]
 
 
-def construir_master_desde_lista() -> pd.DataFrame:
+def descargar_intradia_para_ticker(nemo: str, intervalo: Optional[str] = None, inicio: Optional[str] = None,
+                                   sufijo: Optional[str] = None) -> pd.DataFrame:
+    """
+    Barras intradía de `nemo` ('1m', '5m' o '15m'; por defecto INTERVALO_INTRADIA). Yahoo Finance solo
+    entrega los últimos DIAS_HISTORIA_INTRADIA días de cada intervalo, así que `inicio` se acota a esa
+    ventana. La fecha queda en hora local de ZONA_HORARIA_MERCADO, sin zona horaria.
+    """
+    intervalo = intervalo or config.INTERVALO_INTRADIA
+    hoy = pd.Timestamp.now(tz=config.ZONA_HORARIA_MERCADO).tz_localize(None).normalize()
+    limite = hoy - pd.Timedelta(days=config.DIAS_HISTORIA_INTRADIA[intervalo])
+    inicio = limite if inicio is None else max(pd.Timestamp(inicio).normalize(), limite)
+    yf_ticker = f"{nemo}{config.YF_SANTIAGO_SUFFIX if sufijo is None else sufijo}"
+    data = yf.download(yf_ticker, start=inicio.strftime("%Y-%m-%d"), interval=intervalo, auto_adjust=False,
+                       progress=False)
+    if data.empty:
+        return pd.DataFrame()
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = [col[0] if isinstance(col, tuple) else col for col in data.columns]
+
+    fechas = pd.DatetimeIndex(data.index)
+    if fechas.tz is not None:
+        fechas = fechas.tz_convert(config.ZONA_HORARIA_MERCADO).tz_localize(None)
+    df = pd.DataFrame({
+        "date": fechas,
+        "ticker": nemo,
+        "open": data["Open"].to_numpy(),
+        "high": data["High"].to_numpy(),
+        "low": data["Low"].to_numpy(),
+        "close": data["Close"].to_numpy(),
+        "volume": data["Volume"].fillna(0).to_numpy() if "Volume" in data.columns else 0.0,
+    })
+    return df.dropna(subset=["open", "high", "low", "close"]).reset_index(drop=True)
+
+
+def descargar_con_metricas(nemo: str, inicio: Optional[str] = None, sufijo: Optional[str] = None) -> pd.DataFrame:
+    """`descargar_ohlcv_para_ticker` medido en la traza activa y en las métricas de descarga."""
+    inicio_medicion = time.perf_counter()
+    try:
+        with tramo(f"descarga {nemo}", categoria='descarga') as medicion:
+            df_t = descargar_ohlcv_para_ticker(nemo, inicio=inicio, sufijo=sufijo)
+            medicion['filas_salida'] = len(df_t)
+    except Exception:
+        FALLOS_DESCARGA.incrementar(nemo, 'error')
+        raise
+    finally:
+        duracion = time.perf_counter() - inicio_medicion
+        DURACION_DESCARGA.observar(valor=duracion)
+        ULTIMA_DURACION_DESCARGA.fijar(nemo, valor=duracion)
+    if df_t.empty:
+        FALLOS_DESCARGA.incrementar(nemo, 'sin_datos')
+    return df_t
+
+
+def construir_master_desde_lista(reanudar: bool = False) -> pd.DataFrame:
     tickers = cargar_lista_tickers(config.CSV_ACCIONES)
+    checkpoint = CheckpointTickers("descarga", contexto={
+        "fecha_inicio": config.FECHA_INICIO,
+        "sufijo": config.YF_SANTIAGO_SUFFIX,
+    }, activo=checkpoints_activos(reanudar))
+    completados = checkpoint.iniciar(reanudar)
+    if completados:
+        print(f"Reanudando descarga: {len(completados)} tickers ya descargados")
     frames: List[pd.DataFrame] = []
     for nemo in tickers:
+        if nemo in completados:
+            frames.extend(checkpoint.cargar([nemo]))
+            continue
         try:
             print(f"Descargando {nemo}...")
-            df_t = descargar_ohlcv_para_ticker(nemo)
+            df_t = descargar_con_metricas(nemo)
             if not df_t.empty:
+                checkpoint.guardar(nemo, df_t)
                 frames.append(df_t)
             else:
                 print(f"   Advertencia: sin datos para {nemo}")
@@ -97,17 +167,85 @@ def construir_master_desde_lista() -> pd.DataFrame:
     return df
 
 
-def main() -> None:
+def cargar_master(path: str = None) -> pd.DataFrame:
+    path = path or config.ARCHIVO_ACCIONES_MASTER
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_csv(path, sep=";", decimal=",", float_precision="round_trip")
+
+
+def actualizar_master_incremental(df_master: Optional[pd.DataFrame] = None) -> Tuple[pd.DataFrame, Set[str]]:
+    """
+    Descarga solo las barras desde la última fecha de cada ticker en el master (la última barra se
+    vuelve a pedir porque durante la rueda cambia) y las fusiona con `df_master`, que puede venir ya
+    cargado en memoria. Escribe el master solo si algo cambió.
+    Retorna (df_master actualizado, tickers con barras nuevas o modificadas).
+    """
+    if df_master is None:
+        df_master = cargar_master()
+    ultimas = df_master.groupby("ticker")["date"].max().to_dict() if not df_master.empty else {}
+    existentes = dict(tuple(df_master.groupby("ticker"))) if not df_master.empty else {}
+    columnas = ["open", "high", "low", "close", "volume"]
+
+    frames: List[pd.DataFrame] = []
+    cambiados: Set[str] = set()
+    for nemo in cargar_lista_tickers(config.CSV_ACCIONES):
+        try:
+            df_t = descargar_con_metricas(nemo, inicio=ultimas.get(nemo))
+        except Exception as e:
+            print(f"   Error al descargar {nemo}: {e}")
+            continue
+        finally:
+            time.sleep(0.2)
+        if df_t.empty:
+            continue
+        previo = existentes.get(nemo)
+        if previo is not None:
+            comparacion = df_t.merge(previo, on=["date", "ticker"], how="left", suffixes=("", "_previo"))
+            iguales = pd.Series(True, index=comparacion.index)
+            for col in columnas:
+                if col in df_t.columns and f"{col}_previo" in comparacion.columns:
+                    nuevo, viejo = comparacion[col].astype(float), comparacion[f"{col}_previo"].astype(float)
+                    iguales &= (nuevo - viejo).abs().le(1e-9 * viejo.abs().clip(lower=1.0))
+            if iguales.all():
+                continue
+        cambiados.add(nemo)
+        frames.append(df_t)
+
+    if not frames:
+        return df_master, cambiados
+    df_master = pd.concat([df_master] + frames, ignore_index=True)
+    df_master = df_master.drop_duplicates(subset=["ticker", "date"], keep="last")
+    df_master = df_master.sort_values(["ticker", "date"], kind="stable").reset_index(drop=True)
+    with tramo("escritura CSV acciones_master", categoria='escritura', filas_entrada=len(df_master)):
+        df_master.to_csv(config.ARCHIVO_ACCIONES_MASTER, index=False, sep=";", decimal=",")
+    FILAS_ESCRITAS.incrementar("acciones_master", valor=len(df_master))
+    registrar_ultimas_barras(df_master)
+    return df_master, cambiados
+
+
+def main(reanudar: bool = False) -> None:
     print("--- Descarga de acciones IPSA (Yahoo Finance) ---")
-    df = construir_master_desde_lista()
+    df = construir_master_desde_lista(reanudar)
     if df.empty:
         print("No se pudo construir el master de acciones.")
         return
-    df.to_csv(config.ARCHIVO_ACCIONES_MASTER, index=False, sep=";", decimal=",")
+    with tramo("escritura CSV acciones_master", categoria='escritura', filas_entrada=len(df)):
+        df.to_csv(config.ARCHIVO_ACCIONES_MASTER, index=False, sep=";", decimal=",")
+    FILAS_ESCRITAS.incrementar("acciones_master", valor=len(df))
+    registrar_ultimas_barras(df)
     print(f"Guardado en {config.ARCHIVO_ACCIONES_MASTER}")
+    faltantes = set(cargar_lista_tickers(config.CSV_ACCIONES)) - set(df["ticker"].astype(str))
+    if faltantes and not checkpoints_activos(reanudar):
+        print(f"Tickers sin datos: {', '.join(sorted(faltantes))}.")
+    elif faltantes:
+        # Se conservan los checkpoints para que --resume reintente solo los faltantes
+        print(f"Tickers sin datos: {', '.join(sorted(faltantes))}. Usa --resume para reintentarlos.")
+    else:
+        CheckpointTickers("descarga").limpiar()
 
 
 if __name__ == "__main__":
-    main()
+    main(reanudar="--resume" in sys.argv)
 
 
@@ -0,0 +1,375 @@
+"""
+Ejecución fragmentada de varios universos (IPSA, small caps, ADRs, mercados regionales).
+
+- `coordinar`: divide cada universo de `config.UNIVERSOS` en unidades de trabajo de
+  TICKERS_POR_UNIDAD tickers y las encola en una cola SQLite durable (`ARCHIVO_COLA_TRABAJO`).
+- `trabajar`: cada trabajador toma unidades de la cola (con bloqueo de escritura de SQLite, así que
+  dos trabajadores nunca toman la misma), descarga sus tickers, calcula los indicadores y deja un
+  fragmento por unidad y trabajador en `DIRECTORIO_FRAGMENTOS`. Se pueden lanzar tantos procesos como se quiera,
+  en uno o más hosts que compartan el directorio `output/`.
+- `fusionar`: cuando todas las unidades de un universo terminaron, une en el master y la base
+  técnica del universo los fragmentos del trabajador que completó cada unidad.
+
+Una unidad tomada por un trabajador que murió vuelve a quedar disponible cuando vence su plazo
+(PLAZO_UNIDAD_MINUTOS); tras MAX_INTENTOS tomas (fallos o plazos vencidos) queda marcada como
+fallida. Solo el trabajador que tiene la unidad puede completarla o fallarla: uno que sigue vivo
+después de perderla por plazo no pisa el estado ni los fragmentos que deja el nuevo dueño, y
+descarta los suyos.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from datetime import datetime
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+from Backend_python.instrumentacion import tramo
+
+ARCHIVO_COLA = config.ARCHIVO_COLA_TRABAJO
+DIRECTORIO_FRAGMENTOS = config.DIRECTORIO_FRAGMENTOS
+TICKERS_POR_UNIDAD = config.TICKERS_POR_UNIDAD
+PLAZO_UNIDAD_MINUTOS = config.PLAZO_UNIDAD_MINUTOS
+MAX_INTENTOS = config.MAX_INTENTOS
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS unidades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    universo TEXT NOT NULL,
+    indice INTEGER NOT NULL,
+    tickers TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    trabajador TEXT,
+    tomada_en REAL,
+    actualizada_en REAL,
+    error TEXT,
+    UNIQUE (universo, indice)
+);
+CREATE INDEX IF NOT EXISTS idx_unidades_estado ON unidades (estado, id);
+"""
+
+
+def conectar(path=ARCHIVO_COLA):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # isolation_level=None: las transacciones se controlan explícitamente con BEGIN IMMEDIATE
+    conexion = sqlite3.connect(path, timeout=60, isolation_level=None)
+    conexion.executescript(ESQUEMA)
+    return conexion
+
+
+def rutas_universo(nombre, universo):
+    """Rutas de salida (master, tecnico) de un universo."""
+    directorio = os.path.join('output', 'universos', nombre)
+    return (
+        universo.get('master') or os.path.join(directorio, 'acciones_master.csv'),
+        universo.get('tecnico') or os.path.join(directorio, 'database_maestra_tecnica.csv'),
+    )
+
+
+def _directorio_fragmentos(nombre):
+    return os.path.join(DIRECTORIO_FRAGMENTOS, nombre)
+
+
+def _archivo_fragmento(nombre, tipo, indice, trabajador):
+    """Fragmento `tipo` ('master' o 'tecnico') de una unidad escrito por `trabajador` ('host:pid')."""
+    return os.path.join(_directorio_fragmentos(nombre), f"{tipo}_{indice:05d}.{trabajador.replace(':', '_')}.csv")
+
+
+def _descartar_fragmentos(nombre, indice, trabajador):
+    """Borra los fragmentos (y temporales) que `trabajador` dejó de una unidad que no completó."""
+    for tipo in ('master', 'tecnico'):
+        archivo = _archivo_fragmento(nombre, tipo, indice, trabajador)
+        for path in (archivo, archivo + '.tmp'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# --- Coordinador ---
+
+def coordinar(universos=None, tickers_por_unidad=TICKERS_POR_UNIDAD, path=ARCHIVO_COLA):
+    """
+    Encola las unidades de trabajo de `universos` (por defecto todos los de config.UNIVERSOS).
+    Las unidades y fragmentos previos de esos universos se descartan. Retorna {universo: n_unidades}.
+    """
+    from Backend_python.descargar_acciones import cargar_lista_tickers
+
+    nombres = universos or list(config.UNIVERSOS)
+    conexion = conectar(path)
+    creadas = {}
+    try:
+        conexion.execute('BEGIN IMMEDIATE')
+        for nombre in nombres:
+            tickers = cargar_lista_tickers(config.UNIVERSOS[nombre]['csv'])
+            conexion.execute('DELETE FROM unidades WHERE universo = ?', (nombre,))
+            lotes = [tickers[i:i + tickers_por_unidad] for i in range(0, len(tickers), tickers_por_unidad)]
+            conexion.executemany(
+                'INSERT INTO unidades (universo, indice, tickers, actualizada_en) VALUES (?, ?, ?, ?)',
+                [(nombre, indice, json.dumps(lote), time.time()) for indice, lote in enumerate(lotes)],
+            )
+            creadas[nombre] = len(lotes)
+        conexion.execute('COMMIT')
+    except Exception:
+        conexion.execute('ROLLBACK')
+        raise
+    finally:
+        conexion.close()
+    for nombre in nombres:
+        directorio = _directorio_fragmentos(nombre)
+        if os.path.isdir(directorio):
+            for archivo in os.listdir(directorio):
+                os.remove(os.path.join(directorio, archivo))
+    return creadas
+
+
+# --- Cola ---
+
+def tomar_unidad(conexion, trabajador, plazo_minutos=PLAZO_UNIDAD_MINUTOS, max_intentos=MAX_INTENTOS):
+    """
+    Toma atómicamente la siguiente unidad pendiente (o una en curso cuyo plazo venció). Las
+    unidades vencidas que ya agotaron `max_intentos` se marcan como fallidas en vez de retomarse.
+    Retorna (id, universo, indice, tickers) o None si no queda trabajo.
+    """
+    ahora = time.time()
+    vencimiento = ahora - plazo_minutos * 60
+    conexion.execute('BEGIN IMMEDIATE')
+    try:
+        conexion.execute(
+            """UPDATE unidades SET estado = 'fallida', actualizada_en = ?,
+               error = COALESCE(error, 'plazo vencido en cada intento')
+               WHERE estado = 'en_curso' AND tomada_en < ? AND intentos >= ?""",
+            (ahora, vencimiento, max_intentos),
+        )
+        fila = conexion.execute(
+            """SELECT id, universo, indice, tickers FROM unidades
+               WHERE estado = 'pendiente' OR (estado = 'en_curso' AND tomada_en < ?)
+               ORDER BY id LIMIT 1""",
+            (vencimiento,),
+        ).fetchone()
+        if fila is not None:
+            conexion.execute(
+                """UPDATE unidades SET estado = 'en_curso', trabajador = ?, tomada_en = ?,
+                   actualizada_en = ?, intentos = intentos + 1 WHERE id = ?""",
+                (trabajador, ahora, ahora, fila[0]),
+            )
+        conexion.execute('COMMIT')
+    except Exception:
+        conexion.execute('ROLLBACK')
+        raise
+    if fila is None:
+        return None
+    return fila[0], fila[1], fila[2], json.loads(fila[3])
+
+
+def completar_unidad(conexion, id_unidad, trabajador):
+    """Marca la unidad como completada si `trabajador` todavía la tiene. Retorna True si la marcó."""
+    cursor = conexion.execute(
+        """UPDATE unidades SET estado = 'completada', error = NULL, actualizada_en = ?
+           WHERE id = ? AND trabajador = ? AND estado = 'en_curso'""",
+        (time.time(), id_unidad, trabajador),
+    )
+    return cursor.rowcount == 1
+
+
+def fallar_unidad(conexion, id_unidad, trabajador, error, max_intentos=MAX_INTENTOS):
+    """
+    Devuelve la unidad a la cola, o la marca como fallida si agotó sus intentos; solo si
+    `trabajador` todavía la tiene. Retorna True si la actualizó.
+    """
+    cursor = conexion.execute(
+        """UPDATE unidades SET estado = CASE WHEN intentos >= ? THEN 'fallida' ELSE 'pendiente' END,
+           error = ?, actualizada_en = ? WHERE id = ? AND trabajador = ? AND estado = 'en_curso'""",
+        (max_intentos, str(error), time.time(), id_unidad, trabajador),
+    )
+    return cursor.rowcount == 1
+
+
+def resumen_cola(path=ARCHIVO_COLA):
+    """DataFrame con la cantidad de unidades por universo y estado."""
+    conexion = conectar(path)
+    try:
+        return pd.read_sql_query(
+            'SELECT universo, estado, COUNT(*) AS unidades FROM unidades GROUP BY universo, estado ORDER BY universo, estado',
+            conexion,
+        )
+    finally:
+        conexion.close()
+
+
+# --- Trabajador ---
+
+def procesar_unidad(universo, indice, tickers, trabajador):
+    """
+    Descarga y enriquece los tickers de una unidad y escribe los fragmentos de `trabajador`, que no
+    comparte nombres con los de otro que haya tomado la misma unidad. Retorna las filas del master.
+    """
+    from Backend_python.descargar_acciones import descargar_con_metricas
+    from Backend_python.motor_condor import limpiar_y_estandarizar, calcular_indicadores_y_senales
+
+    sufijo = config.UNIVERSOS[universo].get('sufijo', config.YF_SANTIAGO_SUFFIX)
+    frames = []
+    for nemo in tickers:
+        try:
+            df_t = descargar_con_metricas(nemo, sufijo=sufijo)
+        except Exception as e:
+            print(f"   Error al descargar {nemo}: {e}")
+            continue
+        if df_t.empty:
+            print(f"   Advertencia: sin datos para {nemo}")
+        else:
+            frames.append(df_t)
+        time.sleep(0.2)
+
+    os.makedirs(_directorio_fragmentos(universo), exist_ok=True)
+    df_master = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    df_tecnico = pd.DataFrame()
+    if not df_master.empty:
+        df_limpio = limpiar_y_estandarizar(df_master.copy())
+        if df_limpio is None:
+            raise ValueError(f"No se pudieron limpiar los datos de la unidad {universo}/{indice}")
+        with tramo(f"indicadores {universo}/{indice}", categoria='indicadores', filas_entrada=len(df_limpio)):
+            df_tecnico = calcular_indicadores_y_senales(df_limpio)
+
+    # Escritura atómica: un fragmento existe completo o no existe
+    for tipo, df in (('master', df_master), ('tecnico', df_tecnico)):
+        destino = _archivo_fragmento(universo, tipo, indice, trabajador)
+        df.to_csv(destino + '.tmp', index=False, sep=';', decimal=',')
+        os.replace(destino + '.tmp', destino)
+    return len(df_master)
+
+
+def trabajar(path=ARCHIVO_COLA, max_unidades=None):
+    """Bucle de un trabajador: toma unidades hasta vaciar la cola. Retorna las unidades completadas."""
+    trabajador = f"{socket.gethostname()}:{os.getpid()}"
+    conexion = conectar(path)
+    completadas = 0
+    try:
+        while max_unidades is None or completadas < max_unidades:
+            unidad = tomar_unidad(conexion, trabajador)
+            if unidad is None:
+                break
+            id_unidad, universo, indice, tickers = unidad
+            print(f"[{trabajador}] Unidad {universo}/{indice} ({len(tickers)} tickers)")
+            try:
+                filas = procesar_unidad(universo, indice, tickers, trabajador)
+            except Exception as e:
+                _descartar_fragmentos(universo, indice, trabajador)
+                fallar_unidad(conexion, id_unidad, trabajador, e)
+                print(f"[{trabajador}] ✗ {universo}/{indice}: {e}")
+                continue
+            if completar_unidad(conexion, id_unidad, trabajador):
+                completadas += 1
+                print(f"[{trabajador}] ✓ {universo}/{indice}: {filas} registros")
+            else:
+                _descartar_fragmentos(universo, indice, trabajador)
+                print(f"[{trabajador}] ✗ {universo}/{indice}: el plazo venció y la unidad pasó a otro trabajador")
+    finally:
+        conexion.close()
+    return completadas
+
+
+def lanzar_trabajadores(procesos, path=ARCHIVO_COLA):
+    """Lanza `procesos` trabajadores locales y espera a que vacíen la cola."""
+    if procesos <= 1:
+        return trabajar(path)
+    with multiprocessing.get_context('spawn').Pool(procesos) as pool:
+        return sum(pool.map(trabajar, [path] * procesos))
+
+
+# --- Fusión ---
+
+def fusionar_universo(nombre, path=ARCHIVO_COLA, parcial=False):
+    """
+    Une los fragmentos de un universo en su master y base técnica. Sin `parcial`, solo fusiona si
+    todas las unidades del universo están completadas. Retorna True si escribió las salidas.
+    """
+    conexion = conectar(path)
+    try:
+        filas = conexion.execute(
+            'SELECT indice, estado, trabajador FROM unidades WHERE universo = ? ORDER BY indice', (nombre,)
+        ).fetchall()
+    finally:
+        conexion.close()
+    if not filas:
+        print(f"   - {nombre}: sin unidades en la cola")
+        return False
+    incompletas = [indice for indice, estado, _ in filas if estado != 'completada']
+    if incompletas and not parcial:
+        print(f"   - {nombre}: {len(incompletas)} de {len(filas)} unidades sin completar; no se fusiona")
+        return False
+
+    path_master, path_tecnico = rutas_universo(nombre, config.UNIVERSOS[nombre])
+    for tipo, destino in (('master', path_master), ('tecnico', path_tecnico)):
+        partes = []
+        for indice, estado, trabajador in filas:
+            if estado != 'completada':
+                continue
+            # Solo el fragmento de quien completó la unidad: el de un dueño anterior puede estar a medias
+            archivo = _archivo_fragmento(nombre, tipo, indice, trabajador)
+            if os.path.exists(archivo) and os.path.getsize(archivo) > 1:
+                partes.append(pd.read_csv(archivo, sep=';', decimal=',', float_precision='round_trip'))
+        partes = [df for df in partes if not df.empty]
+        if not partes:
+            print(f"   - {nombre}: sin datos de {tipo}")
+            continue
+        df = pd.concat(partes, ignore_index=True)
+        os.makedirs(os.path.dirname(destino) or '.', exist_ok=True)
+        with tramo(f"fusión {tipo} {nombre}", categoria='escritura', filas_entrada=len(df)):
+            df.to_csv(destino, index=False, sep=';', decimal=',')
+        print(f"   - {nombre}: {len(df)} registros de {tipo} en '{destino}'")
+    return True
+
+
+def fusionar(universos=None, path=ARCHIVO_COLA, parcial=False):
+    return {nombre: fusionar_universo(nombre, path, parcial) for nombre in (universos or list(config.UNIVERSOS))}
+
+
+def parsear_argumentos():
+    parser = argparse.ArgumentParser(description="Ejecución fragmentada de universos de acciones")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_coord = sub.add_parser('coordinar', help="Divide los universos en unidades y las encola")
+    p_coord.add_argument('--universos', nargs='+', choices=list(config.UNIVERSOS))
+    p_coord.add_argument('--tamano', type=int, default=TICKERS_POR_UNIDAD, help="Tickers por unidad")
+    p_trab = sub.add_parser('trabajar', help="Procesa unidades de la cola hasta vaciarla")
+    p_trab.add_argument('--procesos', type=int, default=1, help="Trabajadores locales en paralelo")
+    p_fus = sub.add_parser('fusionar', help="Une los fragmentos de cada universo")
+    p_fus.add_argument('--universos', nargs='+', choices=list(config.UNIVERSOS))
+    p_fus.add_argument('--parcial', action='store_true', help="Fusiona aunque queden unidades sin completar")
+    sub.add_parser('estado', help="Muestra el estado de la cola")
+    p_todo = sub.add_parser('todo', help="Coordina, procesa con trabajadores locales y fusiona")
+    p_todo.add_argument('--procesos', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    return parser.parse_args()
+
+
+def main():
+    args = parsear_argumentos()
+    print(f"--- EJECUCIÓN FRAGMENTADA: {args.comando.upper()} ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')}) ---")
+    if args.comando in ('coordinar', 'todo'):
+        creadas = coordinar(getattr(args, 'universos', None), getattr(args, 'tamano', TICKERS_POR_UNIDAD))
+        for nombre, n in creadas.items():
+            print(f"-> {nombre}: {n} unidades encoladas")
+    if args.comando in ('trabajar', 'todo'):
+        inicio = time.time()
+        completadas = lanzar_trabajadores(args.procesos)
+        print(f"-> {completadas} unidades completadas en {time.time() - inicio:.2f} s")
+    if args.comando in ('fusionar', 'todo'):
+        print("-> Fusionando fragmentos...")
+        fusionar(getattr(args, 'universos', None), parcial=getattr(args, 'parcial', False))
+    if args.comando == 'estado':
+        print(resumen_cola().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
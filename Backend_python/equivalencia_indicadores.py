@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Verificación de equivalencia numérica de los motores de indicadores.
+
+Cualquier implementación alternativa de `motor_condor` (vectorizada, por streaming o en
+paralelo) tiene que reproducir las columnas que hoy produce `process_group` con pandas_ta. Este
+módulo corre el motor de referencia y uno o más motores candidatos sobre los mismos datos
+(el mercado sintético de benchmark.py y/o el acciones_master.csv grabado) y compara columna por
+columna:
+
+- las filas se alinean por (ticker, date) y se reportan las que sobran o faltan;
+- los NaN de calentamiento tienen que coincidir: un valor donde la referencia tiene NaN (o al
+  revés) cuenta como diferencia;
+- los valores se comparan con |candidato - referencia| <= atol + rtol * |referencia|, con
+  tolerancias por indicador (TOLERANCIAS); en los acumulados (OBV, AD) atol se escala por el
+  máximo de la columna, porque su nivel depende del largo de la historia.
+
+Para cada columna se informa el error absoluto y relativo máximo, y para cada motor el tiempo y
+la aceleración respecto de la referencia. El reporte se guarda como JSON en
+DIRECTORIO_EQUIVALENCIA y el proceso termina con código 1 si algún motor no es equivalente.
+
+Un motor es una función que recibe el DataFrame limpio (salida de `limpiar_y_estandarizar`) y
+retorna el DataFrame con los indicadores. Además de los de MOTORES se puede pasar cualquier
+función como 'modulo:funcion'.
+
+Uso:
+    python3 Backend_python/equivalencia_indicadores.py --motores paralelo [--fuentes sintetico grabado]
+    python3 Backend_python/equivalencia_indicadores.py --motores mi_paquete.motor:calcular --tickers 300 --anios 5
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+from Backend_python import motor_condor
+from Backend_python.benchmark import RANGO_TICKERS, generar_mercado
+
+DIRECTORIO_EQUIVALENCIA = config.DIRECTORIO_EQUIVALENCIA
+FUENTES = ('sintetico', 'grabado')
+CLAVES = ['ticker', 'date']
+
+MOTORES = {
+    'referencia': motor_condor.calcular_indicadores_y_senales,
+    'paralelo': motor_condor.calcular_indicadores_paralelo,
+    'bloques': motor_condor.calcular_indicadores_por_bloques,
+}
+
+# Tolerancias por prefijo de columna (en minúsculas, como quedan tras process_group).
+# Se usa el prefijo más largo que calce; las columnas sin prefijo conocido usan la de None.
+TOLERANCIAS = {
+    None: {'atol': 1e-9, 'rtol': 1e-7},
+    # Ventanas móviles: solo difiere el orden de las sumas
+    'sma_': {'atol': 1e-9, 'rtol': 1e-9},
+    'bbm_': {'atol': 1e-9, 'rtol': 1e-9},
+    'its_': {'atol': 1e-9, 'rtol': 1e-9},
+    'iks_': {'atol': 1e-9, 'rtol': 1e-9},
+    'isa_': {'atol': 1e-9, 'rtol': 1e-9},
+    'isb_': {'atol': 1e-9, 'rtol': 1e-9},
+    'ics_': {'atol': 0, 'rtol': 0},
+    # Desviación estándar móvil y sus derivados
+    'bbl_': {'atol': 1e-8, 'rtol': 1e-7},
+    'bbu_': {'atol': 1e-8, 'rtol': 1e-7},
+    'bbb_': {'atol': 1e-8, 'rtol': 1e-6},
+    'bbp_': {'atol': 1e-6, 'rtol': 1e-6},
+    # Recursivos (EMA/RMA): un motor que arranca con otra semilla o desde un tramo de solape
+    # converge geométricamente al valor de referencia
+    'ema_': {'atol': 1e-8, 'rtol': 1e-6},
+    'macd_': {'atol': 1e-8, 'rtol': 1e-6},
+    'macds_': {'atol': 1e-8, 'rtol': 1e-6},
+    'macdh_': {'atol': 1e-6, 'rtol': 1e-5},
+    'rsi_': {'atol': 1e-6, 'rtol': 1e-6},
+    'atrr_': {'atol': 1e-8, 'rtol': 1e-6},
+    'adx_': {'atol': 1e-6, 'rtol': 1e-6},
+    'dmp_': {'atol': 1e-6, 'rtol': 1e-6},
+    'dmn_': {'atol': 1e-6, 'rtol': 1e-6},
+    'stochk_': {'atol': 1e-7, 'rtol': 1e-7},
+    'stochd_': {'atol': 1e-7, 'rtol': 1e-7},
+    'cci_': {'atol': 1e-6, 'rtol': 1e-6},
+    # PSAR depende de la trayectoria completa: un cambio de reversión cambia la señal
+    'psarl_': {'atol': 1e-9, 'rtol': 1e-9},
+    'psars_': {'atol': 1e-9, 'rtol': 1e-9},
+    'psaraf_': {'atol': 1e-12, 'rtol': 0},
+    'psarr_': {'atol': 0, 'rtol': 0},
+    # Acumulados: atol relativo al máximo de la columna (un rebase suma en otro orden)
+    'obv': {'atol': 1e-9, 'rtol': 1e-9, 'escala': True},
+    'ad': {'atol': 1e-9, 'rtol': 1e-9, 'escala': True},
+}
+
+
+def tolerancia(columna):
+    """Tolerancia de `columna`: la del prefijo más largo que calce."""
+    prefijos = [p for p in TOLERANCIAS if p is not None and columna.startswith(p)]
+    spec = TOLERANCIAS[max(prefijos, key=len) if prefijos else None]
+    return {'atol': 0.0, 'rtol': 0.0, 'escala': False, **spec}
+
+
+# ---------------------------------------------------------------------------
+# Datos de entrada
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def _silencio(verbose):
+    """Descarta lo que imprimen los motores, salvo con `verbose`."""
+    if verbose:
+        yield
+        return
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        yield
+
+
+def cargar_fuente(fuente, n_tickers, anios, semilla, archivo=None, verbose=False):
+    """
+    DataFrame limpio de la fuente: 'sintetico' (generar_mercado) o 'grabado' (los primeros
+    `n_tickers` tickers de `archivo`, por defecto ARCHIVO_ACCIONES_MASTER). None si no hay datos.
+    """
+    if fuente == 'sintetico':
+        df = generar_mercado(n_tickers, anios, semilla)[0]
+    elif fuente == 'grabado':
+        archivo = archivo or config.ARCHIVO_ACCIONES_MASTER
+        if not os.path.exists(archivo):
+            return None
+        df = pd.read_csv(archivo, delimiter=';')
+        columna = next((c for c in df.columns if c.lower() in ('ticker', 'nemotecnico')), None)
+        if columna is not None:
+            df = df[df[columna].isin(sorted(df[columna].dropna().unique())[:n_tickers])]
+    else:
+        raise ValueError(f"Fuente desconocida: {fuente} (opciones: {', '.join(FUENTES)})")
+    with _silencio(verbose):
+        return motor_condor.limpiar_y_estandarizar(df.reset_index(drop=True))
+
+
+def resolver_motor(nombre):
+    """Función del motor `nombre`: una clave de MOTORES o 'modulo:funcion'."""
+    if nombre in MOTORES:
+        return MOTORES[nombre]
+    if ':' not in nombre:
+        raise ValueError(f"Motor desconocido: {nombre} (opciones: {', '.join(MOTORES)} o 'modulo:funcion')")
+    modulo, funcion = nombre.split(':', 1)
+    try:
+        return getattr(importlib.import_module(modulo), funcion)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"No se pudo cargar el motor {nombre}: {e}")
+
+
+def ejecutar_motor(funcion, df, repeticiones=1, verbose=False):
+    """Corre `funcion` sobre copias de `df`. Retorna (resultado, mejor tiempo en segundos)."""
+    mejor = None
+    for _ in range(max(repeticiones, 1)):
+        entrada = df.copy()
+        with _silencio(verbose):
+            inicio = time.perf_counter()
+            resultado = funcion(entrada)
+            duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return resultado, mejor
+
+
+# ---------------------------------------------------------------------------
+# Comparación
+# ---------------------------------------------------------------------------
+
+def _alinear(referencia, candidato):
+    """Ordena ambos por (ticker, date) y deja solo las filas comunes. Retorna (ref, cand, faltan, sobran)."""
+    ref = referencia.sort_values(CLAVES, kind='stable').reset_index(drop=True)
+    cand = candidato.sort_values(CLAVES, kind='stable').reset_index(drop=True)
+    claves_ref = pd.MultiIndex.from_frame(ref[CLAVES])
+    claves_cand = pd.MultiIndex.from_frame(cand[CLAVES])
+    if claves_ref.equals(claves_cand):
+        return ref, cand, 0, 0
+    comunes_ref = claves_ref.isin(claves_cand)
+    comunes_cand = claves_cand.isin(claves_ref)
+    faltan, sobran = int((~comunes_ref).sum()), int((~comunes_cand).sum())
+    return ref[comunes_ref].reset_index(drop=True), cand[comunes_cand].reset_index(drop=True), faltan, sobran
+
+
+def comparar_columna(columna, ref, cand):
+    """Métricas de una columna numérica."""
+    spec = tolerancia(columna)
+    r = pd.to_numeric(ref, errors='coerce').to_numpy(dtype=np.float64)
+    c = pd.to_numeric(cand, errors='coerce').to_numpy(dtype=np.float64)
+    nan_r, nan_c = np.isnan(r), np.isnan(c)
+    solo_ref = nan_r & ~nan_c
+    solo_cand = nan_c & ~nan_r
+    ambos = ~nan_r & ~nan_c
+
+    diferencia = np.abs(c[ambos] - r[ambos])
+    magnitud = np.abs(r[ambos])
+    atol = spec['atol'] * (magnitud.max() if spec['escala'] and magnitud.size else 1.0)
+    fuera = diferencia > atol + spec['rtol'] * magnitud
+    relativo = diferencia[magnitud > 0] / magnitud[magnitud > 0]
+    n_fuera = int(fuera.sum()) + int(solo_ref.sum()) + int(solo_cand.sum())
+    return {
+        'columna': columna,
+        'comparados': int(ambos.sum()),
+        'fuera_tolerancia': int(fuera.sum()),
+        'valor_en_calentamiento': int(solo_ref.sum()),
+        'nan_de_mas': int(solo_cand.sum()),
+        'max_error_abs': float(diferencia.max()) if diferencia.size else 0.0,
+        'max_error_rel': float(relativo.max()) if relativo.size else 0.0,
+        'atol': atol,
+        'rtol': spec['rtol'],
+        'equivalente': n_fuera == 0,
+    }
+
+
+def comparar(referencia, candidato):
+    """Compara todas las columnas de `referencia` contra `candidato`. Retorna un diccionario con el detalle."""
+    ref, cand, faltan, sobran = _alinear(referencia, candidato)
+    columnas, ausentes = [], []
+    for columna in ref.columns:
+        if columna in CLAVES:
+            continue
+        if columna not in cand.columns:
+            ausentes.append(columna)
+        elif pd.api.types.is_numeric_dtype(ref[columna]):
+            columnas.append(comparar_columna(columna, ref[columna], cand[columna]))
+        else:
+            distintas = int((ref[columna].astype(str) != cand[columna].astype(str)).sum())
+            columnas.append({'columna': columna, 'comparados': len(ref), 'fuera_tolerancia': distintas,
+                             'valor_en_calentamiento': 0, 'nan_de_mas': 0, 'max_error_abs': None,
+                             'max_error_rel': None, 'atol': 0, 'rtol': 0, 'equivalente': distintas == 0})
+    return {
+        'filas_referencia': len(referencia),
+        'filas_candidato': len(candidato),
+        'filas_faltantes': faltan,
+        'filas_sobrantes': sobran,
+        'columnas_ausentes': ausentes,
+        'columnas_extra': [c for c in cand.columns if c not in ref.columns],
+        'columnas': columnas,
+        'equivalente': (not faltan and not sobran and not ausentes and all(c['equivalente'] for c in columnas)),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Corrida y reporte
+# ---------------------------------------------------------------------------
+
+def verificar(motores, fuentes=FUENTES, n_tickers=30, anios=2, semilla=42, archivo=None, repeticiones=1,
+              verbose=False):
+    """
+    Corre la referencia y cada motor de `motores` sobre cada fuente y los compara.
+    Retorna el reporte completo (diccionario serializable a JSON).
+    """
+    funciones = {nombre: resolver_motor(nombre) for nombre in motores}
+    reporte = {'fecha': time.strftime('%Y-%m-%d %H:%M:%S'), 'tickers': n_tickers, 'anios': anios,
+               'semilla': semilla, 'repeticiones': repeticiones, 'fuentes': []}
+    for fuente in fuentes:
+        df = cargar_fuente(fuente, n_tickers, anios, semilla, archivo, verbose)
+        if df is None or df.empty:
+            reporte['fuentes'].append({'fuente': fuente, 'omitida': 'sin datos'})
+            continue
+        referencia, t_ref = ejecutar_motor(MOTORES['referencia'], df, repeticiones, verbose)
+        resultado = {'fuente': fuente, 'filas': len(df), 'tickers': int(df['ticker'].nunique()),
+                     'referencia_s': t_ref, 'motores': []}
+        for nombre, funcion in funciones.items():
+            try:
+                candidato, t_cand = ejecutar_motor(funcion, df, repeticiones, verbose)
+            except Exception as e:
+                resultado['motores'].append({'motor': nombre, 'error': f"{type(e).__name__}: {e}", 'equivalente': False})
+                continue
+            comparacion = comparar(referencia, candidato)
+            comparacion.update({'motor': nombre, 'tiempo_s': t_cand,
+                                'aceleracion': t_ref / t_cand if t_cand > 0 else None})
+            resultado['motores'].append(comparacion)
+        reporte['fuentes'].append(resultado)
+    reporte['equivalente'] = all(m['equivalente'] for f in reporte['fuentes'] for m in f.get('motores', []))
+    return reporte
+
+
+def _formato_error(valor):
+    return '-' if valor is None else f"{valor:.2e}"
+
+
+def imprimir_reporte(reporte, todas=False):
+    for fuente in reporte['fuentes']:
+        if fuente.get('omitida'):
+            print(f"\n   - Fuente {fuente['fuente']} omitida ({fuente['omitida']})")
+            continue
+        print(f"\n🔬 EQUIVALENCIA [{fuente['fuente']}]: {fuente['tickers']} tickers, {fuente['filas']:,} filas "
+              f"(referencia {fuente['referencia_s']:.2f} s)")
+        for motor in fuente['motores']:
+            if motor.get('error'):
+                print(f"   ✗ {motor['motor']}: {motor['error']}")
+                continue
+            estado = '✓' if motor['equivalente'] else '✗'
+            aceleracion = '-' if motor['aceleracion'] is None else f"{motor['aceleracion']:.2f}x"
+            print(f"   {estado} {motor['motor']}: {motor['tiempo_s']:.2f} s, aceleración {aceleracion}")
+            if motor['filas_faltantes'] or motor['filas_sobrantes']:
+                print(f"      filas faltantes {motor['filas_faltantes']:,}, sobrantes {motor['filas_sobrantes']:,}")
+            if motor['columnas_ausentes']:
+                print(f"      columnas ausentes: {', '.join(motor['columnas_ausentes'])}")
+            if motor['columnas_extra']:
+                print(f"      columnas extra (no se comparan): {', '.join(motor['columnas_extra'])}")
+            columnas = motor['columnas'] if todas else [c for c in motor['columnas'] if not c['equivalente']]
+            if not columnas:
+                peor = max(motor['columnas'], key=lambda c: c['max_error_rel'] or 0, default=None)
+                if peor is not None and peor['max_error_rel']:
+                    print(f"      {len(motor['columnas'])} columnas dentro de tolerancia "
+                          f"(mayor error relativo: {peor['columna']} {_formato_error(peor['max_error_rel'])})")
+                elif peor is not None:
+                    print(f"      {len(motor['columnas'])} columnas idénticas a la referencia")
+                continue
+            print(f"      {'columna':<22} {'comparados':>11} {'fuera tol':>10} {'NaN desal.':>11} "
+                  f"{'máx abs':>10} {'máx rel':>10}")
+            for c in columnas:
+                desalineados = c['valor_en_calentamiento'] + c['nan_de_mas']
+                marca = '' if c['equivalente'] else '  ✗'
+                print(f"      {c['columna']:<22} {c['comparados']:>11,} {c['fuera_tolerancia']:>10,} {desalineados:>11,} "
+                      f"{_formato_error(c['max_error_abs']):>10} {_formato_error(c['max_error_rel']):>10}{marca}")
+
+
+def guardar_reporte(reporte, directorio=DIRECTORIO_EQUIVALENCIA):
+    os.makedirs(directorio, exist_ok=True)
+    path = os.path.join(directorio, f"equivalencia_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def agregar_argumentos(parser):
+    """Opciones de la verificación (`condor.py bench equivalencia` declara las mismas)."""
+    parser.add_argument('--motores', nargs='+', default=['paralelo'],
+                        help=f"Motores a comparar con la referencia ({', '.join(MOTORES)} o 'modulo:funcion')")
+    parser.add_argument('--fuentes', nargs='+', choices=FUENTES, default=list(FUENTES),
+                        help="Datos de entrada: mercado sintético y/o acciones_master.csv grabado")
+    parser.add_argument('--tickers', type=int, default=30,
+                        help=f"Tickers del universo sintético ({RANGO_TICKERS[0]}-{RANGO_TICKERS[1]}) "
+                             "y máximo de tickers grabados")
+    parser.add_argument('--anios', type=int, default=2, help="Años de historia sintética")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla del generador")
+    parser.add_argument('--archivo', default=None, help="CSV grabado (por defecto ARCHIVO_ACCIONES_MASTER)")
+    parser.add_argument('--repeticiones', type=int, default=1, help="Corridas por motor (se usa el mejor tiempo)")
+    parser.add_argument('--todas', action='store_true', help="Lista todas las columnas, no solo las que difieren")
+    parser.add_argument('--verbose', action='store_true', help="Muestra la salida de los motores")
+    return parser
+
+
+def main(args=None):
+    if args is None:
+        args = agregar_argumentos(argparse.ArgumentParser(
+            description="Equivalencia numérica de motores de indicadores contra pandas_ta")).parse_args()
+    desconocidas = set(args.fuentes or ()) - set(FUENTES)
+    if desconocidas:
+        print(f"✗ Fuentes desconocidas: {', '.join(sorted(desconocidas))} (opciones: {', '.join(FUENTES)})")
+        return 2
+    try:
+        reporte = verificar(args.motores, args.fuentes or FUENTES, args.tickers, args.anios, args.semilla,
+                            args.archivo, args.repeticiones, args.verbose)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 2
+    imprimir_reporte(reporte, todas=args.todas)
+    print(f"\n✓ Reporte guardado en {guardar_reporte(reporte)}")
+    if reporte['equivalente']:
+        print("✓ Todos los motores son equivalentes a la referencia")
+        return 0
+    print("✗ Hay motores que no reproducen la referencia")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
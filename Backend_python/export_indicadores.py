@@ -17,6 +17,10 @@ except Exception as exc:
     raise RuntimeError("No se pudo importar config.py desde la raíz del proyecto.") from exc
 
 from Backend_python.db import init_schema, upsert_indicator
+from Backend_python.instrumentacion import tramo
+from Backend_python.metricas import FILAS_ESCRITAS
+
+TAMANO_LOTE = 1000  # Filas por lote medido en la traza
 
 
 COLUMN_MAP = {
@@ -60,24 +64,28 @@ def ejecutar_export_indicadores(path_csv: str) -> None:
         missing = required - set(df.columns)
         raise ValueError(f"Faltan columnas requeridas: {missing}")
 
-    # Iterar filas y mapear indicadores
+    # Iterar filas por lotes y mapear indicadores
     registros = 0
-    for _, row in df.iterrows():
-        payload = {
-            "ticker": str(row["ticker"]).strip(),
-            "trade_date": pd.to_datetime(row["date"], dayfirst=True).date(),
-        }
-        for csv_col, db_col in COLUMN_MAP.items():
-            value = row.get(csv_col)
-            if pd.isna(value):
-                payload[db_col] = None
-            else:
-                try:
-                    payload[db_col] = float(value)
-                except Exception:
-                    payload[db_col] = None
-        upsert_indicator(payload)
-        registros += 1
+    for inicio in range(0, len(df), TAMANO_LOTE):
+        lote = df.iloc[inicio:inicio + TAMANO_LOTE]
+        with tramo("upsert indicators", categoria='db', filas_entrada=len(lote)):
+            for _, row in lote.iterrows():
+                payload = {
+                    "ticker": str(row["ticker"]).strip(),
+                    "trade_date": pd.to_datetime(row["date"], dayfirst=True).date(),
+                }
+                for csv_col, db_col in COLUMN_MAP.items():
+                    value = row.get(csv_col)
+                    if pd.isna(value):
+                        payload[db_col] = None
+                    else:
+                        try:
+                            payload[db_col] = float(value)
+                        except Exception:
+                            payload[db_col] = None
+                upsert_indicator(payload)
+                registros += 1
+        FILAS_ESCRITAS.incrementar("mysql_indicators", valor=len(lote))
     print(f"Exportación completada. Registros procesados: {registros}")
 
 
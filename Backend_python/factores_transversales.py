@@ -0,0 +1,320 @@
+"""
+Factores transversales sobre un panel (fecha × ticker).
+
+El resto del proyecto trabaja serie por serie (un ticker a la vez). Este módulo pivotea una vez los
+indicadores de la base técnica a matrices densas (fecha × ticker) y calcula, fecha por fecha y con
+NumPy vectorizado sobre el eje de tickers:
+
+- rango percentil en el universo (0 = menor, 1 = mayor; empates con rango promedio);
+- z-score en el universo;
+- valor neutralizado por sector (menos la media de su INDUSTRIA ese día) y z-score dentro del sector;
+- cubeta por cuantil (1..CUANTILES_FACTORES).
+
+Cada factor es una señal (columna de la base o derivada: momentum, distancia a una media) con una
+de esas transformaciones. El resultado es un cubo float32 (fecha × ticker × factor) guardado en `.npz`.
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import os
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+from Backend_python.base_tecnica import cargar_base_tecnica
+
+ARCHIVO_TECNICO = config.ARCHIVO_TECNICO
+ARCHIVO_SALIDA = config.ARCHIVO_FACTORES
+CUANTILES = config.CUANTILES_FACTORES
+MINIMO_TICKERS = config.MINIMO_TICKERS_FACTOR
+MINIMO_TICKERS_SECTOR = config.MINIMO_TICKERS_SECTOR
+SIN_SECTOR = 'Sin sector'
+
+
+# ---------------------------------------------------------------------------
+# Panel
+# ---------------------------------------------------------------------------
+
+class PanelTransversal:
+    """Columnas de la base técnica como matrices densas (fecha × ticker), construidas una vez por columna."""
+
+    def __init__(self, base, sectores=None):
+        self.base = base
+        dias, self._filas = np.unique(base.dias, return_inverse=True)
+        self.fechas = dias.astype('datetime64[D]')
+        self.tickers = base.tickers
+        self._columnas_base = base.codigos()
+        sectores = sectores or {}
+        self.sectores = np.array([sectores.get(t, SIN_SECTOR) for t in self.tickers], dtype=object)
+        self.nombres_grupo, self.grupos = np.unique(self.sectores.astype(str), return_inverse=True)
+        self._matrices = {}
+
+    @property
+    def forma(self):
+        return len(self.fechas), len(self.tickers)
+
+    def matriz(self, campo):
+        """Matriz float64 (fecha × ticker) de `campo`; NaN donde el ticker no tiene barra."""
+        if campo not in self._matrices:
+            matriz = np.full(self.forma, np.nan)
+            matriz[self._filas, self._columnas_base] = self.base.columna(campo)
+            self._matrices[campo] = matriz
+        return self._matrices[campo]
+
+
+def cargar_sectores(path=config.CSV_ACCIONES):
+    """{ticker: INDUSTRIA} desde la lista de acciones (vacío si no existe o no tiene la columna)."""
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path)
+    if 'INDUSTRIA' not in df.columns:
+        return {}
+    col = 'NEMOTECNICO' if 'NEMOTECNICO' in df.columns else df.columns[0]
+    df = df.dropna(subset=[col, 'INDUSTRIA'])
+    return dict(zip(df[col].astype(str).str.strip(), df['INDUSTRIA'].astype(str).str.strip()))
+
+
+def cargar_panel(path=ARCHIVO_TECNICO, columnas=None, sectores=None):
+    """Panel con las `columnas` de la base técnica (por defecto las que usan las señales)."""
+    columnas = columnas or sorted({c for _, requeridas in SENALES.values() for c in requeridas})
+    return PanelTransversal(cargar_base_tecnica(path, columnas),
+                            cargar_sectores() if sectores is None else sectores)
+
+
+# ---------------------------------------------------------------------------
+# Señales (fecha × ticker)
+# ---------------------------------------------------------------------------
+
+def _columna(nombre):
+    return (lambda panel: panel.matriz(nombre)), (nombre,)
+
+
+def _momentum(sesiones):
+    """Variación del cierre en `sesiones` fechas del panel."""
+    def calcular(panel):
+        cierre = panel.matriz('close')
+        resultado = np.full_like(cierre, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            resultado[sesiones:] = cierre[sesiones:] / cierre[:-sesiones] - 1
+        return resultado
+    return calcular, ('close',)
+
+
+def _distancia(media):
+    """Distancia relativa del cierre a la media móvil `media`."""
+    def calcular(panel):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return panel.matriz('close') / panel.matriz(media) - 1
+    return calcular, ('close', media)
+
+
+# Señal: (función del panel, columnas de la base que usa)
+SENALES = {
+    'rsi_14': _columna('rsi_14'),
+    'adx_14': _columna('adx_14'),
+    'atrr_14': _columna('atrr_14'),
+    'momentum_20': _momentum(20),
+    'momentum_60': _momentum(60),
+    'distancia_sma50': _distancia('sma_50'),
+    'distancia_sma200': _distancia('sma_200'),
+}
+
+
+# ---------------------------------------------------------------------------
+# Transformaciones transversales (a lo largo del eje de tickers)
+# ---------------------------------------------------------------------------
+
+def rango_percentil(x, minimo=MINIMO_TICKERS):
+    """Rango de cada valor en su fecha escalado a [0, 1]; los empates reciben el rango promedio."""
+    tickers = x.shape[1]
+    orden = np.argsort(x, axis=1, kind='stable')  # los NaN quedan al final de cada fila
+    ordenados = np.take_along_axis(x, orden, axis=1)
+    posiciones = np.broadcast_to(np.arange(tickers), x.shape)
+    inicio = np.ones(x.shape, dtype=bool)
+    inicio[:, 1:] = ordenados[:, 1:] != ordenados[:, :-1]
+    fin = np.ones(x.shape, dtype=bool)
+    fin[:, :-1] = inicio[:, 1:]
+    primero = np.maximum.accumulate(np.where(inicio, posiciones, 0), axis=1)
+    ultimo = np.minimum.accumulate(np.where(fin, posiciones, tickers - 1)[:, ::-1], axis=1)[:, ::-1]
+    rangos = np.empty_like(x)
+    np.put_along_axis(rangos, orden, (primero + ultimo) / 2, axis=1)
+
+    validos = ~np.isnan(x)
+    n = validos.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado = rangos / (n - 1)
+    resultado[~validos | (n < max(minimo, 2))] = np.nan
+    return resultado
+
+
+def zscore(x, minimo=MINIMO_TICKERS):
+    """(x - media) / desviación de cada fecha."""
+    validos = ~np.isnan(x)
+    n = validos.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.where(validos, x, 0.0).sum(axis=1, keepdims=True) / n
+        desvio = np.where(validos, x - media, 0.0)
+        desviacion = np.sqrt((desvio * desvio).sum(axis=1, keepdims=True) / (n - 1))
+        resultado = (x - media) / desviacion
+    resultado[(n < max(minimo, 2)).ravel()] = np.nan
+    resultado[~np.isfinite(resultado)] = np.nan
+    return resultado
+
+
+def _estadisticos_grupo(x, grupos, n_grupos):
+    """Conteo, media y desviación por (fecha, grupo) con productos matriciales contra el one-hot de grupos."""
+    pertenencia = np.zeros((x.shape[1], n_grupos))
+    pertenencia[np.arange(x.shape[1]), grupos] = 1.0
+    validos = ~np.isnan(x)
+    n = validos.astype(np.float64) @ pertenencia
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = (np.where(validos, x, 0.0) @ pertenencia) / n
+        desvio = np.where(validos, x - media[:, grupos], 0.0)
+        desviacion = np.sqrt(((desvio * desvio) @ pertenencia) / (n - 1))
+    return n, media, desviacion
+
+
+def neutralizar_grupo(x, grupos, n_grupos, minimo=MINIMO_TICKERS_SECTOR):
+    """x menos la media de su grupo (sector) en cada fecha."""
+    n, media, _ = _estadisticos_grupo(x, grupos, n_grupos)
+    resultado = x - media[:, grupos]
+    resultado[(n < minimo)[:, grupos]] = np.nan
+    return resultado
+
+
+def zscore_grupo(x, grupos, n_grupos, minimo=MINIMO_TICKERS_SECTOR):
+    """z-score de x dentro de su grupo (sector) en cada fecha."""
+    n, media, desviacion = _estadisticos_grupo(x, grupos, n_grupos)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado = (x - media[:, grupos]) / desviacion[:, grupos]
+    resultado[(n < max(minimo, 2))[:, grupos]] = np.nan
+    resultado[~np.isfinite(resultado)] = np.nan
+    return resultado
+
+
+def cuantiles(x, n_cuantiles=CUANTILES, minimo=MINIMO_TICKERS):
+    """Cubeta 1..n_cuantiles según el rango percentil de cada fecha (NaN sin dato)."""
+    percentil = rango_percentil(x, minimo)
+    return np.minimum(np.floor(percentil * n_cuantiles), n_cuantiles - 1) + 1
+
+
+TRANSFORMACIONES = {
+    'rango': lambda x, panel: rango_percentil(x),
+    'z': lambda x, panel: zscore(x),
+    'neutral': lambda x, panel: neutralizar_grupo(x, panel.grupos, len(panel.nombres_grupo)),
+    'z_sector': lambda x, panel: zscore_grupo(x, panel.grupos, len(panel.nombres_grupo)),
+    'cuantil': lambda x, panel: cuantiles(x),
+}
+
+# Factor: (señal, transformación)
+FACTORES = {
+    'rsi_14_rango': ('rsi_14', 'rango'),
+    'rsi_14_z': ('rsi_14', 'z'),
+    'momentum_20_z': ('momentum_20', 'z'),
+    'momentum_20_z_sector': ('momentum_20', 'z_sector'),
+    'momentum_20_cuantil': ('momentum_20', 'cuantil'),
+    'momentum_60_rango': ('momentum_60', 'rango'),
+    'momentum_60_neutral': ('momentum_60', 'neutral'),
+    'distancia_sma50_rango': ('distancia_sma50', 'rango'),
+    'distancia_sma50_neutral': ('distancia_sma50', 'neutral'),
+    'distancia_sma200_z_sector': ('distancia_sma200', 'z_sector'),
+    'atrr_14_rango': ('atrr_14', 'rango'),
+    'adx_14_cuantil': ('adx_14', 'cuantil'),
+}
+
+
+def calcular_factores(panel, nombres=None):
+    """Cubo float32 (fecha × ticker × factor) con los factores `nombres` (None = todos los de FACTORES)."""
+    nombres = list(FACTORES) if nombres is None else list(nombres)
+    desconocidos = [n for n in nombres if n not in FACTORES]
+    if desconocidos:
+        raise ValueError(f"Factores desconocidos: {', '.join(desconocidos)}")
+    cubo = np.empty((*panel.forma, len(nombres)), dtype=np.float32)
+    senales = {}
+    for k, nombre in enumerate(nombres):
+        senal, transformacion = FACTORES[nombre]
+        if senal not in senales:
+            senales[senal] = SENALES[senal][0](panel)
+        cubo[:, :, k] = TRANSFORMACIONES[transformacion](senales[senal], panel)
+    return nombres, cubo
+
+
+# ---------------------------------------------------------------------------
+# Persistencia
+# ---------------------------------------------------------------------------
+
+def guardar_factores(path, panel, nombres, cubo):
+    np.savez(
+        path,
+        factores=cubo,
+        fechas=np.asarray(pd.DatetimeIndex(panel.fechas).strftime('%Y-%m-%d'), dtype=str),
+        tickers=np.asarray(panel.tickers, dtype=str),
+        sectores=np.asarray(panel.sectores, dtype=str),
+        nombres=np.asarray(nombres, dtype=str),
+    )
+
+
+def cargar_factores(path=ARCHIVO_SALIDA):
+    """Carga el cubo guardado como diccionario de arreglos (factores, fechas, tickers, sectores, nombres)."""
+    with np.load(path) as datos:
+        return {clave: datos[clave] for clave in datos.files}
+
+
+def resumen_ultima_fecha(fechas, tickers, sectores, nombres, cubo):
+    """Tabla (ticker, sector, un factor por columna) con la última fecha del cubo."""
+    df = pd.DataFrame(cubo[-1], columns=list(nombres))
+    df.insert(0, 'sector', sectores)
+    df.insert(0, 'ticker', tickers)
+    return df.dropna(subset=list(nombres), how='all').assign(fecha=pd.DatetimeIndex(fechas)[-1].strftime('%Y-%m-%d'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Factores transversales (rangos, z-scores, sector) por fecha")
+    parser.add_argument('--factores', nargs='+', default=None, help=f"Factores a calcular (por defecto: {', '.join(FACTORES)})")
+    parser.add_argument('--archivo', default=ARCHIVO_TECNICO, help="Base técnica de entrada")
+    parser.add_argument('--salida', default=ARCHIVO_SALIDA, help="Cubo .npz de salida")
+    args = parser.parse_args()
+
+    print("--- INICIANDO FACTORES TRANSVERSALES ---")
+    nombres = args.factores or list(FACTORES)
+    desconocidos = [n for n in nombres if n not in FACTORES]
+    if desconocidos:
+        print(f"✗ Factores desconocidos: {', '.join(desconocidos)} (opciones: {', '.join(FACTORES)})")
+        return 2
+    if not os.path.exists(args.archivo):
+        print(f"!! ERROR: El archivo '{args.archivo}' no se encontró.")
+        return 1
+    try:
+        inicio = time.perf_counter()
+        print("-> Cargando la base técnica como panel (fecha × ticker)...")
+        columnas = sorted({c for n in nombres for c in SENALES[FACTORES[n][0]][1]})
+        panel = cargar_panel(args.archivo, columnas)
+        carga = time.perf_counter() - inicio
+        print(f"   - {panel.forma[0]} fechas, {panel.forma[1]} tickers, {len(panel.nombres_grupo)} sectores ({carga:.1f} s)")
+
+        inicio = time.perf_counter()
+        nombres, cubo = calcular_factores(panel, nombres)
+        print(f"-> {len(nombres)} factores calculados en {time.perf_counter() - inicio:.2f} s")
+        guardar_factores(args.salida, panel, nombres, cubo)
+        print(f"-> Cubo guardado en '{args.salida}' ({cubo.nbytes / 1e6:.1f} MB)")
+
+        df_resumen = resumen_ultima_fecha(panel.fechas, panel.tickers, panel.sectores, nombres, cubo)
+        if not df_resumen.empty:
+            orden = nombres[0]
+            print(f"\n--- ÚLTIMA FECHA ({df_resumen['fecha'].iloc[0]}), ordenado por {orden} ---")
+            print(df_resumen.sort_values(orden, ascending=False).head(10)[['ticker', 'sector', *nombres[:4]]]
+                  .round(3).to_string(index=False))
+        print("\n--- ¡PROCESO COMPLETADO CON ÉXITO! ---")
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
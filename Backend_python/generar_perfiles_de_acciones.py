@@ -1,7 +1,12 @@
 import pandas as pd
+import numpy as np
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from scipy.optimize import linear_sum_assignment
 import os
+import json
+import pickle
+from datetime import datetime
 
 # Cargar config desde la raíz del proyecto
 import sys
@@ -9,25 +14,111 @@ ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if ROOT not in sys.path:
     sys.path.append(ROOT)
 import config
+from Backend_python.base_tecnica import base_desde_marco, cargar_base_tecnica
+from Backend_python.instrumentacion import tramo
 
 ARCHIVO_DATABASE_TECNICA = config.ARCHIVO_TECNICO
 ARCHIVO_ACCIONES_ORIGINAL = config.CSV_ACCIONES
 ARCHIVO_ACCIONES_SALIDA = config.ARCHIVO_PERFILES
+ARCHIVO_REGIMENES = config.ARCHIVO_REGIMENES
+MODELO_REGIMENES = config.MODELO_REGIMENES
+MODELO_PERFILES = config.MODELO_PERFILES
 NUMERO_DE_CLUSTERS = config.NUMERO_DE_CLUSTERS
+UMBRAL_DERIVA_PERFILES = config.UMBRAL_DERIVA_PERFILES
+FRECUENCIA_REGIMENES = config.FRECUENCIA_REGIMENES
 
-def perfilar_acciones(df_tecnica, df_acciones):
-    print("-> Iniciando análisis de clustering para definir perfiles...")
-    
+# Usar solo las características que están disponibles
+FEATURES = ['adx_14', 'rsi_14', 'atr_normalized', 'dist_sma50', 'volumen_normalizado_20']
+# Columnas de la base técnica de las que salen las características
+COLUMNAS_TECNICAS = ['close', 'volume', 'sma_50', 'atrr_14', 'adx_14', 'rsi_14']
+
+# Versión del formato del artefacto del modelo; cambiarla invalida los modelos guardados
+FORMATO_MODELO_PERFILES = 1
+
+def calcular_caracteristicas(df_tecnica):
     # Calcular características adicionales usando sma_50 en lugar de sma_200
     df_tecnica['atr_normalized'] = df_tecnica['atrr_14'] / df_tecnica['close']
     df_tecnica['dist_sma50'] = (df_tecnica['close'] - df_tecnica['sma_50']) / df_tecnica['sma_50']
-    df_tecnica['volumen_normalizado_20'] = df_tecnica['volume'] / df_tecnica['volume'].rolling(20).mean()
+    # Media de volumen por ticker: la ventana no debe cruzar al ticker anterior
+    volumen_medio = df_tecnica.groupby('ticker', observed=True)['volume'].transform(lambda s: s.rolling(20).mean())
+    df_tecnica['volumen_normalizado_20'] = df_tecnica['volume'] / volumen_medio
+    return df_tecnica
+
+def mapear_perfiles(df_centroids):
+    """Asigna un nombre de perfil a cada cluster según sus centroides (en escala original)."""
+    tendency_idx = df_centroids['adx_14'].idxmax()
+    range_idx = df_centroids['atr_normalized'].idxmin()
+    profile_map = {
+        tendency_idx: "Cohete de Tendencia",
+        range_idx: "Tortuga de Valor (Rango)"
+    }
+    # Asignar el perfil restante
+    for transition_idx in set(df_centroids.index) - {tendency_idx, range_idx}:
+        profile_map[transition_idx] = "Indeciso (En Transición)"
+    return profile_map
+
+def entrenar_modelo_perfiles(df_profiles, version_anterior=0):
+    """Ajusta StandardScaler + KMeans y empaqueta todo lo necesario para asignar sin reentrenar."""
+    scaler = StandardScaler()
+    scaled_profiles = scaler.fit_transform(df_profiles[FEATURES])
+    kmeans = KMeans(n_clusters=NUMERO_DE_CLUSTERS, n_init=10, random_state=42)
+    clusters = kmeans.fit_predict(scaled_profiles)
+    
+    df_centroids = pd.DataFrame(scaler.inverse_transform(kmeans.cluster_centers_), columns=FEATURES)
+    profile_map = mapear_perfiles(df_centroids)
     
-    # Usar solo las características que están disponibles
-    features = ['adx_14', 'rsi_14', 'atr_normalized', 'dist_sma50', 'volumen_normalizado_20']
+    distancias = np.linalg.norm(scaled_profiles - kmeans.cluster_centers_[clusters], axis=1)
+    return {
+        'formato': FORMATO_MODELO_PERFILES,
+        'version': version_anterior + 1,
+        'fecha_entrenamiento': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'features': FEATURES,
+        'n_clusters': NUMERO_DE_CLUSTERS,
+        'tickers_entrenamiento': len(df_profiles),
+        'scaler_media': scaler.mean_.tolist(),
+        'scaler_escala': scaler.scale_.tolist(),
+        'centroides': kmeans.cluster_centers_.tolist(),
+        'profile_map': {str(k): v for k, v in profile_map.items()},
+        'distancia_base': float(distancias.mean()),
+    }
+
+def cargar_modelo_perfiles(path=MODELO_PERFILES):
+    """Carga el modelo persistido; retorna None si no existe o no es compatible con la configuración actual."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        modelo = json.load(f)
+    if (modelo.get('formato') != FORMATO_MODELO_PERFILES or modelo.get('features') != FEATURES
+            or modelo.get('n_clusters') != NUMERO_DE_CLUSTERS):
+        print("   - Modelo guardado incompatible con la configuración actual; se reentrenará")
+        return None
+    return modelo
+
+def guardar_modelo_perfiles(modelo, path=MODELO_PERFILES):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(modelo, f, ensure_ascii=False, indent=2)
+
+def asignar_por_centroide(df_profiles, modelo):
+    """Asigna cada ticker al centroide más cercano. Retorna (clusters, distancias)."""
+    valores = df_profiles[modelo['features']].to_numpy(dtype=float)
+    escalados = (valores - np.asarray(modelo['scaler_media'])) / np.asarray(modelo['scaler_escala'])
+    distancias = np.linalg.norm(escalados[:, None, :] - np.asarray(modelo['centroides'])[None, :, :], axis=2)
+    clusters = distancias.argmin(axis=1)
+    return clusters, distancias[np.arange(len(clusters)), clusters]
+
+def medir_deriva(distancias, modelo):
+    """Distancia media al centroide relativa a la del entrenamiento (1.0 = sin deriva)."""
+    if modelo['distancia_base'] == 0:
+        return float('inf') if distancias.mean() > 0 else 1.0
+    return float(distancias.mean() / modelo['distancia_base'])
+
+def perfilar_acciones(df_tecnica, df_acciones, reentrenar=False, path_modelo=MODELO_PERFILES):
+    print("-> Iniciando análisis de clustering para definir perfiles...")
+    
+    df_tecnica = calcular_caracteristicas(df_tecnica)
     
     # Filtrar solo las filas donde todas las características están disponibles
-    df_profiles = df_tecnica.groupby('ticker')[features].mean().dropna()
+    df_profiles = df_tecnica.groupby('ticker', observed=True)[FEATURES].mean().dropna()
     
     if len(df_profiles) == 0:
         print("!! ERROR: No hay suficientes datos para realizar clustering")
@@ -35,43 +126,202 @@ def perfilar_acciones(df_tecnica, df_acciones):
     
     print(f"   - Perfiles calculados para {len(df_profiles)} tickers")
     
-    scaler = StandardScaler()
-    scaled_profiles = scaler.fit_transform(df_profiles)
-    kmeans = KMeans(n_clusters=NUMERO_DE_CLUSTERS, n_init=10, random_state=42)
-    df_profiles['cluster'] = kmeans.fit_predict(scaled_profiles)
+    modelo = cargar_modelo_perfiles(path_modelo)
+    version_anterior = modelo['version'] if modelo is not None else 0
+    if reentrenar:
+        modelo = None
+    if modelo is not None:
+        clusters, distancias = asignar_por_centroide(df_profiles, modelo)
+        deriva = medir_deriva(distancias, modelo)
+        print(f"   - Modelo v{modelo['version']} cargado, deriva: {deriva:.2f} (umbral {UMBRAL_DERIVA_PERFILES})")
+        if deriva > UMBRAL_DERIVA_PERFILES:
+            print("   - Deriva sobre el umbral; se reentrenará el modelo")
+            modelo = None
     
-    df_centroids = pd.DataFrame(scaler.inverse_transform(kmeans.cluster_centers_), columns=features)
-    tendency_idx = df_centroids['adx_14'].idxmax()
-    range_idx = df_centroids['atr_normalized'].idxmin()
-    profile_map = {
-        tendency_idx: "Cohete de Tendencia",
-        range_idx: "Tortuga de Valor (Rango)"
-    }
-    # Asignar el perfil restante
-    transition_idx = list(set(range(NUMERO_DE_CLUSTERS)) - {tendency_idx, range_idx})[0]
-    profile_map[transition_idx] = "Indeciso (En Transición)"
+    if modelo is None:
+        if len(df_profiles) < NUMERO_DE_CLUSTERS:
+            print("!! ERROR: No hay suficientes tickers para entrenar el modelo de perfiles")
+            return None
+        modelo = entrenar_modelo_perfiles(df_profiles, version_anterior)
+        guardar_modelo_perfiles(modelo, path_modelo)
+        print(f"   - Modelo v{modelo['version']} entrenado y guardado en {path_modelo}")
+        clusters, _ = asignar_por_centroide(df_profiles, modelo)
     
-    df_asignacion = df_profiles.reset_index()[['ticker', 'cluster']]
+    profile_map = {int(k): v for k, v in modelo['profile_map'].items()}
+    df_asignacion = df_profiles.reset_index()[['ticker']]
+    df_asignacion['cluster'] = clusters
     df_asignacion['personalidad'] = df_asignacion['cluster'].map(profile_map)
     
     df_acciones.rename(columns={'NEMOTECNICO': 'ticker'}, inplace=True)
     df_acciones_actualizado = pd.merge(df_acciones, df_asignacion, on='ticker', how='left')
     return df_acciones_actualizado
 
-def main():
+def cargar_estado_regimenes(path=MODELO_REGIMENES):
+    """Carga el estado incremental (scaler, MiniBatchKMeans y centroides estables) si existe."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def guardar_estado_regimenes(estado, path=MODELO_REGIMENES):
+    with open(path, 'wb') as f:
+        pickle.dump(estado, f)
+
+def emparejar_centroides(centroides_previos, centroides_nuevos):
+    """
+    Devuelve la permutación que lleva cada cluster interno del modelo a su etiqueta estable,
+    emparejando centroides por distancia mínima (algoritmo húngaro).
+    """
+    costos = np.linalg.norm(centroides_previos[:, None, :] - centroides_nuevos[None, :, :], axis=2)
+    filas, columnas = linear_sum_assignment(costos)
+    permutacion = np.empty(len(columnas), dtype=int)
+    permutacion[columnas] = filas
+    return permutacion
+
+def perfilar_regimenes(df_tecnica, estado=None, frecuencia=FRECUENCIA_REGIMENES):
+    """
+    Calcula perfiles por ticker y ventana (p. ej. mensual) y actualiza los centroides de forma
+    incremental con `partial_fit`. Solo las ventanas cerradas que el estado aún no ha visto
+    entrenan el modelo; la ventana en curso solo se asigna, así que re-ejecutar a diario es barato.
+    La escala se ajusta una vez, con las ventanas cerradas de la primera corrida, y el nombre de
+    cada cluster estable se fija la primera vez que hay centroides: ambos quedan en el estado.
+
+    Retorna (df_regimenes, estado), donde df_regimenes contiene las ventanas procesadas en esta
+    ejecución (ticker × periodo).
+    """
+    print("-> Iniciando perfilamiento por regímenes (ventanas móviles)...")
+    
+    df_tecnica = calcular_caracteristicas(df_tecnica)
+    df_tecnica['periodo'] = pd.to_datetime(df_tecnica['date']).dt.to_period(frecuencia)
+    df_ventanas = df_tecnica.groupby(['periodo', 'ticker'], observed=True)[FEATURES].mean().dropna()
+    
+    if len(df_ventanas) == 0:
+        print("!! ERROR: No hay suficientes datos para calcular regímenes")
+        return None, estado
+    
+    if estado is None:
+        estado = {
+            'version': 1,
+            'frecuencia': frecuencia,
+            'scaler': StandardScaler(),
+            'kmeans': MiniBatchKMeans(n_clusters=NUMERO_DE_CLUSTERS, random_state=42, n_init=3),
+            'centroides_estables': None,
+            'perfiles': None,
+            'ultimo_periodo_ajustado': None,
+        }
+    elif estado['frecuencia'] != frecuencia:
+        print(f"!! ERROR: El modelo guardado usa frecuencia '{estado['frecuencia']}', no '{frecuencia}'")
+        return None, estado
+    
+    periodos = df_ventanas.index.get_level_values('periodo').unique().sort_values()
+    periodo_abierto = periodos[-1]
+    ultimo = estado['ultimo_periodo_ajustado']
+    pendientes = [p for p in periodos if ultimo is None or p > ultimo]
+    print(f"   - Ventanas pendientes: {len(pendientes)} de {len(periodos)}")
+    
+    scaler = estado['scaler']
+    kmeans = estado['kmeans']
+    cerradas = [p for p in pendientes if p != periodo_abierto]
+    if not hasattr(scaler, 'mean_') and cerradas:
+        # La escala queda fija desde aquí: moverla desplazaría los datos bajo centroides ya ajustados
+        en_cerradas = df_ventanas.index.get_level_values('periodo').isin(cerradas)
+        scaler.fit(df_ventanas.loc[en_cerradas, FEATURES].to_numpy())
+    resultados = []
+    for periodo in pendientes:
+        df_periodo = df_ventanas.xs(periodo, level='periodo')
+        valores = df_periodo[FEATURES].to_numpy()
+        
+        # Solo las ventanas cerradas actualizan el modelo; la abierta se re-asigna en cada corrida
+        if periodo != periodo_abierto and len(df_periodo) >= NUMERO_DE_CLUSTERS:
+            kmeans.partial_fit(scaler.transform(valores))
+            if estado['centroides_estables'] is None:
+                permutacion = np.arange(NUMERO_DE_CLUSTERS)
+            else:
+                permutacion = emparejar_centroides(estado['centroides_estables'], kmeans.cluster_centers_)
+            centroides_estables = np.empty_like(kmeans.cluster_centers_)
+            centroides_estables[permutacion] = kmeans.cluster_centers_
+            estado['centroides_estables'] = centroides_estables
+            estado['permutacion'] = permutacion
+            estado['ultimo_periodo_ajustado'] = periodo
+        
+        if estado['centroides_estables'] is None:
+            continue
+        
+        if estado.get('perfiles') is None:
+            # Cada etiqueta estable conserva su nombre en los periodos siguientes
+            df_centroids = pd.DataFrame(scaler.inverse_transform(estado['centroides_estables']), columns=FEATURES)
+            estado['perfiles'] = mapear_perfiles(df_centroids)
+        
+        df_asignacion = df_periodo.reset_index()
+        df_asignacion.insert(1, 'periodo', str(periodo))
+        df_asignacion['cluster'] = estado['permutacion'][kmeans.predict(scaler.transform(valores))]
+        df_asignacion['personalidad'] = df_asignacion['cluster'].map(estado['perfiles'])
+        resultados.append(df_asignacion)
+    
+    if not resultados:
+        print("!! ERROR: No hay ventanas con suficientes tickers para ajustar el modelo")
+        return None, estado
+    
+    df_regimenes = pd.concat(resultados, ignore_index=True)
+    print(f"   - Regímenes asignados: {len(df_regimenes)} (ticker × periodo)")
+    return df_regimenes, estado
+
+def actualizar_historial_regimenes(df_nuevos, path=ARCHIVO_REGIMENES):
+    """Reemplaza en el historial los periodos recalculados y agrega los nuevos."""
+    if os.path.exists(path):
+        df_historial = pd.read_csv(path, sep=';', decimal=',')
+        df_historial = df_historial[~df_historial['periodo'].isin(df_nuevos['periodo'].unique())]
+        df_nuevos = pd.concat([df_historial, df_nuevos], ignore_index=True)
+    df_nuevos = df_nuevos.sort_values(['periodo', 'ticker'])
+    df_nuevos.to_csv(path, index=False, sep=';', decimal=',')
+    return df_nuevos
+
+def main_regimenes():
+    print("--- INICIANDO PERFILAMIENTO POR REGÍMENES ---")
+    
+    try:
+        df_tecnica = cargar_base_tecnica(ARCHIVO_DATABASE_TECNICA, COLUMNAS_TECNICAS).marco(COLUMNAS_TECNICAS)
+        estado = cargar_estado_regimenes()
+        df_regimenes, estado = perfilar_regimenes(df_tecnica, estado)
+        
+        if df_regimenes is not None:
+            df_historial = actualizar_historial_regimenes(df_regimenes)
+            guardar_estado_regimenes(estado)
+            print(f"\n--- ¡PROCESO COMPLETADO! ---")
+            print(f"   - Historial guardado: {ARCHIVO_REGIMENES} ({len(df_historial)} registros)")
+            print(f"   - Modelo incremental: {MODELO_REGIMENES}")
+        else:
+            print("!! ERROR: No se pudieron generar los regímenes")
+            
+    except Exception as e:
+        print(f"!! ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+
+def main(reentrenar=False, df_tecnico=None):
+    """`df_tecnico`: base técnica ya en memoria (modo daemon); sin ella se lee ARCHIVO_DATABASE_TECNICA."""
     print("--- INICIANDO GENERACIÓN DE PERFILES DE ACCIONES ---")
     
     try:
-        df_tecnica = pd.read_csv(ARCHIVO_DATABASE_TECNICA, sep=';', decimal=',')
-        df_acciones = pd.read_csv(ARCHIVO_ACCIONES_ORIGINAL)
+        with tramo("lectura CSV tecnico (perfiles)", categoria='lectura') as medicion:
+            if df_tecnico is not None:
+                base = base_desde_marco(df_tecnico, COLUMNAS_TECNICAS)
+            else:
+                base = cargar_base_tecnica(ARCHIVO_DATABASE_TECNICA, COLUMNAS_TECNICAS)
+            df_tecnica = base.marco(COLUMNAS_TECNICAS, fechas=False)
+            df_acciones = pd.read_csv(ARCHIVO_ACCIONES_ORIGINAL)
+            medicion['filas_salida'] = len(df_tecnica)
         
-        print(f"   - Datos técnicos cargados: {len(df_tecnica)} registros")
+        print(f"   - Datos técnicos cargados: {len(df_tecnica)} registros ({base.memoria_mb():.0f} MB en memoria)")
         print(f"   - Acciones cargadas: {len(df_acciones)} tickers")
         
-        df_final = perfilar_acciones(df_tecnica, df_acciones)
+        with tramo("perfilamiento", filas_entrada=len(df_tecnica)) as medicion:
+            df_final = perfilar_acciones(df_tecnica, df_acciones, reentrenar=reentrenar)
+            medicion['filas_salida'] = 0 if df_final is None else len(df_final)
         
         if df_final is not None:
-            df_final.to_csv(ARCHIVO_ACCIONES_SALIDA, index=False, sep=';', encoding='utf-8-sig')
+            with tramo("escritura CSV perfiles", categoria='escritura', filas_entrada=len(df_final)):
+                df_final.to_csv(ARCHIVO_ACCIONES_SALIDA, index=False, sep=';', encoding='utf-8-sig')
             print(f"\n--- ¡PROCESO COMPLETADO! ---")
             print(f"   - Archivo guardado: {ARCHIVO_ACCIONES_SALIDA}")
             print(f"   - Perfiles generados: {len(df_final)} acciones")
@@ -88,4 +338,7 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if '--regimenes' in sys.argv:
+        main_regimenes()
+    else:
+        main(reentrenar='--reentrenar' in sys.argv)
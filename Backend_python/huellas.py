@@ -0,0 +1,93 @@
+"""
+Huellas (fingerprints) de etapas del pipeline, al estilo `make`.
+
+La huella de una etapa combina el contenido de sus archivos de entrada, el código fuente de los
+módulos que ejecuta y los valores de `config.py` que la afectan. Si coincide con la de su última
+ejecución exitosa y sus salidas siguen intactas, la etapa puede omitirse.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+ARCHIVO_HUELLAS = config.ARCHIVO_HUELLAS
+TAMANO_LECTURA = 1 << 20
+
+# Cache (ruta, mtime, tamaño) -> sha256 para no releer archivos grandes dentro de una misma corrida
+_cache_hashes = {}
+_lock_cache = threading.Lock()
+
+
+def hash_archivo(path):
+    """sha256 del contenido de `path`, o None si no existe."""
+    if not os.path.exists(path):
+        return None
+    estado = os.stat(path)
+    clave = (os.path.abspath(path), estado.st_mtime_ns, estado.st_size)
+    with _lock_cache:
+        if clave in _cache_hashes:
+            return _cache_hashes[clave]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_LECTURA), b''):
+            digest.update(bloque)
+    resultado = digest.hexdigest()
+    with _lock_cache:
+        _cache_hashes[clave] = resultado
+    return resultado
+
+
+def calcular_huella(etapa):
+    """Huella de una etapa a partir de sus 'entradas', 'codigo' y claves de 'config'."""
+    contenido = {
+        'entradas': {path: hash_archivo(path) for path in etapa.get('entradas', [])},
+        'codigo': {path: hash_archivo(os.path.join(ROOT, path)) for path in etapa.get('codigo', [])},
+        'config': {clave: repr(getattr(config, clave, None)) for clave in etapa.get('config', [])},
+    }
+    serializado = json.dumps(contenido, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(serializado).hexdigest()
+
+
+def cargar_registro(path=ARCHIVO_HUELLAS):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Un registro corrupto solo obliga a recalcular todo
+        return {}
+
+
+def guardar_registro(registro, path=ARCHIVO_HUELLAS):
+    directorio = os.path.dirname(path)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    temporal = f"{path}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(registro, f, indent=2, sort_keys=True)
+    os.replace(temporal, path)
+
+
+def etapa_al_dia(etapa, huella, registro):
+    """True si la huella coincide con la última ejecución exitosa y las salidas no cambiaron desde entonces."""
+    previo = registro.get(etapa['id'])
+    if not previo or previo.get('huella') != huella:
+        return False
+    return all(hash_archivo(path) == previo.get('salidas', {}).get(path) for path in etapa.get('salidas', []))
+
+
+def registrar_exito(etapa, huella, registro, fecha):
+    registro[etapa['id']] = {
+        'huella': huella,
+        'fecha': fecha,
+        'salidas': {path: hash_archivo(path) for path in etapa.get('salidas', [])},
+    }
@@ -0,0 +1,137 @@
+"""
+Índice de vecinos: los k tickers más correlacionados (en retornos) con cada ticker del universo.
+
+La matriz de correlación nunca se materializa completa: se recorre por bloques float32 de
+TAMANO_BLOQUE × TAMANO_BLOQUE y cada fila conserva solo sus k mejores candidatos, así que la memoria
+queda acotada en O(T × N + N × k + bloque²) sin importar cuántos tickers tenga el universo.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+from Backend_python.analisis_correlacion_macro import cargar_precios_acciones, retornos_logaritmicos
+
+ARCHIVO_ACCIONES = config.ARCHIVO_ACCIONES_MASTER
+ARCHIVO_SALIDA = config.ARCHIVO_INDICE_CORRELACIONES
+TOP_K = config.TOP_K_CORRELACIONES
+TAMANO_BLOQUE = 512
+MINIMO_OBSERVACIONES = config.MINIMO_OBSERVACIONES_CORRELACION
+
+
+def estandarizar_retornos(retornos, minimo=MINIMO_OBSERVACIONES):
+    """
+    Estandariza cada columna (media 0, norma 1) sobre sus datos válidos; los faltantes quedan en 0.
+    Así el producto punto de dos columnas es su correlación (aproximada cuando hay huecos).
+    Columnas con menos de `minimo` observaciones quedan en cero y no generan vecinos.
+    """
+    valido = ~np.isnan(retornos)
+    n_validos = valido.sum(axis=0)
+    centrado = np.where(valido, retornos - np.nanmean(retornos, axis=0), 0.0)
+    norma = np.sqrt((centrado * centrado).sum(axis=0))
+    utilizable = (n_validos >= minimo) & (norma > 0)
+    escala = np.where(utilizable, 1.0 / np.where(norma > 0, norma, 1.0), 0.0)
+    return (centrado * escala).astype(np.float32), utilizable
+
+
+def _fusionar_top_k(valores, indices, candidatos, idx_candidatos, k):
+    """Combina el top-k vigente de cada fila con un bloque de candidatos y conserva los k mayores."""
+    valores = np.concatenate([valores, candidatos], axis=1)
+    indices = np.concatenate([indices, idx_candidatos], axis=1)
+    if valores.shape[1] > k:
+        sel = np.argpartition(-valores, k - 1, axis=1)[:, :k]
+        valores = np.take_along_axis(valores, sel, axis=1)
+        indices = np.take_along_axis(indices, sel, axis=1)
+    return valores, indices
+
+
+def top_k_correlacionados(z, utilizable, k=TOP_K, tamano_bloque=TAMANO_BLOQUE, absoluta=False):
+    """
+    Para cada columna de `z` (T × N, ya estandarizada) retorna (indices, correlaciones) de forma N × k
+    con sus k vecinos más correlacionados, ordenados de mayor a menor. Con `absoluta=True` se rankea
+    por |correlación| (útil para encontrar también coberturas inversas).
+    """
+    n = z.shape[1]
+    k = min(k, max(n - 1, 0))
+    vecinos = np.full((n, k), -1, dtype=np.int64)
+    correlaciones = np.full((n, k), np.nan, dtype=np.float32)
+    if k == 0:
+        return vecinos, correlaciones
+
+    for inicio_i in range(0, n, tamano_bloque):
+        fin_i = min(inicio_i + tamano_bloque, n)
+        filas = np.arange(inicio_i, fin_i)
+        mejores_val = np.empty((len(filas), 0), dtype=np.float32)
+        mejores_idx = np.empty((len(filas), 0), dtype=np.int64)
+        for inicio_j in range(0, n, tamano_bloque):
+            fin_j = min(inicio_j + tamano_bloque, n)
+            bloque = z[:, inicio_i:fin_i].T @ z[:, inicio_j:fin_j]
+            puntaje = np.abs(bloque) if absoluta else bloque.copy()
+            columnas = np.arange(inicio_j, fin_j)
+            puntaje[:, ~utilizable[inicio_j:fin_j]] = -np.inf
+            puntaje[filas[:, None] == columnas[None, :]] = -np.inf  # sin autocorrelación
+            mejores_val, mejores_idx = _fusionar_top_k(
+                mejores_val, mejores_idx, puntaje, np.broadcast_to(columnas, puntaje.shape), k
+            )
+        orden = np.argsort(-mejores_val, axis=1)
+        mejores_idx = np.take_along_axis(mejores_idx, orden, axis=1)
+        mejores_val = np.take_along_axis(mejores_val, orden, axis=1)
+        valido = np.isfinite(mejores_val) & utilizable[filas][:, None]
+        vecinos[inicio_i:fin_i] = np.where(valido, mejores_idx, -1)
+        # Se guarda la correlación con signo aunque el ranking haya sido por valor absoluto
+        signo = np.einsum('tr,trk->rk', z[:, inicio_i:fin_i], z[:, mejores_idx]) if absoluta else mejores_val
+        correlaciones[inicio_i:fin_i] = np.where(valido, signo, np.nan)
+    return vecinos, correlaciones
+
+
+def construir_indice(tickers, vecinos, correlaciones):
+    """Tabla larga (ticker, vecino, rango, correlacion) lista para persistir."""
+    tickers = np.asarray(tickers)
+    n, k = vecinos.shape
+    df = pd.DataFrame({
+        'ticker': np.repeat(tickers, k),
+        'rango': np.tile(np.arange(1, k + 1), n),
+        'indice_vecino': vecinos.reshape(-1),
+        'correlacion': correlaciones.reshape(-1),
+    })
+    df = df[df['indice_vecino'] >= 0]
+    df.insert(1, 'vecino', tickers[df['indice_vecino'].to_numpy()])
+    return df.drop(columns='indice_vecino').reset_index(drop=True)
+
+
+def cargar_indice(path=ARCHIVO_SALIDA):
+    """Carga el índice como diccionario ticker -> DataFrame (vecino, rango, correlacion) para consultas O(1)."""
+    df = pd.read_csv(path, sep=';', decimal=',')
+    return {ticker: grupo.drop(columns='ticker').reset_index(drop=True) for ticker, grupo in df.groupby('ticker', sort=False)}
+
+
+def main():
+    print("--- INICIANDO ÍNDICE DE PARES MÁS CORRELACIONADOS ---")
+    if not os.path.exists(ARCHIVO_ACCIONES):
+        print(f"!! ERROR: El archivo '{ARCHIVO_ACCIONES}' no se encontró.")
+        return
+    try:
+        print("-> Cargando retornos de acciones...")
+        precios = cargar_precios_acciones(ARCHIVO_ACCIONES)
+        z, utilizable = estandarizar_retornos(retornos_logaritmicos(precios))
+        print(f"   - {z.shape[1]} tickers ({utilizable.sum()} con historia suficiente), {z.shape[0]} fechas")
+
+        print(f"-> Calculando top-{TOP_K} por bloques de {TAMANO_BLOQUE}...")
+        vecinos, correlaciones = top_k_correlacionados(z, utilizable)
+        df_indice = construir_indice(precios.columns, vecinos, correlaciones)
+        df_indice.to_csv(ARCHIVO_SALIDA, index=False, sep=';', decimal=',')
+        print(f"-> Índice guardado en '{ARCHIVO_SALIDA}' ({len(df_indice)} pares)")
+        print("\n--- ¡PROCESO COMPLETADO CON ÉXITO! ---")
+    except Exception as e:
+        print(f"\n!! Ocurrió un error inesperado: {e}")
+
+
+if __name__ == "__main__":
+    main()
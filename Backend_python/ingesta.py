@@ -18,6 +18,10 @@ except Exception as exc:
     raise RuntimeError("No se pudo importar config.py desde la raíz del proyecto.") from exc
 
 from Backend_python.db import init_schema, upsert_price
+from Backend_python.instrumentacion import tramo
+from Backend_python.metricas import FILAS_ESCRITAS
+
+TAMANO_LOTE = 1000  # Filas por lote medido en la traza
 
 
 def normalizar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
@@ -49,17 +53,21 @@ def ejecutar_ingesta_precio_desde_csv(path_csv: str) -> None:
     df = normalizar_dataframe(df)
 
     registros = 0
-    for _, row in df.iterrows():
-        upsert_price({
-            "ticker": str(row["ticker"]).strip(),
-            "trade_date": row["date"],
-            "open": float(row["open"]),
-            "high": float(row["high"]),
-            "low": float(row["low"]),
-            "close": float(row["close"]),
-            "volume": int(row.get("volume", 0)),
-        })
-        registros += 1
+    for inicio in range(0, len(df), TAMANO_LOTE):
+        lote = df.iloc[inicio:inicio + TAMANO_LOTE]
+        with tramo("upsert prices", categoria='db', filas_entrada=len(lote)):
+            for _, row in lote.iterrows():
+                upsert_price({
+                    "ticker": str(row["ticker"]).strip(),
+                    "trade_date": row["date"],
+                    "open": float(row["open"]),
+                    "high": float(row["high"]),
+                    "low": float(row["low"]),
+                    "close": float(row["close"]),
+                    "volume": int(row.get("volume", 0)),
+                })
+                registros += 1
+        FILAS_ESCRITAS.incrementar("mysql_prices", valor=len(lote))
     print(f"Ingesta completada. Registros procesados: {registros}")
 
 
@@ -0,0 +1,220 @@
+"""
+Instrumentación de rendimiento del pipeline: tiempo de pared, CPU, RSS y filas por tramo.
+
+La CPU de un tramo es la del proceso completo (todos sus hilos, más los procesos hijos ya
+terminados, como los trabajadores de un pool al cerrarse): con tramos en paralelo incluye la de los
+demás. `rss_mb` es el RSS al cerrar el tramo y `rss_pico_proceso_mb` el máximo desde que arrancó el
+proceso (ru_maxrss no se puede reiniciar), no el pico del tramo.
+
+Los módulos marcan sus pasos con `tramo(...)`; si no hay una traza activa (por ejemplo al ejecutar
+un script suelto) el tramo no mide nada y su costo es despreciable. El orquestador activa una
+`Traza` con `--traza` y la exporta como JSON y, opcionalmente, en formato de eventos de Chrome
+(abrir en chrome://tracing o https://ui.perfetto.dev).
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+DIRECTORIO_TRAZAS = config.DIRECTORIO_TRAZAS
+
+
+def cpu_proceso_s():
+    """CPU (usuario + sistema) del proceso y de sus hijos terminados; sin `resource`, solo del proceso."""
+    if resource is None:
+        return time.process_time()
+    propio = resource.getrusage(resource.RUSAGE_SELF)
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return propio.ru_utime + propio.ru_stime + hijos.ru_utime + hijos.ru_stime
+
+
+def rss_pico_mb():
+    """RSS máximo del proceso desde que arrancó, en MB (None si la plataforma no lo expone)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS reporta bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def rss_actual_mb():
+    """RSS actual del proceso en MB, leído de /proc (None si la plataforma no lo expone)."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            paginas = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class _Tramo:
+    """Context manager de un tramo medido. `medicion` admite 'filas_salida' y otros valores extra."""
+
+    __slots__ = ('traza', 'nombre', 'categoria', 'perfilar', 'medicion', '_inicio', '_cpu', '_perfil')
+
+    def __init__(self, traza, nombre, categoria, filas_entrada, perfilar):
+        self.traza = traza
+        self.nombre = nombre
+        self.categoria = categoria
+        self.perfilar = perfilar
+        self.medicion = {'filas_entrada': filas_entrada}
+
+    def __enter__(self):
+        self._perfil = None
+        if self.perfilar and self.traza.cprofile:
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        if self.perfilar and self.traza.tracemalloc:
+            tracemalloc.reset_peak()
+        self._inicio = time.perf_counter()
+        self._cpu = cpu_proceso_s()
+        return self.medicion
+
+    def __exit__(self, tipo_exc, exc, tb):
+        duracion = time.perf_counter() - self._inicio
+        cpu = cpu_proceso_s() - self._cpu
+        evento = {
+            'nombre': self.nombre,
+            'categoria': self.categoria,
+            'hilo': threading.current_thread().name,
+            'tid': threading.get_ident(),
+            'inicio_s': self._inicio - self.traza.inicio,
+            'duracion_s': duracion,
+            'cpu_s': cpu,
+            'rss_mb': rss_actual_mb(),
+            'rss_pico_proceso_mb': rss_pico_mb(),
+            'error': None if exc is None else repr(exc),
+        }
+        evento.update(self.medicion)
+        filas = evento.get('filas_salida') or evento.get('filas_entrada')
+        evento['filas_por_segundo'] = filas / duracion if filas and duracion > 0 else None
+        if self._perfil is not None:
+            self._perfil.disable()
+            evento['cprofile'] = self.traza.guardar_perfil(self.nombre, self._perfil)
+        if self.perfilar and self.traza.tracemalloc:
+            # tracemalloc es global: con etapas en paralelo el pico incluye a las demás
+            evento['tracemalloc_pico_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        self.traza.registrar(evento)
+        return False
+
+
+class _TramoNulo:
+    """Tramo sin traza activa: no mide nada."""
+
+    __slots__ = ('medicion',)
+
+    def __init__(self, filas_entrada):
+        self.medicion = {'filas_entrada': filas_entrada}
+
+    def __enter__(self):
+        return self.medicion
+
+    def __exit__(self, tipo_exc, exc, tb):
+        return False
+
+
+class Traza:
+    def __init__(self, cprofile=False, memoria=False, directorio=DIRECTORIO_TRAZAS):
+        self.inicio = time.perf_counter()
+        self.fecha = time.strftime('%Y%m%d_%H%M%S')
+        self.cprofile = cprofile
+        self.tracemalloc = memoria
+        self.directorio = directorio
+        self.eventos = []
+        self._lock = threading.Lock()
+
+    def registrar(self, evento):
+        with self._lock:
+            self.eventos.append(evento)
+
+    def tramo(self, nombre, categoria='subpaso', filas_entrada=None, perfilar=False):
+        return _Tramo(self, nombre, categoria, filas_entrada, perfilar)
+
+    def guardar_perfil(self, nombre, perfil):
+        os.makedirs(self.directorio, exist_ok=True)
+        limpio = ''.join(c if c.isalnum() else '_' for c in nombre)
+        path = os.path.join(self.directorio, f"{self.fecha}_{limpio}.prof")
+        perfil.dump_stats(path)
+        return path
+
+    def exportar_json(self, path=None):
+        path = path or os.path.join(self.directorio, f"traza_{self.fecha}.json")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._lock:
+            eventos = sorted(self.eventos, key=lambda e: e['inicio_s'])
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'fecha': self.fecha, 'pid': os.getpid(), 'eventos': eventos}, f, ensure_ascii=False, indent=2)
+        return path
+
+    def exportar_chrome(self, path=None):
+        """Formato Trace Event de Chrome (eventos completos 'X', tiempos en microsegundos)."""
+        path = path or os.path.join(self.directorio, f"traza_{self.fecha}.chrome.json")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        pid = os.getpid()
+        with self._lock:
+            eventos = [{
+                'name': e['nombre'],
+                'cat': e['categoria'],
+                'ph': 'X',
+                'ts': e['inicio_s'] * 1e6,
+                'dur': e['duracion_s'] * 1e6,
+                'pid': pid,
+                'tid': e['tid'],
+                'args': {k: v for k, v in e.items() if k not in ('nombre', 'categoria', 'inicio_s', 'duracion_s', 'tid')},
+            } for e in self.eventos]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return path
+
+    def imprimir_resumen(self, limite=10):
+        with self._lock:
+            eventos = sorted(self.eventos, key=lambda e: e['duracion_s'], reverse=True)[:limite]
+        print(f"\n⏱️  TRAMOS MÁS LENTOS (top {limite}):")
+        for e in eventos:
+            filas = f", {e['filas_por_segundo']:,.0f} filas/s" if e.get('filas_por_segundo') else ""
+            rss = f", RSS {e['rss_mb']:.0f} MB" if e.get('rss_mb') else ""
+            if e.get('rss_pico_proceso_mb'):
+                rss += f", pico del proceso {e['rss_pico_proceso_mb']:.0f} MB"
+            print(f"   {e['duracion_s']:8.2f} s (CPU {e['cpu_s']:.2f} s) [{e['categoria']}] {e['nombre']}{filas}{rss}")
+
+
+_traza_activa = None
+
+
+def activar(traza):
+    global _traza_activa
+    _traza_activa = traza
+    if traza.tracemalloc and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return traza
+
+
+def desactivar():
+    global _traza_activa
+    traza, _traza_activa = _traza_activa, None
+    if traza is not None and traza.tracemalloc and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return traza
+
+
+def tramo(nombre, categoria='subpaso', filas_entrada=None, perfilar=False):
+    """Mide un bloque `with` en la traza activa; sin traza activa no hace nada."""
+    traza = _traza_activa
+    if traza is None:
+        return _TramoNulo(filas_entrada)
+    return traza.tramo(nombre, categoria, filas_entrada, perfilar)
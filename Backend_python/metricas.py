@@ -0,0 +1,248 @@
+"""
+Registro de métricas del pipeline (contadores, medidores e histogramas) exportable en el formato
+de texto de Prometheus, como archivo (para el textfile collector de node_exporter) o por HTTP.
+
+Registrar una observación es solo una suma bajo un lock por métrica, así que puede usarse dentro
+de los bucles por ticker. Las métricas se crean con `contador`, `medidor` e `histograma`, que
+retornan la misma instancia si ya existe una con ese nombre.
+"""
+
+import bisect
+import http.server
+import os
+import threading
+import time
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+ARCHIVO_METRICAS = config.ARCHIVO_METRICAS
+PREFIJO = 'condor_'
+CUBETAS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _formatear_etiquetas(nombres, valores, extra=()):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in list(zip(nombres, valores)) + list(extra)]
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _formatear_numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = PREFIJO + nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, valores_etiquetas):
+        if len(valores_etiquetas) != len(self.etiquetas):
+            raise ValueError(f"{self.nombre} espera las etiquetas {self.etiquetas}")
+        return tuple(str(v) for v in valores_etiquetas)
+
+    def exportar(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        with self._lock:
+            items = sorted(self._valores.items())
+        for clave, valor in items:
+            lineas.extend(self._lineas(clave, valor))
+        return lineas
+
+    def _lineas(self, clave, valor):
+        return [f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}"]
+
+    def limpiar(self):
+        with self._lock:
+            self._valores.clear()
+
+
+class Contador(_Metrica):
+    tipo = 'counter'
+
+    def incrementar(self, *etiquetas, valor=1):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+
+class Medidor(_Metrica):
+    tipo = 'gauge'
+
+    def fijar(self, *etiquetas, valor):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = valor
+
+    def fijar_varios(self, valores):
+        """Fija muchas series de una vez: `valores` es {etiqueta (o tupla de etiquetas): valor}."""
+        nuevos = {self._clave(k if isinstance(k, tuple) else (k,)): v for k, v in valores.items()}
+        with self._lock:
+            self._valores.update(nuevos)
+
+
+class Histograma(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), cubetas=CUBETAS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.cubetas = tuple(sorted(cubetas))
+
+    def observar(self, *etiquetas, valor):
+        clave = self._clave(etiquetas)
+        posicion = bisect.bisect_left(self.cubetas, valor)
+        with self._lock:
+            estado = self._valores.get(clave)
+            if estado is None:
+                # [conteos por cubeta (no acumulados), suma, total]
+                estado = self._valores[clave] = [[0] * (len(self.cubetas) + 1), 0.0, 0]
+            estado[0][posicion] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    def medir(self, *etiquetas):
+        """Context manager que observa la duración del bloque en segundos."""
+        return _Cronometro(self, etiquetas)
+
+    def _lineas(self, clave, valor):
+        conteos, suma, total = valor
+        lineas = []
+        acumulado = 0
+        for limite, conteo in zip(self.cubetas + (float('inf'),), conteos):
+            acumulado += conteo
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave, [('le', _formatear_numero(float(limite)))])
+            lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+        etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+        lineas.append(f"{self.nombre}_sum{etiquetas} {_formatear_numero(suma)}")
+        lineas.append(f"{self.nombre}_count{etiquetas} {total}")
+        return lineas
+
+
+class _Cronometro:
+    __slots__ = ('histograma', 'etiquetas', '_inicio')
+
+    def __init__(self, histograma, etiquetas):
+        self.histograma = histograma
+        self.etiquetas = etiquetas
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb):
+        self.histograma.observar(*self.etiquetas, valor=time.perf_counter() - self._inicio)
+        return False
+
+
+class Registro:
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _obtener(self, clase, nombre, ayuda, etiquetas, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = self._metricas[nombre] = clase(nombre, ayuda, etiquetas, **kwargs)
+            elif type(metrica).__name__ != clase.__name__:  # por nombre: al recargar el módulo las clases cambian
+                raise ValueError(f"La métrica '{nombre}' ya existe con otro tipo")
+            return metrica
+
+    def exportar_texto(self):
+        with self._lock:
+            metricas = list(self._metricas.values())
+        lineas = []
+        for metrica in sorted(metricas, key=lambda m: m.nombre):
+            lineas.extend(metrica.exportar())
+        return '\n'.join(lineas) + '\n'
+
+    def escribir_archivo(self, path=None):
+        """Escritura atómica: el collector nunca lee un archivo a medio escribir."""
+        path = path or ARCHIVO_METRICAS
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temporal = f"{path}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(self.exportar_texto())
+        os.replace(temporal, path)
+        return path
+
+    def servir_http(self, puerto, host='0.0.0.0'):
+        """Expone /metrics en un hilo daemon. Retorna el servidor (usar `.shutdown()` para detenerlo)."""
+        registro = self
+
+        class _Manejador(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                cuerpo = registro.exportar_texto().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, formato, *args):
+                pass
+
+        servidor = http.server.ThreadingHTTPServer((host, puerto), _Manejador)
+        threading.Thread(target=servidor.serve_forever, name='metricas-http', daemon=True).start()
+        return servidor
+
+
+# El daemon recarga este módulo cuando cambia config.py: se conserva el registro (sus series y el
+# servidor HTTP que lo expone) en vez de crear uno vacío
+REGISTRO = globals().get('REGISTRO') or Registro()
+
+
+def contador(nombre, ayuda, etiquetas=()):
+    return REGISTRO._obtener(Contador, nombre, ayuda, etiquetas)
+
+
+def medidor(nombre, ayuda, etiquetas=()):
+    return REGISTRO._obtener(Medidor, nombre, ayuda, etiquetas)
+
+
+def histograma(nombre, ayuda, etiquetas=(), cubetas=CUBETAS_SEGUNDOS):
+    return REGISTRO._obtener(Histograma, nombre, ayuda, etiquetas, cubetas=cubetas)
+
+
+# Métricas del pipeline compartidas por varios módulos
+DURACION_DESCARGA = histograma('descarga_duracion_segundos', "Latencia de descarga de un ticker")
+ULTIMA_DURACION_DESCARGA = medidor(
+    'descarga_ultima_duracion_segundos', "Latencia de la última descarga de cada ticker", ('ticker',))
+FALLOS_DESCARGA = contador('descarga_fallos_total', "Descargas fallidas o sin datos", ('ticker', 'motivo'))
+FILAS_ESCRITAS = contador('filas_escritas_total', "Filas escritas por destino", ('destino',))
+DURACION_INDICADORES = histograma('indicadores_duracion_segundos', "Latencia del cálculo de indicadores de un ticker")
+ULTIMA_BARRA = medidor(
+    'ultima_barra_timestamp_segundos', "Fecha de la última barra de cada ticker (epoch Unix)", ('ticker',))
+OPORTUNIDADES = medidor('oportunidades', "Oportunidades detectadas en la última fusión", ('criterio',))
+DURACION_ETAPA = medidor('etapa_duracion_segundos', "Duración de la última ejecución de cada etapa", ('etapa',))
+ESTADO_ETAPA = medidor(
+    'etapa_exitosa', "1 si la última ejecución de la etapa terminó bien o estaba al día", ('etapa',))
+ULTIMA_CORRIDA = medidor('ultima_corrida_timestamp_segundos', "Momento en que terminó la última corrida del pipeline")
+
+
+def registrar_ultimas_barras(df, columna_fecha='date'):
+    """Fija ULTIMA_BARRA para todos los tickers de `df` (vectorizado: un groupby, no un bucle)."""
+    import pandas as pd
+
+    if df.empty:
+        return
+    ultimas = pd.to_datetime(df.groupby('ticker')[columna_fecha].max())
+    segundos = (ultimas - pd.Timestamp('1970-01-01')) // pd.Timedelta(seconds=1)
+    ULTIMA_BARRA.fijar_varios(dict(zip(ultimas.index.astype(str), segundos.astype(int))))
@@ -2,6 +2,11 @@ import pandas as pd
 import numpy as np
 import pandas_ta as ta
 import os
+import glob
+import math
+import shutil
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 
 # Cargar config desde la raíz del proyecto
 import sys
@@ -9,10 +14,28 @@ ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if ROOT not in sys.path:
     sys.path.append(ROOT)
 import config
+from Backend_python.checkpoints import CheckpointTickers, checkpoints_activos
+from Backend_python.cubo_tecnico import CLAVES, EscritorCubo, actualizar_cubo, construir_cubo, existe_cubo
+from Backend_python.huellas import hash_archivo
+from Backend_python.instrumentacion import tramo
+from Backend_python.metricas import DURACION_INDICADORES, FILAS_ESCRITAS
 
 ARCHIVO_DE_ENTRADA = config.ARCHIVO_ACCIONES_MASTER
 ARCHIVO_DE_SALIDA = config.ARCHIVO_TECNICO
 
+# Modo streaming (--streaming)
+DIRECTORIO_MASTER_PARTICIONADO = config.DIRECTORIO_MASTER_PARTICIONADO
+DIRECTORIO_TECNICO_PARTICIONADO = config.DIRECTORIO_TECNICO_PARTICIONADO
+MB_POR_PARTICION_STREAMING = config.MB_POR_PARTICION_STREAMING
+FILAS_POR_BLOQUE_STREAMING = config.FILAS_POR_BLOQUE_STREAMING
+LOOKBACK_STREAMING = config.LOOKBACK_STREAMING
+# El chikou de Ichimoku (ics_26) es el cierre 25 barras después: cada bloque lleva esas barras de más
+ADELANTO_STREAMING = 25
+# Indicadores acumulados: en cada bloque se rebasan para continuar el valor del bloque anterior
+COLUMNAS_ACUMULADAS = ('obv', 'ad')
+# Barras de la serie sintética con que se fijan las columnas de salida (más que la ventana más larga)
+BARRAS_COLUMNAS_TECNICAS = 400
+
 def limpiar_y_estandarizar(df):
     print("-> Estandarizando y limpiando datos...")
     df.columns = df.columns.str.lower()
@@ -41,44 +64,422 @@ def limpiar_y_estandarizar(df):
     print("-> Limpieza completada.")
     return df
 
+def process_group(group):
+    group = group.sort_values(by='date')
+    group.ta.ema(length=9, append=True); group.ta.ema(length=12, append=True); group.ta.ema(length=26, append=True)
+    group.ta.sma(length=5, append=True); group.ta.sma(length=20, append=True); group.ta.sma(length=50, append=True); group.ta.sma(length=200, append=True)
+    group.ta.rsi(length=14, append=True)
+    group.ta.macd(fast=12, slow=26, signal=9, append=True)
+    group.ta.bbands(length=20, std=2, append=True)
+    group.ta.stoch(k=14, d=3, append=True)
+    group.ta.cci(length=20, append=True)
+    group.ta.adx(length=14, append=True)
+    group.ta.psar(append=True)
+    group.ta.atr(length=14, append=True)
+    group.ta.obv(append=True)
+    group.ta.ad(append=True)
+    group.ta.ichimoku(append=True)
+    group.rename(columns=lambda x: x.lower(), inplace=True)
+    return group
+
 def calcular_indicadores_y_senales(df):
     print("-> Calculando el set completo de indicadores y señales...")
-    def process_group(group):
-        group = group.sort_values(by='date')
-        group.ta.ema(length=9, append=True); group.ta.ema(length=12, append=True); group.ta.ema(length=26, append=True)
-        group.ta.sma(length=5, append=True); group.ta.sma(length=20, append=True); group.ta.sma(length=50, append=True); group.ta.sma(length=200, append=True)
-        group.ta.rsi(length=14, append=True)
-        group.ta.macd(fast=12, slow=26, signal=9, append=True)
-        group.ta.bbands(length=20, std=2, append=True)
-        group.ta.stoch(k=14, d=3, append=True)
-        group.ta.cci(length=20, append=True)
-        group.ta.adx(length=14, append=True)
-        group.ta.psar(append=True)
-        group.ta.atr(length=14, append=True)
-        group.ta.obv(append=True)
-        group.ta.ad(append=True)
-        group.ta.ichimoku(append=True)
-        group.rename(columns=lambda x: x.lower(), inplace=True)
-        return group
     df_final = df.groupby('ticker').apply(process_group).reset_index(level=0, drop=True)
     print("-> Cálculo de indicadores y señales completado.")
     return df_final
 
-def main():
+def calcular_indicadores_paralelo(df, procesos=None):
+    """
+    Igual que `calcular_indicadores_y_senales`, repartiendo los tickers en un pool de procesos.
+    Cada ticker se calcula con el mismo `process_group`, así que el resultado es idéntico.
+    """
+    print("-> Calculando el set completo de indicadores y señales (en paralelo)...")
+    procesos = procesos or os.cpu_count() or 1
+    grupos = [group for _, group in df.groupby('ticker')]
+    if procesos > 1 and len(grupos) > 1:
+        sys.stdout.flush()  # con fork, los trabajadores heredarían y repetirían la salida pendiente
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(process_group, grupos, chunksize=max(1, len(grupos) // (procesos * 4))))
+    else:
+        resultados = [process_group(group) for group in grupos]
+    df_final = pd.concat(resultados) if resultados else df.iloc[0:0]
+    print("-> Cálculo de indicadores y señales completado.")
+    return df_final
+
+def columnas_tecnicas(muestra):
+    """
+    Columnas de salida de `process_group` para un master con las columnas de `muestra` (ya limpia,
+    al menos una fila). pandas_ta omite los indicadores que no alcanza a calcular en series cortas
+    (SMA 200, Ichimoku), así que se toman de una serie sintética de BARRAS_COLUMNAS_TECNICAS barras.
+    """
+    n = BARRAS_COLUMNAS_TECNICAS
+    sintetica = muestra.iloc[[0] * n].reset_index(drop=True)
+    cierre = 100 + 10 * np.sin(np.arange(n) / 7) + 0.05 * np.arange(n)
+    sintetica['date'] = pd.bdate_range('2000-01-03', periods=n)
+    sintetica['open'], sintetica['close'] = cierre, cierre + np.cos(np.arange(n) / 3)
+    sintetica['high'] = np.maximum(sintetica['open'], sintetica['close']) + 1
+    sintetica['low'] = np.minimum(sintetica['open'], sintetica['close']) - 1
+    sintetica['volume'] = 1000 + 100 * (np.arange(n) % 5)
+    return process_group(sintetica).columns.tolist()
+
+def indicadores_por_bloques(group, filas_por_bloque=FILAS_POR_BLOQUE_STREAMING, lookback=LOOKBACK_STREAMING):
+    """
+    Calcula los indicadores de un ticker por bloques de `filas_por_bloque` barras y los entrega uno
+    a uno. Cada bloque se calcula con las `lookback` barras previas (ventanas de SMA 200 e Ichimoku
+    y margen para que EMA, RSI, ADX y ATR converjan) y las ADELANTO_STREAMING siguientes; OBV y AD
+    se desplazan para continuar el acumulado del bloque anterior.
+    """
+    group = group.sort_values(by='date')
+    if len(group) <= filas_por_bloque:
+        yield process_group(group)
+        return
+    lookback = max(lookback, 2)  # el ancla del rebase no puede ser la primera fila de la ventana
+    anterior = None
+    for inicio in range(0, len(group), filas_por_bloque):
+        fin = min(inicio + filas_por_bloque, len(group))
+        desde = max(0, inicio - lookback)
+        ventana = process_group(group.iloc[desde:min(len(group), fin + ADELANTO_STREAMING)])
+        bloque = ventana.iloc[inicio - desde:fin - desde].copy()
+        if anterior is not None:
+            # La barra inicio - 1 está en la ventana y en el bloque anterior: la diferencia es el desplazamiento
+            ancla = ventana.iloc[inicio - desde - 1]
+            for columna in COLUMNAS_ACUMULADAS:
+                if columna in bloque.columns:
+                    bloque[columna] += anterior[columna] - ancla[columna]
+        anterior = bloque.iloc[-1]
+        yield bloque
+
+def calcular_indicadores_por_bloques(df, filas_por_bloque=FILAS_POR_BLOQUE_STREAMING, lookback=LOOKBACK_STREAMING):
+    """Versión en memoria del modo streaming (para comparar con la referencia en equivalencia_indicadores)."""
+    print("-> Calculando el set completo de indicadores y señales (por bloques)...")
+    resultados = [bloque for _, group in df.groupby('ticker')
+                  for bloque in indicadores_por_bloques(group, filas_por_bloque, lookback)]
+    df_final = pd.concat(resultados) if resultados else df.iloc[0:0]
+    print("-> Cálculo de indicadores y señales completado.")
+    return df_final
+
+def calcular_indicadores_con_checkpoints(df, reanudar=False):
+    """
+    Igual que `calcular_indicadores_y_senales`, pero, si los checkpoints están activos
+    (CHECKPOINTS_POR_TICKER o `reanudar`), guarda el resultado de cada ticker apenas se calcula; con
+    `reanudar=True` los tickers ya completados en una corrida fallida no se recalculan.
+    """
+    activo = checkpoints_activos(reanudar)
+    print(f"-> Calculando el set completo de indicadores y señales{' (con checkpoints por ticker)' if activo else ''}...")
+    # El hash del master solo hace falta para validar los parciales
+    contexto = {'entrada': hash_archivo(ARCHIVO_DE_ENTRADA)} if activo else None
+    checkpoint = CheckpointTickers('indicadores', contexto=contexto, activo=activo)
+    completados = checkpoint.iniciar(reanudar)
+    if completados:
+        print(f"   - Reanudando: {len(completados)} tickers ya calculados")
+    resultados = []
+    for ticker, group in df.groupby('ticker'):
+        if ticker in completados:
+            parcial = checkpoint.cargar([ticker])[0]
+            parcial['date'] = pd.to_datetime(parcial['date'])
+            resultados.append(parcial)
+            continue
+        with tramo(f"indicadores {ticker}", categoria='indicadores', filas_entrada=len(group)), DURACION_INDICADORES.medir():
+            resultado = process_group(group)
+        checkpoint.guardar(ticker, resultado)
+        resultados.append(resultado)
+    df_final = pd.concat(resultados, ignore_index=True) if resultados else df.iloc[0:0]
+    print("-> Cálculo de indicadores y señales completado.")
+    return df_final
+
+def indicadores_desde(group, inicio, anterior=None, lookback=LOOKBACK_STREAMING):
+    """
+    Indicadores de las barras `inicio:` de un ticker (`group` ordenado por fecha), calculados con las
+    `lookback` barras previas. `anterior` es la fila técnica ya guardada de la barra inicio - 1: OBV
+    y AD se desplazan para continuar su acumulado, como entre bloques en `indicadores_por_bloques`.
+    """
+    desde = max(0, inicio - max(lookback, 2))
+    ventana = process_group(group.iloc[desde:])
+    cola = ventana.iloc[inicio - desde:].copy()
+    if anterior is not None and inicio > 0:
+        ancla = ventana.iloc[inicio - desde - 1]
+        for columna in COLUMNAS_ACUMULADAS:
+            if columna in cola.columns and columna in anterior.index:
+                cola[columna] += anterior[columna] - ancla[columna]
+    return cola
+
+def _firma_archivo(path):
+    estado = os.stat(path)
+    return estado.st_size, estado.st_mtime_ns
+
+def _inicio_ultimas_lineas(path, lineas):
+    """Posición en bytes donde empiezan las últimas `lineas` líneas de `path` (leído desde el final)."""
+    tamano = os.path.getsize(path)
+    if lineas == 0:
+        return tamano
+    # El salto de línea final cierra la última línea: se busca el salto número lineas + 1 desde el final
+    buscados = lineas + 1
+    with open(path, 'rb') as f:
+        posicion = tamano
+        while posicion > 0:
+            leidos = min(1 << 20, posicion)
+            posicion -= leidos
+            f.seek(posicion)
+            trozo = f.read(leidos)
+            fin = len(trozo)
+            while buscados:
+                fin = trozo.rfind(b'\n', 0, fin)
+                if fin < 0:
+                    break
+                buscados -= 1
+            if not buscados:
+                return posicion + fin + 1
+    raise ValueError(f"{path} tiene menos de {lineas} filas")
+
+def _cargar_tecnico(df_tecnico=None):
+    """
+    Base técnica tal como está en ARCHIVO_DE_SALIDA (mismas filas y orden). La que viene en memoria
+    se usa solo si su firma coincide con la del archivo, es decir, si nadie lo reescribió después.
+    """
+    if not os.path.exists(ARCHIVO_DE_SALIDA):
+        return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'), 'ticker': pd.Series(dtype=object)})
+    if df_tecnico is not None and df_tecnico.attrs.get('firma_csv') == _firma_archivo(ARCHIVO_DE_SALIDA):
+        return df_tecnico
+    df_tecnico = pd.read_csv(ARCHIVO_DE_SALIDA, sep=';', decimal=',')
+    df_tecnico['date'] = pd.to_datetime(df_tecnico['date'])
+    df_tecnico.attrs['firma_csv'] = _firma_archivo(ARCHIVO_DE_SALIDA)
+    return df_tecnico
+
+def actualizar_indicadores_incremental(df_master, tickers, df_tecnico=None, lookback=LOOKBACK_STREAMING):
+    """
+    Recalcula los indicadores solo de `tickers` (los que recibieron barras nuevas) y solo desde su
+    última barra ya calculada, que la descarga incremental vuelve a pedir. Se retrocede
+    ADELANTO_STREAMING barras (el chikou de esas barras ve las nuevas) y se calcula con `lookback`
+    barras previas; OBV y AD continúan el acumulado guardado. Un ticker sin historia en la base
+    técnica, o cuya historia cabe en el lookback, se calcula completo.
+
+    La base técnica (que puede venir ya cargada en memoria) se guarda ordenada por fecha, así que
+    solo se trunca y se vuelve a escribir la cola desde la primera fecha recalculada; si el archivo
+    no estaba en ese orden o aparecen columnas nuevas se reescribe completo una vez.
+    Retorna la base técnica actualizada.
+    """
+    df_tecnico = _cargar_tecnico(df_tecnico)
+    df_sub = limpiar_y_estandarizar(df_master[df_master['ticker'].isin(tickers)].copy())
+    if df_sub is None or df_sub.empty:
+        return df_tecnico
+    previas = df_tecnico[df_tecnico['ticker'].isin(tickers)]
+    previas_por_ticker = dict(tuple(previas.groupby('ticker')))
+    resultados, cortes = [], {}
+    with tramo("indicadores incrementales", categoria='indicadores', filas_entrada=len(df_sub)) as medicion:
+        for ticker, group in df_sub.groupby('ticker'):
+            group = group.sort_values(by='date').reset_index(drop=True)
+            previo = previas_por_ticker.get(ticker)
+            inicio, anterior = 0, None
+            if previo is not None and not previo.empty:
+                inicio = max(0, int(group['date'].searchsorted(previo['date'].max())) - ADELANTO_STREAMING)
+                if inicio <= lookback:
+                    # La historia cabe en la ventana: se recalcula completa (mismo costo, y un indicador
+                    # que pandas_ta omitía en la serie corta aparece en todas sus barras)
+                    inicio = 0
+                else:
+                    fila = previo[previo['date'] == group['date'].iloc[inicio - 1]]
+                    # Sin la barra previa guardada no hay con qué continuar OBV y AD: ticker completo
+                    inicio, anterior = (inicio, fila.iloc[-1]) if not fila.empty else (0, None)
+            with DURACION_INDICADORES.medir():
+                resultados.append(indicadores_desde(group, inicio, anterior, lookback))
+            cortes[ticker] = group['date'].iloc[inicio]
+        nuevos = pd.concat(resultados, ignore_index=True)
+        medicion['filas_salida'] = len(nuevos)
+
+    reemplazadas = df_tecnico['date'] >= df_tecnico['ticker'].map(cortes)
+    columnas = df_tecnico.columns.tolist()
+    en_orden = (os.path.exists(ARCHIVO_DE_SALIDA) and df_tecnico['date'].is_monotonic_increasing
+                and set(nuevos.columns) <= set(columnas))
+    if en_orden:
+        # Las filas anteriores al primer corte no cambian ni se mueven: solo se reescribe la cola
+        n_cabeza = int(df_tecnico['date'].searchsorted(min(cortes.values())))
+        cola = pd.concat([df_tecnico.iloc[n_cabeza:][~reemplazadas.iloc[n_cabeza:]], nuevos.reindex(columns=columnas)])
+        cola = cola.sort_values(['date', 'ticker'], kind='stable')
+        with tramo("escritura CSV tecnico (cola)", categoria='escritura', filas_entrada=len(cola)):
+            with open(ARCHIVO_DE_SALIDA, 'r+b') as f:
+                f.truncate(_inicio_ultimas_lineas(ARCHIVO_DE_SALIDA, len(df_tecnico) - n_cabeza))
+            cola.to_csv(ARCHIVO_DE_SALIDA, mode='a', header=False, index=False, decimal=',', sep=';')
+        df_tecnico = pd.concat([df_tecnico.iloc[:n_cabeza], cola], ignore_index=True)
+        escritas = len(cola)
+    else:
+        df_tecnico = pd.concat([df_tecnico[~reemplazadas], nuevos], ignore_index=True)
+        df_tecnico = df_tecnico.sort_values(['date', 'ticker'], kind='stable').reset_index(drop=True)
+        with tramo("escritura CSV tecnico", categoria='escritura', filas_entrada=len(df_tecnico)):
+            df_tecnico.to_csv(ARCHIVO_DE_SALIDA, index=False, decimal=',', sep=';')
+        escritas = len(df_tecnico)
+    df_tecnico.attrs['firma_csv'] = _firma_archivo(ARCHIVO_DE_SALIDA)
+    FILAS_ESCRITAS.incrementar('database_maestra_tecnica', valor=escritas)
+    with tramo("escritura cubo tecnico", categoria='escritura', filas_entrada=len(nuevos)):
+        # Solo se escriben las fechas recalculadas; sin cubo previo se arma completo
+        if existe_cubo():
+            actualizar_cubo(nuevos.reindex(columns=df_tecnico.columns), reemplazar=False)
+        else:
+            construir_cubo(df_tecnico)
+    return df_tecnico
+
+def _columna_ticker(columnas):
+    return next((c for c in columnas if c.lower() in ('ticker', 'nemotecnico')), None)
+
+def particiones_para(entrada=ARCHIVO_DE_ENTRADA, mb_por_particion=MB_POR_PARTICION_STREAMING):
+    """Número de particiones para que cada una quede cerca de `mb_por_particion` MB de `entrada`."""
+    return max(1, math.ceil(os.path.getsize(entrada) / (mb_por_particion * 1024 * 1024)))
+
+def particionar_master(entrada=ARCHIVO_DE_ENTRADA, directorio=DIRECTORIO_MASTER_PARTICIONADO,
+                       particiones=None, filas_por_lectura=FILAS_POR_BLOQUE_STREAMING * 20):
+    """
+    Reparte `entrada` en `particiones` CSV por ticker (crc32 del ticker), leyéndolo por tramos
+    de `filas_por_lectura` filas; sin `particiones` se calculan con `particiones_para`. Todas las
+    barras de un ticker quedan en la misma partición. Retorna las rutas de las particiones escritas.
+    """
+    if particiones is None:
+        particiones = particiones_para(entrada)
+    os.makedirs(directorio, exist_ok=True)
+    for viejo in glob.glob(os.path.join(directorio, 'parte_*.csv')):
+        os.remove(viejo)
+    escritas = set()
+    for tramo_master in pd.read_csv(entrada, delimiter=';', chunksize=filas_por_lectura):
+        columna = _columna_ticker(tramo_master.columns)
+        if columna is None:
+            raise ValueError(f"No hay columna de ticker en {entrada}: {tramo_master.columns.tolist()}")
+        numeros = tramo_master[columna].astype(str).map(lambda t: zlib.crc32(t.encode('utf-8')) % particiones)
+        for numero, parte in tramo_master.groupby(numeros):
+            path = os.path.join(directorio, f"parte_{numero:04d}.csv")
+            parte.to_csv(path, mode='a', header=path not in escritas, index=False, sep=';')
+            escritas.add(path)
+    return sorted(escritas)
+
+def _ejes_particiones(partes):
+    """
+    (fechas normalizadas, tickers) presentes en las particiones; solo se leen las columnas de
+    fecha y de ticker.
+    """
+    fechas, tickers = set(), set()
+    for parte in partes:
+        columnas = pd.read_csv(parte, delimiter=';', nrows=0).columns
+        fecha = next((c for c in columnas if c.lower() in ('date', 'fecha')), None)
+        ticker = _columna_ticker(columnas)
+        leidas = pd.read_csv(parte, delimiter=';', usecols=[c for c in (fecha, ticker) if c is not None])
+        if fecha is not None:
+            fechas.update(leidas[fecha].dropna().unique())
+        if ticker is not None:
+            tickers.update(leidas[ticker].dropna().astype(str).unique())
+    fechas = pd.to_datetime(pd.Index(sorted(fechas)), format='mixed').normalize().unique().sort_values()
+    return fechas, sorted(tickers)
+
+def _unir_particiones(partes, destino):
+    """Concatena los CSV de `partes` (mismo encabezado) en `destino` sin cargarlos en memoria."""
+    temporal = destino + '.tmp'
+    with open(temporal, 'w', encoding='utf-8', newline='') as salida:
+        encabezado = None
+        for parte in partes:
+            with open(parte, 'r', encoding='utf-8', newline='') as f:
+                primera = f.readline()
+                if encabezado is None:
+                    encabezado = primera
+                    salida.write(primera)
+                elif primera != encabezado:
+                    raise ValueError(f"{parte} tiene columnas distintas a las de las demás particiones")
+                shutil.copyfileobj(f, salida)
+    os.replace(temporal, destino)
+
+def main_streaming(particiones=None, filas_por_bloque=FILAS_POR_BLOQUE_STREAMING):
+    """
+    Modo fuera de memoria: particiona el master por ticker (o usa DIRECTORIO_MASTER_PARTICIONADO
+    si no hay master), calcula cada ticker por bloques con su lookback y escribe cada bloque apenas
+    se calcula en DIRECTORIO_TECNICO_PARTICIONADO y en el cubo técnico. Al final une las
+    particiones en la base técnica.
+
+    Cada partición se carga completa, igual que la historia de cada uno de sus tickers: sin
+    `particiones` su número se fija con el tamaño del master (MB_POR_PARTICION_STREAMING), así que
+    la memoria queda acotada por ese tamaño (más el desbalance del hash) y por la historia del
+    ticker más largo, no por el número de tickers. Con particiones existentes manda su tamaño.
+    """
+    print("--- INICIANDO MOTOR CÓNDOR v4.2 (modo streaming) ---")
+    if os.path.exists(ARCHIVO_DE_ENTRADA):
+        with tramo("particionado de acciones_master", categoria='lectura'):
+            partes = particionar_master(particiones=particiones)
+        print(f"-> Master repartido en {len(partes)} particiones en '{DIRECTORIO_MASTER_PARTICIONADO}'")
+    else:
+        partes = sorted(glob.glob(os.path.join(DIRECTORIO_MASTER_PARTICIONADO, 'parte_*.csv')))
+        if not partes:
+            print(f"!! ERROR: No se encontró '{ARCHIVO_DE_ENTRADA}' ni particiones en '{DIRECTORIO_MASTER_PARTICIONADO}'.")
+            return
+        print(f"-> Usando {len(partes)} particiones existentes de '{DIRECTORIO_MASTER_PARTICIONADO}'")
+    # Los ejes del cubo se fijan antes: se abre una vez y cada bloque se escribe sin reordenarlo
+    fechas, tickers = _ejes_particiones(partes)
+    # Todos los bloques se escriben con las mismas columnas, aunque en un ticker de historia corta
+    # pandas_ta omita algunas: el CSV de cada partición, la unión final y el cubo quedan alineados
+    muestra = limpiar_y_estandarizar(pd.read_csv(partes[0], delimiter=';', nrows=1))
+    if muestra is None:
+        return
+    columnas = columnas_tecnicas(muestra)
+    campos = [c for c in columnas if c not in CLAVES
+              and (c not in muestra.columns or pd.api.types.is_numeric_dtype(muestra[c]))]
+
+    os.makedirs(DIRECTORIO_TECNICO_PARTICIONADO, exist_ok=True)
+    for viejo in glob.glob(os.path.join(DIRECTORIO_TECNICO_PARTICIONADO, 'parte_*.csv')):
+        os.remove(viejo)
+    salidas = []
+    cubo = EscritorCubo(tickers, fechas, campos)
+    filas_totales = 0
+    for numero, parte in enumerate(partes, start=1):
+        with tramo(f"indicadores {os.path.basename(parte)}", categoria='indicadores') as medicion:
+            df = limpiar_y_estandarizar(pd.read_csv(parte, delimiter=';'))
+            if df is None:
+                return
+            destino = os.path.join(DIRECTORIO_TECNICO_PARTICIONADO, os.path.basename(parte))
+            filas = 0
+            for _, group in df.groupby('ticker'):
+                with DURACION_INDICADORES.medir():
+                    for bloque in indicadores_por_bloques(group, filas_por_bloque):
+                        bloque = bloque.reindex(columns=columnas)
+                        bloque.to_csv(destino, mode='a', header=not filas, index=False, decimal=',', sep=';')
+                        cubo.escribir(bloque)
+                        filas += len(bloque)
+            medicion['filas_salida'] = filas
+        if filas:
+            salidas.append(destino)
+        filas_totales += filas
+        print(f"   - Partición {numero}/{len(partes)}: {df['ticker'].nunique()} tickers, {filas} filas")
+    with tramo("publicación cubo tecnico", categoria='escritura', filas_entrada=filas_totales):
+        cubo.cerrar()
+
+    print(f"Guardando resultados en '{ARCHIVO_DE_SALIDA}'...")
+    with tramo("escritura CSV tecnico", categoria='escritura', filas_entrada=filas_totales):
+        _unir_particiones(salidas, ARCHIVO_DE_SALIDA)
+    FILAS_ESCRITAS.incrementar('database_maestra_tecnica', valor=filas_totales)
+    print(f"\n--- ¡PROCESO COMPLETADO CON ÉXITO! ({filas_totales} filas) ---")
+
+def main(reanudar=False):
     print("--- INICIANDO MOTOR CÓNDOR v4.2 (Procesador Maestro) ---")
     if not os.path.exists(ARCHIVO_DE_ENTRADA):
         print(f"!! ERROR: El archivo de entrada '{ARCHIVO_DE_ENTRADA}' no se encontró.")
         return
     try:
-        df_input = pd.read_csv(ARCHIVO_DE_ENTRADA, delimiter=';')
-        df_limpio = limpiar_y_estandarizar(df_input)
+        with tramo("lectura CSV acciones_master", categoria='lectura') as medicion:
+            df_input = pd.read_csv(ARCHIVO_DE_ENTRADA, delimiter=';')
+            medicion['filas_salida'] = len(df_input)
+        with tramo("limpieza", filas_entrada=len(df_input)) as medicion:
+            df_limpio = limpiar_y_estandarizar(df_input)
+            medicion['filas_salida'] = 0 if df_limpio is None else len(df_limpio)
         if df_limpio is not None:
-            df_final = calcular_indicadores_y_senales(df_limpio)
+            with tramo("cálculo de indicadores", categoria='indicadores', filas_entrada=len(df_limpio)) as medicion:
+                df_final = calcular_indicadores_con_checkpoints(df_limpio, reanudar)
+                medicion['filas_salida'] = len(df_final)
             print(f"Guardando resultados en '{ARCHIVO_DE_SALIDA}'...")
-            df_final.to_csv(ARCHIVO_DE_SALIDA, index=False, decimal=',', sep=';')
+            with tramo("escritura CSV tecnico", categoria='escritura', filas_entrada=len(df_final)):
+                df_final.to_csv(ARCHIVO_DE_SALIDA, index=False, decimal=',', sep=';')
+            FILAS_ESCRITAS.incrementar('database_maestra_tecnica', valor=len(df_final))
+            with tramo("escritura cubo tecnico", categoria='escritura', filas_entrada=len(df_final)):
+                construir_cubo(df_final)
+            print(f"Cubo técnico (memmap) guardado en '{config.DIRECTORIO_CUBO_TECNICO}'")
+            CheckpointTickers('indicadores').limpiar()
             print(f"\n--- ¡PROCESO COMPLETADO CON ÉXITO! ---")
     except Exception as e:
         print(f"\n!! Ocurrió un error inesperado: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if '--streaming' in sys.argv:
+        main_streaming()
+    else:
+        main(reanudar='--resume' in sys.argv)
\ No newline at end of file
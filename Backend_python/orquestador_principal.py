@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 """
 Orquestador Principal del Proyecto Agente Cóndor Andino
-Ejecuta todo el flujo de trabajo de análisis bursátil de forma secuencial
+Ejecuta todo el flujo de trabajo de análisis bursátil como un grafo de etapas (DAG):
+cada etapa declara sus archivos de entrada y salida, y las etapas independientes corren en paralelo
 """
 
 import os
 import sys
 import time
+import signal
+import argparse
+import functools
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
+from zoneinfo import ZoneInfo
 
 # Agregar la raíz del proyecto al path
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -18,8 +24,16 @@ if ROOT not in sys.path:
     sys.path.append(ROOT)
 
 import config
+from Backend_python.huellas import calcular_huella, cargar_registro, etapa_al_dia, guardar_registro, registrar_exito
+from Backend_python import checkpoints
+from Backend_python import instrumentacion
+from Backend_python.instrumentacion import tramo
+from Backend_python import metricas
 
-def ejecutar_etapa_1_descarga():
+# Estados de etapa que habilitan a sus dependientes
+ETAPA_OK = ('exitosa', 'al_dia')
+
+def ejecutar_etapa_1_descarga(reanudar=False):
     """Etapa 1: Descarga de datos de acciones chilenas"""
     print("\n" + "="*60)
     print("ETAPA 1: DESCARGA DE DATOS DE ACCIONES CHILENAS")
@@ -27,7 +41,7 @@ def ejecutar_etapa_1_descarga():
     
     try:
         from Backend_python.descargar_acciones import main as descargar_acciones
-        descargar_acciones()
+        descargar_acciones(reanudar=reanudar)
         
         if os.path.exists(config.ARCHIVO_ACCIONES_MASTER):
             df = pd.read_csv(config.ARCHIVO_ACCIONES_MASTER, sep=';', decimal=',')
@@ -40,7 +54,28 @@ def ejecutar_etapa_1_descarga():
         print(f"✗ Error en descarga de acciones: {e}")
         return False
 
-def ejecutar_etapa_2_enriquecimiento():
+def ejecutar_etapa_descarga_macro():
+    """Etapa 1B: Descarga de datos macroeconómicos (independiente de las acciones)"""
+    print("\n" + "="*60)
+    print("ETAPA 1B: DESCARGA DE DATOS MACROECONÓMICOS")
+    print("="*60)
+    
+    try:
+        from Backend_python.descargar_datos import descargar_datos_macro
+        descargar_datos_macro()
+        
+        if os.path.exists(config.ARCHIVO_MACRO):
+            df = pd.read_csv(config.ARCHIVO_MACRO, sep=';', decimal=',')
+            print(f"✓ Datos macro descargados exitosamente: {len(df)} registros")
+            return True
+        else:
+            print("✗ Error: No se generó el archivo macro")
+            return False
+    except Exception as e:
+        print(f"✗ Error en descarga macro: {e}")
+        return False
+
+def ejecutar_etapa_2_enriquecimiento(reanudar=False):
     """Etapa 2: Enriquecimiento técnico con indicadores"""
     print("\n" + "="*60)
     print("ETAPA 2: ENRIQUECIMIENTO TÉCNICO")
@@ -48,7 +83,7 @@ def ejecutar_etapa_2_enriquecimiento():
     
     try:
         from Backend_python.motor_condor import main as motor_condor
-        motor_condor()
+        motor_condor(reanudar=reanudar)
         
         if os.path.exists(config.ARCHIVO_TECNICO):
             df = pd.read_csv(config.ARCHIVO_TECNICO, sep=';', decimal=',')
@@ -81,15 +116,15 @@ def ejecutar_etapa_3_fundamental():
         print(f"✗ Error en verificación de datos fundamentales: {e}")
         return False
 
-def ejecutar_etapa_4_perfilamiento():
-    """Etapa 4: Perfilamiento y clustering"""
+def ejecutar_etapa_4_perfilamiento(df_tecnico=None):
+    """Etapa 4: Perfilamiento y clustering (`df_tecnico`: base técnica en memoria del modo daemon)"""
     print("\n" + "="*60)
     print("ETAPA 4: PERFILAMIENTO Y CLUSTERING")
     print("="*60)
     
     try:
         from Backend_python.generar_perfiles_de_acciones import main as generar_perfiles
-        generar_perfiles()
+        generar_perfiles(df_tecnico=df_tecnico)
         
         if os.path.exists(config.ARCHIVO_PERFILES):
             df = pd.read_csv(config.ARCHIVO_PERFILES, sep=';', decimal=',')
@@ -102,15 +137,15 @@ def ejecutar_etapa_4_perfilamiento():
         print(f"✗ Error en perfilamiento: {e}")
         return False
 
-def ejecutar_etapa_5_fusion():
-    """Etapa 5: Fusión estratégica y detección de oportunidades"""
+def ejecutar_etapa_5_fusion(df_tecnico=None):
+    """Etapa 5: Fusión estratégica y detección de oportunidades (`df_tecnico`: como en la etapa 4)"""
     print("\n" + "="*60)
     print("ETAPA 5: FUSIÓN ESTRATÉGICA")
     print("="*60)
     
     try:
         from Backend_python.analisis_fusion import main as analisis_fusion
-        analisis_fusion()
+        analisis_fusion(df_tecnico=df_tecnico)
         
         if os.path.exists(config.ARCHIVO_OPORTUNIDADES):
             df = pd.read_csv(config.ARCHIVO_OPORTUNIDADES, sep=';', decimal=',')
@@ -123,6 +158,156 @@ def ejecutar_etapa_5_fusion():
         print(f"✗ Error en fusión estratégica: {e}")
         return False
 
+# Definición del pipeline: las dependencias se deducen de las entradas y salidas declaradas
+# (una etapa depende de la que produce alguno de sus archivos de entrada). 'codigo' y 'config'
+# alimentan la huella que permite omitir etapas al día; las descargas dependen de datos remotos
+# y por eso no son cacheables. Las etapas 'reanudables' guardan checkpoints por ticker.
+def construir_etapas():
+    """Lista de etapas con las rutas vigentes de config (se reconstruye si config.py se recarga)"""
+    return [
+        {'id': 'descarga', 'nombre': 'Descarga de datos', 'funcion': ejecutar_etapa_1_descarga,
+         'entradas': [config.CSV_ACCIONES], 'salidas': [config.ARCHIVO_ACCIONES_MASTER],
+         'cacheable': False, 'reanudable': True},
+        {'id': 'macro', 'nombre': 'Descarga de datos macro', 'funcion': ejecutar_etapa_descarga_macro,
+         'entradas': [], 'salidas': [config.ARCHIVO_MACRO],
+         'cacheable': False},
+        {'id': 'fundamental', 'nombre': 'Verificación de datos fundamentales', 'funcion': ejecutar_etapa_3_fundamental,
+         'entradas': [], 'salidas': [config.CSV_FUNDAMENTAL],
+         'cacheable': True, 'codigo': ['Backend_python/orquestador_principal.py']},
+        {'id': 'enriquecimiento', 'nombre': 'Enriquecimiento técnico', 'funcion': ejecutar_etapa_2_enriquecimiento,
+         'entradas': [config.ARCHIVO_ACCIONES_MASTER],
+         'salidas': [config.ARCHIVO_TECNICO, os.path.join(config.DIRECTORIO_CUBO_TECNICO, 'indice.json')],
+         'cacheable': True, 'reanudable': True, 'codigo': ['Backend_python/motor_condor.py']},
+        {'id': 'perfilamiento', 'nombre': 'Perfilamiento', 'funcion': ejecutar_etapa_4_perfilamiento,
+         'entradas': [config.ARCHIVO_TECNICO, config.CSV_ACCIONES], 'salidas': [config.ARCHIVO_PERFILES, config.MODELO_PERFILES],
+         'cacheable': True, 'codigo': ['Backend_python/generar_perfiles_de_acciones.py'],
+         'config': ['NUMERO_DE_CLUSTERS', 'UMBRAL_DERIVA_PERFILES']},
+        {'id': 'fusion', 'nombre': 'Fusión estratégica', 'funcion': ejecutar_etapa_5_fusion,
+         'entradas': [config.ARCHIVO_TECNICO, config.CSV_FUNDAMENTAL], 'salidas': [config.ARCHIVO_OPORTUNIDADES],
+         'cacheable': True, 'codigo': ['Backend_python/analisis_fusion.py']},
+    ]
+
+ETAPAS = construir_etapas()
+
+# Etapas que el modo daemon re-ejecuta en cada ciclo, después de la actualización incremental
+ETAPAS_DAEMON = ('fundamental', 'perfilamiento', 'fusion')
+# Etapas del daemon que reciben la base técnica en memoria en vez de leer el CSV
+ETAPAS_CON_TECNICO = ('perfilamiento', 'fusion')
+
+def resolver_dependencias(etapas):
+    """Retorna {id_etapa: [ids de las etapas que producen sus entradas]}"""
+    productores = {}
+    for etapa in etapas:
+        for salida in etapa['salidas']:
+            productores[salida] = etapa['id']
+    return {
+        etapa['id']: sorted({productores[e] for e in etapa['entradas'] if productores.get(e, etapa['id']) != etapa['id']})
+        for etapa in etapas
+    }
+
+def _ejecutar_etapa(etapa, registro, forzar=False, reanudar=False):
+    """
+    Ejecuta una etapa aislando sus fallos, salvo que esté al día según su huella o que ya se haya
+    completado en la corrida que se está reanudando.
+    Retorna (exito, duracion_segundos, huella, al_dia)
+    """
+    inicio = time.time()
+    if reanudar and checkpoints.etapa_completada(etapa):
+        print(f"♻️  {etapa['nombre']}: completada en la corrida anterior; se omite")
+        return True, time.time() - inicio, None, True
+    huella = calcular_huella(etapa) if etapa.get('cacheable') else None
+    if huella is not None and not forzar and etapa_al_dia(etapa, huella, registro):
+        print(f"⏩ {etapa['nombre']}: entradas, código y configuración sin cambios; se omite")
+        checkpoints.registrar_etapa(etapa)
+        return True, time.time() - inicio, huella, True
+    with tramo(etapa['nombre'], categoria='etapa', perfilar=True) as medicion:
+        try:
+            if etapa.get('reanudable'):
+                exito = bool(etapa['funcion'](reanudar=reanudar))
+            else:
+                exito = bool(etapa['funcion']())
+        except Exception as e:
+            print(f"✗ Error crítico en {etapa['nombre']}: {e}")
+            exito = False
+        medicion['exito'] = exito
+    if exito:
+        checkpoints.registrar_etapa(etapa)
+    return exito, time.time() - inicio, huella, False
+
+def ejecutar_dag(etapas, max_paralelo=None, forzar=False, reanudar=False):
+    """
+    Ejecuta las etapas respetando dependencias: cada etapa parte apenas terminan con éxito todas las
+    que producen sus entradas. Si una etapa falla, sus descendientes se omiten y el resto continúa.
+    Las etapas cacheables cuya huella coincide con su última ejecución exitosa no se re-ejecutan
+    (salvo con `forzar`). Con `reanudar`, las etapas completadas en la corrida fallida anterior se
+    saltan y las reanudables continúan desde sus checkpoints por ticker.
+    Retorna (estados, duraciones), con estados en {'exitosa', 'al_dia', 'fallida', 'omitida'}.
+    """
+    dependencias = resolver_dependencias(etapas)
+    por_id = {etapa['id']: etapa for etapa in etapas}
+    estados = {etapa['id']: 'pendiente' for etapa in etapas}
+    duraciones = {}
+    max_paralelo = max_paralelo or config.MAX_ETAPAS_PARALELAS
+    registro = cargar_registro()
+    if not reanudar:
+        checkpoints.reiniciar_etapas()
+    
+    with ThreadPoolExecutor(max_workers=max_paralelo) as pool:
+        en_curso = {}
+        while True:
+            # Propagar omisiones hasta un punto fijo (descendientes de etapas fallidas u omitidas)
+            hubo_cambios = True
+            while hubo_cambios:
+                hubo_cambios = False
+                for id_etapa, deps in dependencias.items():
+                    if estados[id_etapa] == 'pendiente' and any(estados[d] in ('fallida', 'omitida') for d in deps):
+                        estados[id_etapa] = 'omitida'
+                        hubo_cambios = True
+                        print(f"⏭️  Etapa omitida por dependencia fallida: {por_id[id_etapa]['nombre']}")
+            
+            listas = [i for i, deps in dependencias.items()
+                      if estados[i] == 'pendiente' and all(estados[d] in ETAPA_OK for d in deps)]
+            for id_etapa in listas:
+                estados[id_etapa] = 'en_curso'
+                en_curso[pool.submit(_ejecutar_etapa, por_id[id_etapa], registro, forzar, reanudar)] = id_etapa
+            
+            if not en_curso:
+                break
+            terminadas, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminadas:
+                id_etapa = en_curso.pop(futuro)
+                exito, duraciones[id_etapa], huella, al_dia = futuro.result()
+                metricas.DURACION_ETAPA.fijar(id_etapa, valor=duraciones[id_etapa])
+                metricas.ESTADO_ETAPA.fijar(id_etapa, valor=int(exito or al_dia))
+                if al_dia:
+                    estados[id_etapa] = 'al_dia'
+                elif exito:
+                    estados[id_etapa] = 'exitosa'
+                    if huella is not None:
+                        registrar_exito(por_id[id_etapa], huella, registro, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                        guardar_registro(registro)
+                else:
+                    estados[id_etapa] = 'fallida'
+                    registro.pop(id_etapa, None)
+    
+    # Lo que quede pendiente tiene dependencias circulares
+    for id_etapa, estado in estados.items():
+        if estado == 'pendiente':
+            estados[id_etapa] = 'omitida'
+            print(f"⏭️  Etapa omitida por dependencia circular: {por_id[id_etapa]['nombre']}")
+    return estados, duraciones
+
+def calcular_ruta_critica(etapas, duraciones):
+    """Duración del camino más largo del DAG (cota inferior del tiempo total con paralelismo ilimitado)"""
+    dependencias = resolver_dependencias(etapas)
+    fin = {}
+    def tiempo_fin(id_etapa, visitando=()):
+        if id_etapa not in fin:
+            previas = [tiempo_fin(d, visitando + (id_etapa,)) for d in dependencias[id_etapa] if d not in visitando]
+            fin[id_etapa] = duraciones.get(id_etapa, 0.0) + max(previas, default=0.0)
+        return fin[id_etapa]
+    return max((tiempo_fin(etapa['id']) for etapa in etapas), default=0.0)
+
 def generar_resumen_ejecutivo():
     """Genera un resumen ejecutivo de todos los resultados"""
     print("\n" + "="*60)
@@ -153,26 +338,27 @@ def generar_resumen_ejecutivo():
     
     return archivos_generados
 
-def crear_visualizacion_general():
-    """Crea una visualización general de los resultados"""
+def crear_visualizacion_general(preview=False):
+    """Crea una visualización general de los resultados (paneles cacheados en disco)"""
     print("\n" + "="*60)
     print("GENERANDO VISUALIZACIÓN GENERAL")
     print("="*60)
     
     try:
-        # Crear figura con subplots
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-        fig.suptitle('Resumen General - Agente Cóndor Andino', fontsize=16, fontweight='bold')
+        from Backend_python.cache_graficos import renderizar_dashboard
+        
+        vacio = {'tipo': 'vacio'}
         
         # 1. Distribución de perfiles de acciones
+        panel1 = vacio
         if os.path.exists(config.ARCHIVO_PERFILES):
             df_perfiles = pd.read_csv(config.ARCHIVO_PERFILES, sep=';', decimal=',')
             if 'personalidad' in df_perfiles.columns:
-                perfiles_count = df_perfiles['personalidad'].value_counts()
-                axes[0, 0].pie(perfiles_count.values, labels=perfiles_count.index, autopct='%1.1f%%')
-                axes[0, 0].set_title('Distribución de Perfiles de Acciones')
+                panel1 = {'tipo': 'pie', 'datos': df_perfiles['personalidad'].value_counts(),
+                          'titulo': 'Distribución de Perfiles de Acciones'}
         
         # 2. Oportunidades por sector
+        panel2 = vacio
         if os.path.exists(config.ARCHIVO_OPORTUNIDADES):
             df_oportunidades = pd.read_csv(config.ARCHIVO_OPORTUNIDADES, sep=';', decimal=',')
             if 'ticker' in df_oportunidades.columns:
@@ -180,73 +366,82 @@ def crear_visualizacion_general():
                 df_acciones = pd.read_csv(config.CSV_ACCIONES)
                 df_oportunidades = pd.merge(df_oportunidades, df_acciones, left_on='ticker', right_on='NEMOTECNICO', how='left')
                 if 'INDUSTRIA' in df_oportunidades.columns:
-                    sector_count = df_oportunidades['INDUSTRIA'].value_counts()
-                    sector_count.plot(kind='bar', ax=axes[0, 1])
-                    axes[0, 1].set_title('Oportunidades por Sector')
-                    axes[0, 1].tick_params(axis='x', rotation=45)
+                    panel2 = {'tipo': 'bar', 'datos': df_oportunidades['INDUSTRIA'].value_counts(),
+                              'titulo': 'Oportunidades por Sector', 'opciones': {'rotacion': 45}}
         
         # 3. RSI promedio por ticker (últimos datos)
+        panel3 = vacio
         if os.path.exists(config.ARCHIVO_TECNICO):
-            df_tecnico = pd.read_csv(config.ARCHIVO_TECNICO, sep=';', decimal=',')
+            df_tecnico = pd.read_csv(config.ARCHIVO_TECNICO, sep=';', decimal=',', usecols=lambda c: c in ('ticker', 'rsi_14'))
             if 'rsi_14' in df_tecnico.columns and 'ticker' in df_tecnico.columns:
                 rsi_promedio = df_tecnico.groupby('ticker')['rsi_14'].mean().sort_values(ascending=False)
-                rsi_promedio.head(10).plot(kind='bar', ax=axes[1, 0])
-                axes[1, 0].set_title('RSI Promedio por Ticker (Top 10)')
-                axes[1, 0].tick_params(axis='x', rotation=45)
+                panel3 = {'tipo': 'bar', 'datos': rsi_promedio.head(10),
+                          'titulo': 'RSI Promedio por Ticker (Top 10)', 'opciones': {'rotacion': 45}}
         
         # 4. Salud financiera de las acciones
+        panel4 = vacio
         if os.path.exists(config.CSV_FUNDAMENTAL):
             df_fundamental = pd.read_csv(config.CSV_FUNDAMENTAL, sep=';', decimal=',')
             if 'salud_financiera' in df_fundamental.columns:
-                salud_count = df_fundamental['salud_financiera'].value_counts()
-                salud_count.plot(kind='bar', ax=axes[1, 1], color=['green', 'orange', 'red'])
-                axes[1, 1].set_title('Distribución de Salud Financiera')
-                axes[1, 1].tick_params(axis='x', rotation=45)
+                panel4 = {'tipo': 'bar', 'datos': df_fundamental['salud_financiera'].value_counts(),
+                          'titulo': 'Distribución de Salud Financiera',
+                          'opciones': {'plot': {'color': ['green', 'orange', 'red']}, 'rotacion': 45}}
         
-        plt.tight_layout()
-        plt.savefig('output/resumen_general_agente_condor.png', dpi=300, bbox_inches='tight')
-        print("✓ Visualización guardada como 'output/resumen_general_agente_condor.png'")
+        destino = 'output/resumen_general_agente_condor_preview.png' if preview else 'output/resumen_general_agente_condor.png'
+        destino, dibujados = renderizar_dashboard(
+            [panel1, panel2, panel3, panel4], destino, columnas=2, tamano_total=(15, 12),
+            titulo='Resumen General - Agente Cóndor Andino', preview=preview)
+        print(f"✓ Visualización guardada como '{destino}' ({4 - dibujados} de 4 paneles desde caché)")
         
     except Exception as e:
         print(f"✗ Error al generar visualización: {e}")
 
-def main():
+def main(forzar=False, reanudar=False, traza=False, traza_chrome=False, cprofile=False, memoria=False, exportar_metricas=False,
+         preview=False):
     """Función principal que ejecuta todo el flujo de trabajo"""
     print("🚀 INICIANDO AGENTE CÓNDOR ANDINO - ANÁLISIS BURSÁTIL COMPLETO")
     print(f"📅 Fecha de ejecución: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     inicio_tiempo = time.time()
+    if traza or traza_chrome or cprofile or memoria:
+        instrumentacion.activar(instrumentacion.Traza(cprofile=cprofile, memoria=memoria))
     
-    # Ejecutar todas las etapas
-    etapas = [
-        ("Descarga de datos", ejecutar_etapa_1_descarga),
-        ("Enriquecimiento técnico", ejecutar_etapa_2_enriquecimiento),
-        ("Verificación de datos fundamentales", ejecutar_etapa_3_fundamental),
-        ("Perfilamiento", ejecutar_etapa_4_perfilamiento),
-        ("Fusión estratégica", ejecutar_etapa_5_fusion)
-    ]
-    
-    etapas_exitosas = 0
-    for nombre, funcion in etapas:
-        try:
-            if funcion():
-                etapas_exitosas += 1
-            time.sleep(1)  # Pausa entre etapas
-        except Exception as e:
-            print(f"✗ Error crítico en {nombre}: {e}")
+    # Ejecutar todas las etapas según el grafo de dependencias
+    etapas = ETAPAS
+    estados, duraciones = ejecutar_dag(etapas, forzar=forzar, reanudar=reanudar)
+    etapas_exitosas = sum(1 for estado in estados.values() if estado in ETAPA_OK)
+    if etapas_exitosas == len(etapas):
+        checkpoints.limpiar_todo()
     
     # Generar resumen y visualización
-    archivos_generados = generar_resumen_ejecutivo()
-    crear_visualizacion_general()
+    with tramo("resumen ejecutivo", categoria='resumen'):
+        archivos_generados = generar_resumen_ejecutivo()
+    with tramo("visualización general", categoria='visualizacion'):
+        crear_visualizacion_general(preview=preview)
     
     tiempo_total = time.time() - inicio_tiempo
+    metricas.ULTIMA_CORRIDA.fijar(valor=time.time())
     
     print("\n" + "="*60)
     print("RESUMEN FINAL")
     print("="*60)
     print(f"✓ Etapas completadas exitosamente: {etapas_exitosas}/{len(etapas)}")
+    for etapa in etapas:
+        duracion = duraciones.get(etapa['id'])
+        detalle = f" ({duracion:.2f} s)" if duracion is not None else ""
+        print(f"   - {etapa['nombre']}: {estados[etapa['id']]}{detalle}")
     print(f"✓ Archivos generados: {len(archivos_generados)}")
     print(f"⏱️  Tiempo total de ejecución: {tiempo_total:.2f} segundos")
+    print(f"   Ruta crítica: {calcular_ruta_critica(etapas, duraciones):.2f} s | Suma de etapas: {sum(duraciones.values()):.2f} s")
+    
+    traza_activa = instrumentacion.desactivar()
+    if traza_activa is not None:
+        traza_activa.imprimir_resumen()
+        print(f"📄 Traza guardada en {traza_activa.exportar_json()}")
+        if traza_chrome:
+            print(f"📄 Traza Chrome guardada en {traza_activa.exportar_chrome()}")
+    if exportar_metricas:
+        print(f"📈 Métricas guardadas en {metricas.REGISTRO.escribir_archivo()}")
     
     if etapas_exitosas == len(etapas):
         print("\n🎉 ¡PROCESO COMPLETADO CON ÉXITO!")
@@ -254,7 +449,184 @@ def main():
         print("🔍 Revisa los archivos CSV generados y la visualización PNG.")
     else:
         print(f"\n⚠️  PROCESO COMPLETADO CON ADVERTENCIAS")
-        print(f"   {len(etapas) - etapas_exitosas} etapas fallaron.")
+        print(f"   {len(etapas) - etapas_exitosas} etapas fallaron o se omitieron.")
+        print("   Corrige el problema y usa --resume para continuar donde quedó la corrida.")
+
+# Módulos con constantes tomadas de config al importarse; se recargan junto con config.py
+# (en orden de dependencia: los que otros importan con `from ... import` van primero)
+MODULOS_RECARGABLES = (
+    'Backend_python.huellas',
+    'Backend_python.checkpoints',
+    'Backend_python.instrumentacion',
+    'Backend_python.metricas',
+    'Backend_python.base_tecnica',
+    'Backend_python.cubo_tecnico',
+    'Backend_python.descargar_acciones',
+    'Backend_python.descargar_datos',
+    'Backend_python.motor_condor',
+    'Backend_python.generar_perfiles_de_acciones',
+    'Backend_python.analisis_fusion',
+)
+
+def recargar_configuracion():
+    """Recarga config.py y los módulos del pipeline ya importados que copian sus valores"""
+    importlib.reload(config)
+    for nombre in MODULOS_RECARGABLES:
+        if nombre in sys.modules:
+            importlib.reload(sys.modules[nombre])
+
+def en_horario_mercado(ahora=None):
+    """True si `ahora` (por defecto, la hora actual de Santiago) cae dentro de una rueda bursátil"""
+    ahora = ahora or datetime.now(ZoneInfo(config.ZONA_HORARIA_MERCADO))
+    apertura, cierre = (datetime.strptime(hora, '%H:%M').time() for hora in config.HORARIO_MERCADO)
+    return ahora.weekday() in config.DIAS_MERCADO and apertura <= ahora.time() <= cierre
+
+def _claves_oportunidades():
+    if not os.path.exists(config.ARCHIVO_OPORTUNIDADES):
+        return set()
+    df = pd.read_csv(config.ARCHIVO_OPORTUNIDADES, sep=';', decimal=',', usecols=['date', 'ticker'])
+    return set(zip(df['date'].astype(str), df['ticker'].astype(str)))
+
+def ejecutar_ciclo_incremental(estado, etapas):
+    """
+    Un ciclo del daemon: descarga solo las barras nuevas, recalcula los indicadores de los tickers
+    que cambiaron (master y base técnica se mantienen en memoria en `estado` entre ciclos) y
+    re-ejecuta las etapas posteriores, que se omiten por huella si nada cambió; perfilamiento y
+    fusión trabajan sobre la base técnica en memoria, sin volver a leer el CSV.
+    Retorna la lista de oportunidades (fecha, ticker) nuevas.
+    """
+    from Backend_python import descargar_acciones, motor_condor
+    
+    with tramo("descarga incremental", categoria='etapa'):
+        estado['master'], cambiados = descargar_acciones.actualizar_master_incremental(estado.get('master'))
+    print(f"📥 Tickers con barras nuevas: {len(cambiados)}")
+    if cambiados:
+        with tramo("enriquecimiento incremental", categoria='etapa'):
+            estado['tecnico'] = motor_condor.actualizar_indicadores_incremental(estado['master'], cambiados, estado.get('tecnico'))
+        # La base técnica queda igual a la de una corrida completa: se registra su huella para que
+        # una corrida normal posterior no recalcule el enriquecimiento
+        registro = cargar_registro()
+        for etapa in etapas:
+            if etapa['id'] == 'enriquecimiento':
+                registrar_exito(etapa, calcular_huella(etapa), registro, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        guardar_registro(registro)
+    
+    previas = _claves_oportunidades()
+    etapas_ciclo = []
+    for etapa in etapas:
+        if etapa['id'] not in ETAPAS_DAEMON:
+            continue
+        if etapa['id'] in ETAPAS_CON_TECNICO and estado.get('tecnico') is not None:
+            etapa = dict(etapa, funcion=functools.partial(etapa['funcion'], df_tecnico=estado['tecnico']))
+        etapas_ciclo.append(etapa)
+    estados, _ = ejecutar_dag(etapas_ciclo)
+    fallidas = [id_etapa for id_etapa, estado_etapa in estados.items() if estado_etapa not in ETAPA_OK]
+    if fallidas:
+        print(f"⚠️  Etapas con problemas en el ciclo: {', '.join(fallidas)}")
+    return sorted(_claves_oportunidades() - previas)
+
+def ejecutar_daemon(intervalo_minutos=None, solo_horario_mercado=True, traza=False, traza_chrome=False, exportar_metricas=False):
+    """
+    Modo daemon: un solo proceso que ejecuta ciclos incrementales cada `intervalo_minutos` durante
+    el horario de mercado (más un ciclo final tras el cierre). SIGINT/SIGTERM terminan el ciclo en
+    curso y salen limpiamente; si config.py cambia se recarga antes del siguiente ciclo.
+    """
+    detener = threading.Event()
+    def solicitar_detencion(signum, frame):
+        print(f"\n🛑 Señal {signal.Signals(signum).name} recibida: se detendrá al terminar el ciclo en curso")
+        detener.set()
+    previos = {sig: signal.signal(sig, solicitar_detencion) for sig in (signal.SIGINT, signal.SIGTERM)}
+    
+    path_config = os.path.join(ROOT, 'config.py')
+    mtime_config = os.path.getmtime(path_config)
+    estado = {}
+    etapas = construir_etapas()
+    if not (os.path.exists(config.ARCHIVO_ACCIONES_MASTER) and os.path.exists(config.ARCHIVO_TECNICO)):
+        print("-> Sin datos previos: se ejecuta el pipeline completo antes del primer ciclo")
+        ejecutar_dag(etapas)
+    
+    estaba_abierto = False
+    try:
+        while not detener.is_set():
+            intervalo = (intervalo_minutos or config.INTERVALO_DAEMON_MINUTOS) * 60
+            inicio = time.time()
+            if os.path.getmtime(path_config) != mtime_config:
+                mtime_config = os.path.getmtime(path_config)
+                print("🔁 config.py cambió: recargando configuración")
+                try:
+                    recargar_configuracion()
+                    etapas = construir_etapas()
+                    estado.clear()
+                except Exception as e:
+                    print(f"✗ No se pudo recargar config.py, se mantiene la anterior: {e}")
+            
+            abierto = en_horario_mercado() or not solo_horario_mercado
+            if abierto or estaba_abierto:
+                print(f"\n🔄 Ciclo incremental {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                      f"{'' if abierto else ' (cierre de mercado)'}")
+                if traza or traza_chrome:
+                    instrumentacion.activar(instrumentacion.Traza())
+                try:
+                    nuevas = ejecutar_ciclo_incremental(estado, etapas)
+                    if nuevas:
+                        print(f"🎯 Oportunidades nuevas: {', '.join(f'{ticker} ({fecha})' for fecha, ticker in nuevas)}")
+                except Exception as e:
+                    # Un ciclo fallido no detiene el daemon; el siguiente parte de los archivos en disco
+                    print(f"✗ Error en el ciclo: {e}")
+                    estado.clear()
+                traza_activa = instrumentacion.desactivar()
+                if traza_activa is not None:
+                    traza_activa.exportar_json()
+                    if traza_chrome:
+                        traza_activa.exportar_chrome()
+                metricas.ULTIMA_CORRIDA.fijar(valor=time.time())
+                if exportar_metricas:
+                    metricas.REGISTRO.escribir_archivo()
+                print(f"✓ Ciclo completado en {time.time() - inicio:.2f} s")
+            estaba_abierto = abierto
+            detener.wait(max(0.0, intervalo - (time.time() - inicio)))
+    finally:
+        for sig, manejador in previos.items():
+            signal.signal(sig, manejador)
+    print("👋 Daemon detenido")
+
+def parsear_argumentos():
+    parser = argparse.ArgumentParser(description="Orquestador del Agente Cóndor Andino")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-ejecuta todas las etapas aunque sus huellas indiquen que están al día")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reanuda la última corrida fallida desde sus checkpoints de etapas y tickers")
+    parser.add_argument('--traza', action='store_true',
+                        help="Mide cada etapa y sub-paso y guarda una traza JSON en output/trazas/")
+    parser.add_argument('--traza-chrome', action='store_true',
+                        help="Además exporta la traza en formato de eventos de Chrome (implica --traza)")
+    parser.add_argument('--cprofile', action='store_true',
+                        help="Guarda un perfil cProfile (.prof) por etapa (implica --traza)")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="Registra el pico de memoria Python por etapa con tracemalloc (implica --traza)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Queda en ejecución y refresca incrementalmente durante el horario de mercado")
+    parser.add_argument('--intervalo', type=float, default=None,
+                        help="Minutos entre ciclos del daemon (por defecto INTERVALO_DAEMON_MINUTOS)")
+    parser.add_argument('--sin-horario', action='store_true',
+                        help="En modo daemon, ejecuta ciclos también fuera del horario de mercado")
+    parser.add_argument('--metricas', action='store_true',
+                        help="Escribe las métricas en formato Prometheus en ARCHIVO_METRICAS al terminar (o tras cada ciclo del daemon)")
+    parser.add_argument('--metricas-puerto', type=int, default=None,
+                        help="Expone las métricas por HTTP en este puerto (/metrics) mientras dure la ejecución")
+    parser.add_argument('--preview', action='store_true',
+                        help="Genera la visualización general en baja resolución (DPI_PREVIEW), más rápida")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main()
+    args = parsear_argumentos()
+    if args.metricas_puerto:
+        metricas.REGISTRO.servir_http(args.metricas_puerto)
+        print(f"📈 Métricas disponibles en http://localhost:{args.metricas_puerto}/metrics")
+    if args.daemon:
+        ejecutar_daemon(args.intervalo, solo_horario_mercado=not args.sin_horario,
+                        traza=args.traza, traza_chrome=args.traza_chrome, exportar_metricas=args.metricas)
+    else:
+        main(forzar=args.force, reanudar=args.resume, traza=args.traza, traza_chrome=args.traza_chrome,
+             cprofile=args.cprofile, memoria=args.tracemalloc, exportar_metricas=args.metricas,
+             preview=args.preview)
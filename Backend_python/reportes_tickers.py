@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Reportes por ticker en lote: para cada acción del universo genera un PNG con precio, medias
+móviles y RSI, y una página HTML con fundamentales, perfil y oportunidades, más un index.html
+estático que enlaza todos los reportes.
+
+Las tablas se cargan una sola vez en el proceso principal (solo las columnas que usan los
+reportes) y los procesos trabajadores las reciben al iniciarse; con `fork` las comparten en
+memoria sin copiarlas. Los gráficos pasan por el caché de cache_graficos, así que en la corrida
+nocturna solo se redibujan los tickers cuyos datos cambiaron.
+
+Uso:
+    python3 Backend_python/reportes_tickers.py [--procesos N] [--tickers BCI SQM-B] [--preview]
+"""
+
+import argparse
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Cargar config desde la raíz del proyecto
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+import config
+
+from Backend_python.cache_graficos import MAX_ARCHIVOS_CACHE, podar_cache, renderizar_dashboard
+from Backend_python.visualizador_interactivo import COLUMNA_RSI, COLUMNAS_SERIES, VisualizadorCondor
+
+DIRECTORIO_REPORTES = config.DIRECTORIO_REPORTES
+COLUMNAS_FUNDAMENTALES = ['year', 'pe_ratio', 'pb_ratio', 'roe', 'salud_financiera']
+COLUMNAS_OPORTUNIDADES = ['date', 'close', COLUMNA_RSI]
+COLUMNAS_TECNICAS = COLUMNAS_SERIES + ['volume']
+
+ESTILO_HTML = """
+body { font-family: sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #ccc; padding: 4px 10px; text-align: right; }
+th { background: #f0f0f0; }
+td:first-child, th:first-child { text-align: left; }
+img { max-width: 100%; }
+"""
+
+# Visualizador con las tablas ya cargadas, compartido por cada proceso trabajador
+_visualizador = None
+
+
+def _inicializar_trabajador(visualizador):
+    global _visualizador
+    _visualizador = visualizador
+
+
+def precargar(visualizador):
+    """Carga en memoria todo lo que leen los reportes, para que los trabajadores no toquen el disco."""
+    visualizador.tabla('tecnico', COLUMNAS_TECNICAS)
+    visualizador.tabla('fundamental', COLUMNAS_FUNDAMENTALES)
+    visualizador.tabla('perfiles', ['personalidad'])
+    visualizador.tabla('oportunidades', COLUMNAS_OPORTUNIDADES)
+    visualizador.ultimas_barras(COLUMNAS_TECNICAS)
+    return visualizador.info_acciones
+
+
+def _numero(valor, formato):
+    if pd.notna(valor) and isinstance(valor, (int, float, np.number)):
+        return format(valor, formato)
+    return '' if valor is None or (isinstance(valor, float) and np.isnan(valor)) else str(valor)
+
+
+def _tabla_html(df, formatos):
+    if df is None or df.empty:
+        return "<p>Sin datos</p>"
+    df = df.reset_index(drop=True).astype(object)
+    for columna, formato in formatos.items():
+        if columna in df.columns:
+            df[columna] = [_numero(v, formato) for v in df[columna]]
+    return df.to_html(index=False, escape=True, na_rep='')
+
+
+def _pagina(titulo, cuerpo):
+    return (f"<!DOCTYPE html>\n<html lang=\"es\">\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{html.escape(titulo)}</title>\n<style>{ESTILO_HTML}</style>\n</head>\n"
+            f"<body>\n{cuerpo}\n</body>\n</html>\n")
+
+
+def generar_reporte_ticker(ticker, directorio, preview=False):
+    """Genera <ticker>.png y <ticker>.html en `directorio`. Retorna la fila del ticker para el índice."""
+    v = _visualizador
+    info = v.info_acciones.get(ticker) or {}
+
+    imagen = None
+    paneles = v.paneles_series_ticker(ticker)
+    if paneles:
+        imagen, _ = renderizar_dashboard(paneles, os.path.join(directorio, f"{ticker}.png"), columnas=1,
+                                         tamano_total=(14, 4.5 * len(paneles)), preview=preview, procesos=1,
+                                         podar=False)
+
+    ultimas = v.ultimas_barras(COLUMNAS_TECNICAS)
+    ultima = ultimas.loc[ticker] if ultimas is not None and ticker in ultimas.index else {}
+    fundamentales = v.filas_ticker('fundamental', ticker, COLUMNAS_FUNDAMENTALES)
+    perfil = v.filas_ticker('perfiles', ticker, ['personalidad'])
+    oportunidades = v.filas_ticker('oportunidades', ticker, COLUMNAS_OPORTUNIDADES)
+
+    personalidad = perfil.iloc[0].get('personalidad') if perfil is not None and not perfil.empty else None
+    columnas_fund = [c for c in COLUMNAS_FUNDAMENTALES if fundamentales is not None and c in fundamentales.columns]
+    columnas_op = [c for c in COLUMNAS_OPORTUNIDADES if oportunidades is not None and c in oportunidades.columns]
+    n_oportunidades = 0 if oportunidades is None else len(oportunidades)
+
+    cuerpo = [
+        f"<p><a href=\"index.html\">&larr; Todos los tickers</a></p>",
+        f"<h1>{html.escape(ticker)} &mdash; {html.escape(str(info.get('RAZON_SOCIAL', '')))}</h1>",
+        f"<p>Sector: {html.escape(str(info.get('INDUSTRIA', 'N/A')))} &middot; "
+        f"Perfil: {html.escape(str(personalidad or 'N/A'))} &middot; "
+        f"Último cierre: {_numero(ultima.get('close'), ',.2f') or 'N/A'} &middot; "
+        f"RSI: {_numero(ultima.get(COLUMNA_RSI), '.2f') or 'N/A'}</p>",
+        f"<img src=\"{html.escape(os.path.basename(imagen))}\" alt=\"Gráfico de {html.escape(ticker)}\">"
+        if imagen else "<p>Sin datos técnicos</p>",
+        "<h2>💰 Fundamentales</h2>",
+        _tabla_html(fundamentales[columnas_fund] if columnas_fund else None,
+                    {'pe_ratio': '.2f', 'pb_ratio': '.2f', 'roe': '.3f'}),
+        f"<h2>🎯 Oportunidades ({n_oportunidades})</h2>",
+        _tabla_html(oportunidades[columnas_op] if columnas_op else None, {'close': ',.2f', COLUMNA_RSI: '.2f'}),
+    ]
+    with open(os.path.join(directorio, f"{ticker}.html"), 'w', encoding='utf-8') as f:
+        f.write(_pagina(f"Reporte {ticker}", '\n'.join(cuerpo)))
+
+    return {
+        'ticker': ticker,
+        'razon_social': info.get('RAZON_SOCIAL', ''),
+        'sector': info.get('INDUSTRIA', ''),
+        'perfil': personalidad or '',
+        'close': ultima.get('close'),
+        COLUMNA_RSI: ultima.get(COLUMNA_RSI),
+        'oportunidades': n_oportunidades,
+    }
+
+
+def escribir_indice(filas, directorio, fecha):
+    """index.html con una fila por ticker enlazando a su reporte."""
+    lineas = []
+    for fila in sorted(filas, key=lambda f: f['ticker']):
+        ticker = html.escape(fila['ticker'])
+        lineas.append(
+            f"<tr><td><a href=\"{ticker}.html\">{ticker}</a></td><td>{html.escape(str(fila['razon_social']))}</td>"
+            f"<td>{html.escape(str(fila['sector']))}</td><td>{html.escape(str(fila['perfil']))}</td>"
+            f"<td>{_numero(fila['close'], ',.2f')}</td><td>{_numero(fila[COLUMNA_RSI], '.2f')}</td>"
+            f"<td>{fila['oportunidades']}</td></tr>"
+        )
+    cuerpo = (
+        f"<h1>Reportes por ticker - Agente Cóndor Andino</h1>\n<p>Generado: {fecha} &middot; {len(filas)} tickers</p>\n"
+        "<table>\n<tr><th>Ticker</th><th>Razón social</th><th>Sector</th><th>Perfil</th>"
+        "<th>Último cierre</th><th>RSI</th><th>Oportunidades</th></tr>\n" + '\n'.join(lineas) + "\n</table>"
+    )
+    path = os.path.join(directorio, 'index.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(_pagina("Reportes por ticker", cuerpo))
+    return path
+
+
+def generar_reportes(tickers=None, procesos=None, preview=False, directorio=DIRECTORIO_REPORTES):
+    """Genera los reportes de `tickers` (None = todo el universo) en paralelo. Retorna la ruta del índice."""
+    inicio = time.time()
+    visualizador = VisualizadorCondor()
+    info_acciones = precargar(visualizador)
+    if tickers is None:
+        tickers = sorted(set(info_acciones) | set(visualizador.indices.get('tecnico', {})))
+    if not tickers:
+        print("✗ No hay tickers para reportar")
+        return None
+    os.makedirs(directorio, exist_ok=True)
+    procesos = procesos or os.cpu_count() or 1
+    print(f"\n📄 Generando reportes de {len(tickers)} tickers con {procesos} procesos en {directorio}/ ...")
+
+    if procesos > 1 and len(tickers) > 1:
+        sys.stdout.flush()  # con fork, los trabajadores heredarían y repetirían la salida pendiente
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                                 initargs=(visualizador,)) as pool:
+            bloque = max(1, len(tickers) // (procesos * 4))
+            filas = list(pool.map(generar_reporte_ticker, tickers, [directorio] * len(tickers),
+                                  [preview] * len(tickers), chunksize=bloque))
+    else:
+        _inicializar_trabajador(visualizador)
+        filas = [generar_reporte_ticker(ticker, directorio, preview) for ticker in tickers]
+
+    indice = escribir_indice(filas, directorio, time.strftime('%Y-%m-%d %H:%M:%S'))
+    # Cada ticker deja hasta 3 imágenes en caché (2 paneles y el mosaico); se conservan las del lote
+    podar_cache(max_archivos=MAX_ARCHIVOS_CACHE + 3 * len(tickers))
+    print(f"✓ {len(filas)} reportes generados en {time.time() - inicio:.1f} s -> {indice}")
+    return indice
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reportes por ticker (PNG + HTML) para todo el universo")
+    parser.add_argument('--tickers', nargs='+', default=None,
+                        help="Tickers a reportar (por defecto, todos los de CSV/acciones.csv y la base técnica)")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos trabajadores (por defecto, uno por CPU)")
+    parser.add_argument('--preview', action='store_true',
+                        help="Gráficos en baja resolución (DPI_PREVIEW), más rápidos")
+    parser.add_argument('--directorio', default=DIRECTORIO_REPORTES,
+                        help="Directorio de salida (por defecto DIRECTORIO_REPORTES)")
+    args = parser.parse_args()
+    generar_reportes(args.tickers, args.procesos, args.preview, args.directorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -176,6 +176,42 @@ def test_visualizacion():
         print(f"  ✗ Error en visualización: {e}")
         return False
 
+def test_series_visualizador():
+    """Prueba que los gráficos de series (opción 10) usen las columnas que escribe motor_condor"""
+    print("\n📈 Probando series del visualizador...")
+    
+    import tempfile
+    import numpy as np
+    from Backend_python import visualizador_interactivo as vis
+    
+    fuentes = dict(vis.FUENTES)
+    try:
+        with tempfile.TemporaryDirectory() as directorio:
+            # Base técnica mínima con el formato de motor_condor (';', coma decimal, nombres en minúsculas)
+            fechas = pd.date_range('2024-01-01', periods=30, freq='B').strftime('%Y-%m-%d')
+            cierre = np.linspace(100, 130, len(fechas))
+            df = pd.DataFrame({'date': fechas, 'ticker': 'AAA', 'close': cierre, 'volume': 1000.0,
+                               'ema_9': cierre, 'sma_20': cierre - 1, 'sma_50': cierre - 2,
+                               'sma_200': cierre - 3, 'rsi_14': np.linspace(30, 70, len(fechas))})
+            path = os.path.join(directorio, 'database_maestra_tecnica.csv')
+            df.to_csv(path, index=False, sep=';', decimal=',')
+            for nombre in vis.FUENTES:
+                ruta, opciones, clave = vis.FUENTES[nombre]
+                vis.FUENTES[nombre] = (path if nombre == 'tecnico' else os.path.join(directorio, 'no_existe.csv'),
+                                       opciones, clave)
+            
+            paneles = vis.VisualizadorCondor().paneles_series_ticker('AAA')
+            # assert en lugar de retornar False: main() lo reporta como fallo y pytest también
+            esperadas = [['close', 'sma_20', 'sma_50', 'sma_200'], ['rsi_14']]
+            dibujadas = [list(panel['datos'].columns) for panel in paneles]
+            assert dibujadas == esperadas, f"Columnas graficadas {dibujadas}, se esperaban {esperadas}"
+            assert not any(panel['datos'].isna().all().any() for panel in paneles), "Hay series vacías en los paneles"
+            print(f"  ✓ Paneles de precio y RSI con {', '.join(sum(esperadas, []))}")
+        return True
+    finally:
+        vis.FUENTES.clear()
+        vis.FUENTES.update(fuentes)
+
 def main():
     """Función principal de pruebas"""
     print("🧪 INICIANDO PRUEBAS DEL SISTEMA AGENTE CÓNDOR ANDINO")
@@ -188,7 +224,8 @@ def main():
         ("Scripts", test_scripts),
         ("Funcionalidades básicas", test_funcionalidades_basicas),
         ("Yahoo Finance", test_yfinance),
-        ("Visualización", test_visualizacion)
+        ("Visualización", test_visualizacion),
+        ("Series del visualizador", test_series_visualizador)
     ]
     
     resultados = []
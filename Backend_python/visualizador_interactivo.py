@@ -7,9 +7,6 @@ Permite explorar los resultados del análisis de forma sencilla e interactiva
 import os
 import sys
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
 import numpy as np
 
 # Agregar la raíz del proyecto al path
@@ -19,47 +16,168 @@ if ROOT not in sys.path:
 
 import config
 
-# Configurar estilo de matplotlib
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+# matplotlib/seaborn se importan recién al graficar (vía cache_graficos, que fija el backend Agg y
+# el estilo de cada panel), así las consultas de texto arrancan sin ese costo
+
+# Archivos que el visualizador puede cargar: (ruta, opciones de read_csv, columna de ticker)
+FUENTES = {
+    'acciones': (config.CSV_ACCIONES, {}, 'NEMOTECNICO'),
+    'tecnico': (config.ARCHIVO_TECNICO, {'sep': ';', 'decimal': ','}, 'ticker'),
+    'fundamental': (config.ARCHIVO_FUNDAMENTAL_DB, {'sep': ';', 'decimal': ','}, 'ticker'),
+    'perfiles': (config.ARCHIVO_PERFILES, {'sep': ';', 'decimal': ','}, 'ticker'),
+    'oportunidades': (config.ARCHIVO_OPORTUNIDADES, {'sep': ';', 'decimal': ','}, 'ticker'),
+}
+# float32 no representa exactamente volúmenes grandes; esas columnas quedan en float64
+COLUMNAS_FLOAT64 = {'volume'}
+# Nombres de motor_condor (pandas_ta en minúsculas)
+COLUMNA_RSI = 'rsi_14'
+COLUMNAS_MEDIAS = ['sma_20', 'sma_50', 'sma_200']
+# Columnas técnicas de los gráficos de series por ticker
+COLUMNAS_SERIES = ['date', 'close', *COLUMNAS_MEDIAS, COLUMNA_RSI]
+
+def compactar_tipos(df):
+    """Tickers y fechas como categorías (fechas ordenadas, así min/max siguen funcionando) y floats en float32"""
+    for columna in df.columns:
+        if columna == 'ticker':
+            df[columna] = df[columna].astype('category')
+        elif columna == 'date':
+            df[columna] = pd.Categorical(df[columna], categories=sorted(df[columna].dropna().unique()), ordered=True)
+        elif df[columna].dtype == np.float64 and columna not in COLUMNAS_FLOAT64:
+            df[columna] = df[columna].astype(np.float32)
+    return df
+
+def indexar_por_ticker(df, columna='ticker'):
+    """
+    Ordena `df` por ticker (orden estable: dentro de cada ticker se conserva el orden original, p. ej.
+    por fecha) y retorna (df_ordenado, {ticker: slice}, orden) para obtener las filas de un ticker en
+    O(1) como un corte contiguo, sin recorrer la tabla completa. `orden` es la permutación aplicada,
+    necesaria para alinear columnas que se carguen después.
+    """
+    claves = df[columna]
+    if isinstance(claves.dtype, pd.CategoricalDtype):
+        codigos = claves.cat.codes.to_numpy()
+    else:
+        codigos = claves.astype(str).to_numpy()
+    orden = np.argsort(codigos, kind='stable')
+    df = df.iloc[orden].reset_index(drop=True)
+    if df.empty:
+        return df, {}, orden
+    codigos = codigos[orden]
+    cortes = np.flatnonzero(codigos[1:] != codigos[:-1]) + 1
+    inicios = np.concatenate(([0], cortes))
+    fines = np.concatenate((cortes, [len(df)]))
+    nombres = df[columna].iloc[inicios].astype(str).to_numpy()
+    return df, {nombre: slice(int(i), int(f)) for nombre, i, f in zip(nombres, inicios, fines)}, orden
 
 class VisualizadorCondor:
     def __init__(self):
-        self.df_acciones = None
-        self.df_tecnico = None
-        self.df_fundamental = None
-        self.df_perfiles = None
-        self.df_oportunidades = None
+        self.indice_correlaciones = None
+        self.indices = {}
+        self._tablas = {}
+        self._ordenes = {}
+        self._encabezados = {}
+        self._ultimas_barras = None
+        self._info_acciones = None
         self.cargar_datos()
     
     def cargar_datos(self):
-        """Carga todos los archivos de datos generados"""
-        print("📊 Cargando datos del Agente Cóndor...")
-        
-        # Cargar datos de acciones
-        if os.path.exists(config.CSV_ACCIONES):
-            self.df_acciones = pd.read_csv(config.CSV_ACCIONES)
-            print(f"✓ Acciones cargadas: {len(self.df_acciones)}")
-        
-        # Cargar datos técnicos
-        if os.path.exists(config.ARCHIVO_TECNICO):
-            self.df_tecnico = pd.read_csv(config.ARCHIVO_TECNICO, sep=';', decimal=',')
-            print(f"✓ Datos técnicos cargados: {len(self.df_tecnico)}")
-        
-        # Cargar datos fundamentales
-        if os.path.exists(config.ARCHIVO_FUNDAMENTAL_DB):
-            self.df_fundamental = pd.read_csv(config.ARCHIVO_FUNDAMENTAL_DB, sep=';', decimal=',')
-            print(f"✓ Datos fundamentales cargados: {len(self.df_fundamental)}")
-        
-        # Cargar perfiles
-        if os.path.exists(config.ARCHIVO_PERFILES):
-            self.df_perfiles = pd.read_csv(config.ARCHIVO_PERFILES, sep=';', decimal=',')
-            print(f"✓ Perfiles cargados: {len(self.df_perfiles)}")
+        """
+        Verifica qué archivos de datos existen leyendo solo sus encabezados. Cada tabla se carga
+        recién cuando una vista la necesita, y solo con las columnas que esa vista usa.
+        """
+        print("📊 Verificando datos del Agente Cóndor (carga diferida)...")
+        descripciones = {
+            'acciones': 'Acciones', 'tecnico': 'Datos técnicos', 'fundamental': 'Datos fundamentales',
+            'perfiles': 'Perfiles', 'oportunidades': 'Oportunidades',
+        }
+        for nombre, descripcion in descripciones.items():
+            columnas = self.columnas_disponibles(nombre)
+            if columnas is not None:
+                print(f"✓ {descripcion} disponibles: {FUENTES[nombre][0]} ({len(columnas)} columnas)")
+    
+    def columnas_disponibles(self, nombre):
+        """Columnas del archivo de la tabla `nombre` (sin leer sus filas), o None si no existe"""
+        if nombre not in self._encabezados:
+            path, opciones, _ = FUENTES[nombre]
+            self._encabezados[nombre] = (
+                pd.read_csv(path, nrows=0, **opciones).columns.tolist() if os.path.exists(path) else None
+            )
+        return self._encabezados[nombre]
+    
+    def tabla(self, nombre, columnas=None):
+        """
+        Retorna la tabla `nombre` con al menos `columnas` (None = todas) más su columna de ticker.
+        La primera vez lee del disco solo esas columnas; después agrega únicamente las que falten.
+        Retorna None si el archivo no existe.
+        """
+        disponibles = self.columnas_disponibles(nombre)
+        if disponibles is None:
+            return None
+        path, opciones, clave = FUENTES[nombre]
+        pedidas = disponibles if columnas is None else [c for c in disponibles if c in columnas or c == clave]
+        df = self._tablas.get(nombre)
+        faltantes = [c for c in pedidas if df is None or c not in df.columns]
+        if not faltantes:
+            return df
         
-        # Cargar oportunidades
-        if os.path.exists(config.ARCHIVO_OPORTUNIDADES):
-            self.df_oportunidades = pd.read_csv(config.ARCHIVO_OPORTUNIDADES, sep=';', decimal=',')
-            print(f"✓ Oportunidades cargadas: {len(self.df_oportunidades)}")
+        nuevas = pd.read_csv(path, usecols=faltantes, **opciones)
+        if nombre != 'acciones':
+            nuevas = compactar_tipos(nuevas)
+        if df is None:
+            if clave in nuevas.columns:
+                df, self.indices[nombre], self._ordenes[nombre] = indexar_por_ticker(nuevas, clave)
+            else:
+                df = nuevas
+        else:
+            orden = self._ordenes.get(nombre)
+            if orden is not None:
+                nuevas = nuevas.iloc[orden].reset_index(drop=True)
+            df = pd.concat([df, nuevas], axis=1)
+        self._tablas[nombre] = df
+        if nombre == 'tecnico':
+            self._ultimas_barras = None
+        return df
+    
+    # Acceso a las tablas completas (todas las columnas) para código externo
+    df_acciones = property(lambda self: self.tabla('acciones'))
+    df_tecnico = property(lambda self: self.tabla('tecnico'))
+    df_fundamental = property(lambda self: self.tabla('fundamental'))
+    df_perfiles = property(lambda self: self.tabla('perfiles'))
+    df_oportunidades = property(lambda self: self.tabla('oportunidades'))
+    
+    @property
+    def info_acciones(self):
+        """{nemotécnico: fila de CSV/acciones.csv}"""
+        if self._info_acciones is None:
+            df = self.tabla('acciones')
+            self._info_acciones = {} if df is None or 'NEMOTECNICO' not in df.columns else {
+                str(fila['NEMOTECNICO']): fila for fila in df.to_dict('records')
+            }
+        return self._info_acciones
+    
+    def filas_ticker(self, nombre, ticker, columnas=None):
+        """Filas de `ticker` en la tabla `nombre` ('tecnico', 'fundamental', ...) vía su índice"""
+        df = self.tabla(nombre, columnas)
+        if df is None:
+            return None
+        rango = self.indices.get(nombre, {}).get(ticker)
+        return df.iloc[0:0] if rango is None else df.iloc[rango]
+    
+    def en_orden_original(self, nombre, df):
+        """Deshace el ordenamiento por ticker de la tabla `nombre` (para listar filas como en el archivo)"""
+        orden = self._ordenes.get(nombre)
+        return df if orden is None else df.iloc[np.argsort(orden, kind='stable')].reset_index(drop=True)
+    
+    def ultimas_barras(self, columnas=None):
+        """Última barra de cada ticker indexada por ticker; se recalcula solo si la tabla técnica cambió"""
+        df = self.tabla('tecnico', columnas)
+        if df is None or 'tecnico' not in self.indices:
+            return None
+        if self._ultimas_barras is None:
+            rangos = self.indices['tecnico']
+            self._ultimas_barras = df.iloc[[rango.stop - 1 for rango in rangos.values()]]
+            self._ultimas_barras.index = list(rangos)
+        return self._ultimas_barras
     
     def mostrar_resumen_general(self):
         """Muestra un resumen general de todos los datos"""
@@ -67,134 +185,148 @@ class VisualizadorCondor:
         print("📈 RESUMEN GENERAL DEL AGENTE CÓNDOR")
         print("="*60)
         
-        if self.df_acciones is not None:
-            print(f"\n🏢 ACCIONES ANALIZADAS: {len(self.df_acciones)}")
-            print(f"   Sectores: {self.df_acciones['INDUSTRIA'].nunique()}")
-            print(f"   Sectores principales: {', '.join(self.df_acciones['INDUSTRIA'].value_counts().head(3).index)}")
+        # Cada tabla se carga solo con las columnas que usa este resumen
+        df_acciones = self.tabla('acciones', ['INDUSTRIA'])
+        df_tecnico = self.tabla('tecnico', ['date'])
+        df_fundamental = self.tabla('fundamental', ['year', 'salud_financiera'])
+        df_perfiles = self.tabla('perfiles', ['personalidad'])
+        df_oportunidades = self.tabla('oportunidades', [])
+        
+        if df_acciones is not None:
+            print(f"\n🏢 ACCIONES ANALIZADAS: {len(df_acciones)}")
+            print(f"   Sectores: {df_acciones['INDUSTRIA'].nunique()}")
+            print(f"   Sectores principales: {', '.join(df_acciones['INDUSTRIA'].value_counts().head(3).index)}")
         
-        if self.df_tecnico is not None:
-            print(f"\n📊 DATOS TÉCNICOS: {len(self.df_tecnico)} registros")
-            print(f"   Tickers únicos: {self.df_tecnico['ticker'].nunique()}")
-            print(f"   Período: {self.df_tecnico['date'].min()} a {self.df_tecnico['date'].max()}")
+        if df_tecnico is not None:
+            print(f"\n📊 DATOS TÉCNICOS: {len(df_tecnico)} registros")
+            print(f"   Tickers únicos: {df_tecnico['ticker'].nunique()}")
+            print(f"   Período: {df_tecnico['date'].min()} a {df_tecnico['date'].max()}")
         
-        if self.df_fundamental is not None:
-            print(f"\n💰 ANÁLISIS FUNDAMENTAL: {len(self.df_fundamental)} registros")
-            print(f"   Años cubiertos: {sorted(self.df_fundamental['year'].unique())}")
-            print(f"   Salud financiera: {self.df_fundamental['salud_financiera'].value_counts().to_dict()}")
+        if df_fundamental is not None:
+            print(f"\n💰 ANÁLISIS FUNDAMENTAL: {len(df_fundamental)} registros")
+            print(f"   Años cubiertos: {sorted(df_fundamental['year'].unique())}")
+            print(f"   Salud financiera: {df_fundamental['salud_financiera'].value_counts().to_dict()}")
         
-        if self.df_perfiles is not None:
-            print(f"\n🎭 PERFILES DE ACCIONES: {len(self.df_perfiles)}")
-            perfiles = self.df_perfiles['personalidad'].value_counts()
+        if df_perfiles is not None:
+            print(f"\n🎭 PERFILES DE ACCIONES: {len(df_perfiles)}")
+            perfiles = df_perfiles['personalidad'].value_counts()
             for perfil, count in perfiles.items():
                 print(f"   {perfil}: {count} acciones")
         
-        if self.df_oportunidades is not None:
-            print(f"\n🎯 OPORTUNIDADES DETECTADAS: {len(self.df_oportunidades)}")
-            if 'ticker' in self.df_oportunidades.columns:
-                tickers_unicos = self.df_oportunidades['ticker'].nunique()
+        if df_oportunidades is not None:
+            print(f"\n🎯 OPORTUNIDADES DETECTADAS: {len(df_oportunidades)}")
+            if 'ticker' in df_oportunidades.columns:
+                tickers_unicos = df_oportunidades['ticker'].nunique()
                 print(f"   Tickers únicos: {tickers_unicos}")
     
-    def crear_dashboard_completo(self):
-        """Crea un dashboard completo con todas las visualizaciones"""
+    def crear_dashboard_completo(self, preview=False):
+        """
+        Crea un dashboard completo con todas las visualizaciones. Cada panel se dibuja desde el caché
+        de gráficos si sus datos no cambiaron; `preview=True` genera una versión rápida de baja
+        resolución. Retorna la ruta de la imagen generada.
+        """
         print("\n🎨 Generando dashboard completo...")
         
-        # Crear figura grande con múltiples subplots
-        fig = plt.figure(figsize=(20, 16))
+        df_acciones = self.tabla('acciones', ['INDUSTRIA'])
+        df_tecnico = self.tabla('tecnico', [COLUMNA_RSI, 'close', 'volume'])
+        df_fundamental = self.tabla('fundamental', ['year', 'roe', 'salud_financiera'])
+        df_perfiles = self.tabla('perfiles', ['personalidad'])
+        df_oportunidades = self.tabla('oportunidades', [COLUMNA_RSI])
+        
+        # Cada panel lleva solo sus datos ya agregados: eso es lo que se hashea para el caché
+        vacio = {'tipo': 'vacio'}
+        estilo = 'seaborn-v0_8'
         
         # 1. Distribución de perfiles (arriba izquierda)
-        ax1 = plt.subplot(3, 3, 1)
-        if self.df_perfiles is not None and 'personalidad' in self.df_perfiles.columns:
-            perfiles_count = self.df_perfiles['personalidad'].value_counts()
-            colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']
-            ax1.pie(perfiles_count.values, labels=perfiles_count.index, autopct='%1.1f%%', colors=colors)
-            ax1.set_title('Distribución de Perfiles de Acciones', fontweight='bold')
+        panel1 = vacio
+        if df_perfiles is not None and 'personalidad' in df_perfiles.columns:
+            panel1 = {'tipo': 'pie', 'datos': df_perfiles['personalidad'].value_counts(),
+                      'titulo': 'Distribución de Perfiles de Acciones',
+                      'opciones': {'plot': {'colors': ['#FF6B6B', '#4ECDC4', '#45B7D1']}, 'peso_titulo': 'bold'}}
         
         # 2. Oportunidades por sector (arriba centro)
-        ax2 = plt.subplot(3, 3, 2)
-        if self.df_oportunidades is not None and self.df_acciones is not None:
+        panel2 = vacio
+        if df_oportunidades is not None and df_acciones is not None:
             try:
-                df_merged = pd.merge(self.df_oportunidades, self.df_acciones, 
+                df_merged = pd.merge(df_oportunidades, df_acciones, 
                                    left_on='ticker', right_on='NEMOTECNICO', how='left')
                 if 'INDUSTRIA' in df_merged.columns:
-                    sector_count = df_merged['INDUSTRIA'].value_counts()
-                    sector_count.plot(kind='bar', ax=ax2, color='#FFA07A')
-                    ax2.set_title('Oportunidades por Sector', fontweight='bold')
-                    ax2.tick_params(axis='x', rotation=45)
+                    panel2 = {'tipo': 'bar', 'datos': df_merged['INDUSTRIA'].value_counts(),
+                              'titulo': 'Oportunidades por Sector',
+                              'opciones': {'plot': {'color': '#FFA07A'}, 'peso_titulo': 'bold', 'rotacion': 45}}
             except:
-                ax2.text(0.5, 0.5, 'Sin datos de oportunidades', ha='center', va='center', transform=ax2.transAxes)
+                panel2 = {'tipo': 'texto', 'texto': 'Sin datos de oportunidades'}
         
         # 3. RSI promedio por ticker (arriba derecha)
-        ax3 = plt.subplot(3, 3, 3)
-        if self.df_tecnico is not None and 'rsi' in self.df_tecnico.columns:
-            rsi_promedio = self.df_tecnico.groupby('ticker')['rsi'].mean().sort_values(ascending=False)
-            rsi_promedio.head(8).plot(kind='barh', ax=ax3, color='#98D8C8')
-            ax3.set_title('RSI Promedio por Ticker (Top 8)', fontweight='bold')
+        panel3 = vacio
+        if df_tecnico is not None and COLUMNA_RSI in df_tecnico.columns:
+            rsi_promedio = df_tecnico.groupby('ticker', observed=True)[COLUMNA_RSI].mean().sort_values(ascending=False)
+            panel3 = {'tipo': 'barh', 'datos': rsi_promedio.head(8), 'titulo': 'RSI Promedio por Ticker (Top 8)',
+                      'opciones': {'plot': {'color': '#98D8C8'}, 'peso_titulo': 'bold'}}
         
         # 4. Salud financiera (centro izquierda)
-        ax4 = plt.subplot(3, 3, 4)
-        if self.df_fundamental is not None and 'salud_financiera' in self.df_fundamental.columns:
-            salud_count = self.df_fundamental['salud_financiera'].value_counts()
-            colors = ['#90EE90', '#FFD700', '#FF6B6B']
-            salud_count.plot(kind='bar', ax=ax4, color=colors)
-            ax4.set_title('Distribución de Salud Financiera', fontweight='bold')
-            ax4.tick_params(axis='x', rotation=45)
+        panel4 = vacio
+        if df_fundamental is not None and 'salud_financiera' in df_fundamental.columns:
+            panel4 = {'tipo': 'bar', 'datos': df_fundamental['salud_financiera'].value_counts(),
+                      'titulo': 'Distribución de Salud Financiera',
+                      'opciones': {'plot': {'color': ['#90EE90', '#FFD700', '#FF6B6B']}, 'peso_titulo': 'bold', 'rotacion': 45}}
         
         # 5. Evolución del ROE (centro)
-        ax5 = plt.subplot(3, 3, 5)
-        if self.df_fundamental is not None and 'roe' in self.df_fundamental.columns:
-            roe_evolucion = self.df_fundamental.groupby('year')['roe'].mean()
-            roe_evolucion.plot(kind='line', ax=ax5, marker='o', color='#FF6B6B', linewidth=2)
-            ax5.set_title('Evolución del ROE Promedio', fontweight='bold')
-            ax5.set_ylabel('ROE Promedio')
-            ax5.grid(True, alpha=0.3)
+        panel5 = vacio
+        if df_fundamental is not None and 'roe' in df_fundamental.columns:
+            panel5 = {'tipo': 'line', 'datos': df_fundamental.groupby('year')['roe'].mean(),
+                      'titulo': 'Evolución del ROE Promedio',
+                      'opciones': {'plot': {'marker': 'o', 'color': '#FF6B6B', 'linewidth': 2}, 'peso_titulo': 'bold',
+                                   'ylabel': 'ROE Promedio', 'grid': 0.3}}
         
         # 6. Volatilidad por ticker (centro derecha)
-        ax6 = plt.subplot(3, 3, 6)
-        if self.df_tecnico is not None and 'close' in self.df_tecnico.columns:
-            volatilidad = self.df_tecnico.groupby('ticker')['close'].agg(lambda x: x.pct_change().std() * np.sqrt(252))
-            volatilidad.sort_values(ascending=False).head(8).plot(kind='barh', ax=ax6, color='#FFB6C1')
-            ax6.set_title('Volatilidad Anualizada (Top 8)', fontweight='bold')
+        panel6 = vacio
+        if df_tecnico is not None and 'close' in df_tecnico.columns:
+            volatilidad = df_tecnico.groupby('ticker', observed=True)['close'].agg(lambda x: x.pct_change().std() * np.sqrt(252))
+            panel6 = {'tipo': 'barh', 'datos': volatilidad.sort_values(ascending=False).head(8),
+                      'titulo': 'Volatilidad Anualizada (Top 8)',
+                      'opciones': {'plot': {'color': '#FFB6C1'}, 'peso_titulo': 'bold'}}
         
         # 7. Distribución de sectores (abajo izquierda)
-        ax7 = plt.subplot(3, 3, 7)
-        if self.df_acciones is not None:
-            sector_dist = self.df_acciones['INDUSTRIA'].value_counts()
-            sector_dist.plot(kind='bar', ax=ax7, color='#DDA0DD')
-            ax7.set_title('Distribución de Sectores', fontweight='bold')
-            ax7.tick_params(axis='x', rotation=45)
+        panel7 = vacio
+        if df_acciones is not None:
+            panel7 = {'tipo': 'bar', 'datos': df_acciones['INDUSTRIA'].value_counts(), 'titulo': 'Distribución de Sectores',
+                      'opciones': {'plot': {'color': '#DDA0DD'}, 'peso_titulo': 'bold', 'rotacion': 45}}
         
         # 8. Correlación entre indicadores (abajo centro)
-        ax8 = plt.subplot(3, 3, 8)
-        if self.df_tecnico is not None:
+        panel8 = vacio
+        if df_tecnico is not None:
             try:
-                indicadores = ['rsi', 'close', 'volume']
-                columnas_validas = [col for col in indicadores if col in self.df_tecnico.columns]
+                indicadores = [COLUMNA_RSI, 'close', 'volume']
+                columnas_validas = [col for col in indicadores if col in df_tecnico.columns]
                 if len(columnas_validas) >= 2:
-                    df_corr = self.df_tecnico[columnas_validas].corr()
-                    sns.heatmap(df_corr, annot=True, cmap='coolwarm', ax=ax8, fmt='.2f')
-                    ax8.set_title('Correlación entre Indicadores', fontweight='bold')
+                    panel8 = {'tipo': 'heatmap', 'datos': df_tecnico[columnas_validas].corr(),
+                              'titulo': 'Correlación entre Indicadores',
+                              'opciones': {'plot': {'annot': True, 'cmap': 'coolwarm', 'fmt': '.2f'}, 'peso_titulo': 'bold'}}
             except:
-                ax8.text(0.5, 0.5, 'Sin datos de correlación', ha='center', va='center', transform=ax8.transAxes)
+                panel8 = {'tipo': 'texto', 'texto': 'Sin datos de correlación'}
         
         # 9. Resumen de oportunidades (abajo derecha)
-        ax9 = plt.subplot(3, 3, 9)
-        if self.df_oportunidades is not None:
+        panel9 = vacio
+        if df_oportunidades is not None:
             try:
-                if 'rsi' in self.df_oportunidades.columns:
-                    ax9.hist(self.df_oportunidades['rsi'], bins=10, color='#87CEEB', alpha=0.7)
-                    ax9.set_title('Distribución de RSI en Oportunidades', fontweight='bold')
-                    ax9.set_xlabel('RSI')
-                    ax9.set_ylabel('Frecuencia')
+                if COLUMNA_RSI in df_oportunidades.columns:
+                    panel9 = {'tipo': 'hist', 'datos': df_oportunidades[COLUMNA_RSI].to_numpy(),
+                              'titulo': 'Distribución de RSI en Oportunidades',
+                              'opciones': {'plot': {'bins': 10, 'color': '#87CEEB', 'alpha': 0.7}, 'peso_titulo': 'bold',
+                                           'xlabel': 'RSI', 'ylabel': 'Frecuencia'}}
                 else:
-                    ax9.text(0.5, 0.5, 'Sin datos de RSI', ha='center', va='center', transform=ax9.transAxes)
+                    panel9 = {'tipo': 'texto', 'texto': 'Sin datos de RSI'}
             except:
-                ax9.text(0.5, 0.5, 'Sin datos de oportunidades', ha='center', va='center', transform=ax9.transAxes)
+                panel9 = {'tipo': 'texto', 'texto': 'Sin datos de oportunidades'}
         
-        plt.tight_layout()
-        plt.savefig('dashboard_completo_agente_condor.png', dpi=300, bbox_inches='tight')
-        print("✓ Dashboard guardado como 'dashboard_completo_agente_condor.png'")
+        paneles = [dict(panel, estilo=estilo) for panel in (panel1, panel2, panel3, panel4, panel5, panel6, panel7, panel8, panel9)]
+        from Backend_python.cache_graficos import renderizar_dashboard
+        destino = 'dashboard_completo_agente_condor_preview.png' if preview else 'dashboard_completo_agente_condor.png'
+        destino, dibujados = renderizar_dashboard(paneles, destino, columnas=3, tamano_total=(20, 16), preview=preview)
+        print(f"✓ Dashboard guardado como '{destino}' ({len(paneles) - dibujados} de {len(paneles)} paneles desde caché)")
         
-        return fig
+        return destino
     
     def analizar_ticker_especifico(self, ticker):
         """Analiza un ticker específico en detalle"""
@@ -202,47 +334,47 @@ class VisualizadorCondor:
         print("="*50)
         
         # Información básica
-        if self.df_acciones is not None:
-            info_accion = self.df_acciones[self.df_acciones['NEMOTECNICO'] == ticker]
-            if not info_accion.empty:
-                print(f"Razón Social: {info_accion.iloc[0]['RAZON_SOCIAL']}")
-                print(f"Sector: {info_accion.iloc[0]['INDUSTRIA']}")
+        info_accion = self.info_acciones.get(ticker)
+        if info_accion is not None:
+            print(f"Razón Social: {info_accion['RAZON_SOCIAL']}")
+            print(f"Sector: {info_accion['INDUSTRIA']}")
         
         # Datos técnicos
-        if self.df_tecnico is not None:
-            df_ticker = self.df_tecnico[self.df_tecnico['ticker'] == ticker]
+        columnas_tecnicas = ['date', 'close', COLUMNA_RSI, 'volume']
+        df_ticker = self.filas_ticker('tecnico', ticker, columnas_tecnicas)
+        if df_ticker is not None:
             if not df_ticker.empty:
                 print(f"\n📊 DATOS TÉCNICOS:")
                 print(f"   Registros: {len(df_ticker)}")
                 print(f"   Período: {df_ticker['date'].min()} a {df_ticker['date'].max()}")
                 
-                # Últimos valores
-                ultimo = df_ticker.iloc[-1]
+                # Últimos valores (precalculados al cargar)
+                ultimo = self.ultimas_barras(columnas_tecnicas).loc[ticker]
                 close_val = ultimo.get('close', 'N/A')
-                rsi_val = ultimo.get('rsi', 'N/A')
+                rsi_val = ultimo.get(COLUMNA_RSI, 'N/A')
                 volume_val = ultimo.get('volume', 'N/A')
                 
                 # Formatear precio si es numérico
-                if pd.notna(close_val) and isinstance(close_val, (int, float)):
+                if pd.notna(close_val) and isinstance(close_val, (int, float, np.number)):
                     print(f"   Precio actual: ${close_val:,.2f}")
                 else:
                     print(f"   Precio actual: {close_val}")
                 
                 # Formatear RSI si es numérico
-                if pd.notna(rsi_val) and isinstance(rsi_val, (int, float)):
+                if pd.notna(rsi_val) and isinstance(rsi_val, (int, float, np.number)):
                     print(f"   RSI: {rsi_val:.2f}")
                 else:
                     print(f"   RSI: {rsi_val}")
                 
                 # Formatear volumen si es numérico
-                if pd.notna(volume_val) and isinstance(volume_val, (int, float)):
+                if pd.notna(volume_val) and isinstance(volume_val, (int, float, np.number)):
                     print(f"   Volumen: {volume_val:,}")
                 else:
                     print(f"   Volumen: {volume_val}")
         
         # Datos fundamentales
-        if self.df_fundamental is not None:
-            df_fund = self.df_fundamental[self.df_fundamental['ticker'] == ticker]
+        df_fund = self.filas_ticker('fundamental', ticker, ['year', 'pe_ratio', 'roe', 'salud_financiera'])
+        if df_fund is not None:
             if not df_fund.empty:
                 print(f"\n💰 DATOS FUNDAMENTALES:")
                 ultimo_fund = df_fund.iloc[-1]
@@ -251,38 +383,88 @@ class VisualizadorCondor:
                 roe_val = ultimo_fund.get('roe', 'N/A')
                 
                 # Formatear P/E Ratio si es numérico
-                if pd.notna(pe_ratio_val) and isinstance(pe_ratio_val, (int, float)):
+                if pd.notna(pe_ratio_val) and isinstance(pe_ratio_val, (int, float, np.number)):
                     print(f"   P/E Ratio: {pe_ratio_val:.2f}")
                 else:
                     print(f"   P/E Ratio: {pe_ratio_val}")
                 
                 # Formatear ROE si es numérico
-                if pd.notna(roe_val) and isinstance(roe_val, (int, float)):
+                if pd.notna(roe_val) and isinstance(roe_val, (int, float, np.number)):
                     print(f"   ROE: {roe_val:.3f}")
                 else:
                     print(f"   ROE: {roe_val}")
                 print(f"   Salud Financiera: {ultimo_fund.get('salud_financiera', 'N/A')}")
         
         # Perfil
-        if self.df_perfiles is not None:
-            perfil = self.df_perfiles[self.df_perfiles['ticker'] == ticker]
+        perfil = self.filas_ticker('perfiles', ticker, ['personalidad'])
+        if perfil is not None:
             if not perfil.empty:
                 print(f"\n🎭 PERFIL:")
                 print(f"   Personalidad: {perfil.iloc[0].get('personalidad', 'N/A')}")
         
         # Oportunidades
-        if self.df_oportunidades is not None:
-            oportunidades = self.df_oportunidades[self.df_oportunidades['ticker'] == ticker]
+        oportunidades = self.filas_ticker('oportunidades', ticker, ['date', COLUMNA_RSI])
+        if oportunidades is not None:
             if not oportunidades.empty:
                 print(f"\n🎯 OPORTUNIDADES:")
                 print(f"   Oportunidades detectadas: {len(oportunidades)}")
                 for _, op in oportunidades.iterrows():
-                    rsi_op = op.get('rsi', 'N/A')
-                    if pd.notna(rsi_op) and isinstance(rsi_op, (int, float)):
+                    rsi_op = op.get(COLUMNA_RSI, 'N/A')
+                    if pd.notna(rsi_op) and isinstance(rsi_op, (int, float, np.number)):
                         print(f"   - Fecha: {op.get('date', 'N/A')}, RSI: {rsi_op:.2f}")
                     else:
                         print(f"   - Fecha: {op.get('date', 'N/A')}, RSI: {rsi_op}")
     
+    def paneles_series_ticker(self, ticker):
+        """
+        Paneles de series de tiempo de un ticker: precio con medias móviles y RSI. Las series van
+        completas; cache_graficos las decima al ancho del gráfico al dibujarlas.
+        """
+        df_ticker = self.filas_ticker('tecnico', ticker, COLUMNAS_SERIES)
+        if df_ticker is None or df_ticker.empty:
+            return []
+        df_ticker = df_ticker.set_index(pd.to_datetime(df_ticker['date'].astype(str))).sort_index()
+        
+        precios = [c for c in ('close', *COLUMNAS_MEDIAS) if c in df_ticker.columns]
+        paneles = [{'tipo': 'serie', 'datos': df_ticker[precios], 'titulo': f'{ticker} - Precio y Medias Móviles',
+                    'opciones': {'series': {'close': {'color': '#45B7D1', 'linewidth': 1.2}}, 'peso_titulo': 'bold',
+                                 'ylabel': 'Precio', 'grid': 0.3}}]
+        if COLUMNA_RSI in df_ticker.columns:
+            paneles.append({'tipo': 'serie', 'datos': df_ticker[[COLUMNA_RSI]], 'titulo': f'{ticker} - RSI',
+                            'opciones': {'series': {COLUMNA_RSI: {'color': '#FF6B6B', 'linewidth': 1}}, 'peso_titulo': 'bold',
+                                         'ylabel': 'RSI', 'lineas_h': [30, 70], 'grid': 0.3}})
+        return [dict(panel, estilo='seaborn-v0_8') for panel in paneles]
+    
+    def graficar_ticker(self, ticker, preview=False):
+        """Grafica precio e indicadores de un ticker (series decimadas). Retorna la ruta de la imagen."""
+        paneles = self.paneles_series_ticker(ticker)
+        if not paneles:
+            print(f"❌ No hay datos técnicos para {ticker}")
+            return None
+        from Backend_python.cache_graficos import renderizar_dashboard
+        destino = f"grafico_{ticker}_preview.png" if preview else f"grafico_{ticker}.png"
+        destino, dibujados = renderizar_dashboard(paneles, destino, columnas=1, tamano_total=(14, 4.5 * len(paneles)),
+                                                  preview=preview)
+        print(f"✓ Gráfico guardado como '{destino}' ({len(paneles) - dibujados} de {len(paneles)} paneles desde caché)")
+        return destino
+    
+    def mostrar_correlacionados(self, ticker):
+        """Muestra los tickers que más se mueven con `ticker` según el índice de correlaciones"""
+        if self.indice_correlaciones is None:
+            if not os.path.exists(config.ARCHIVO_INDICE_CORRELACIONES):
+                print("❌ No existe el índice de correlaciones. Ejecuta primero indice_correlaciones.py")
+                return
+            from Backend_python.indice_correlaciones import cargar_indice
+            self.indice_correlaciones = cargar_indice(config.ARCHIVO_INDICE_CORRELACIONES)
+        
+        vecinos = self.indice_correlaciones.get(ticker)
+        if vecinos is None or vecinos.empty:
+            print(f"❌ Sin vecinos registrados para {ticker}")
+            return
+        print(f"\n🔗 ACCIONES QUE SE MUEVEN CON {ticker}:")
+        for _, fila in vecinos.iterrows():
+            print(f"   {int(fila['rango']):>2}. {fila['vecino']:<12} correlación: {fila['correlacion']:.3f}")
+    
     def mostrar_menu_interactivo(self):
         """Muestra un menú interactivo para explorar los datos"""
         while True:
@@ -297,22 +479,25 @@ class VisualizadorCondor:
             print("6. 🎭 Ver distribución de perfiles")
             print("7. 🎯 Ver oportunidades detectadas")
             print("8. 💾 Guardar todas las visualizaciones")
+            print("9. 🔗 Ver acciones que se mueven con un ticker")
+            print("10. 📉 Graficar precio e indicadores de un ticker")
             print("0. 🚪 Salir")
             
-            opcion = input("\nSelecciona una opción (0-8): ").strip()
+            opcion = input("\nSelecciona una opción (0-10): ").strip()
             
             if opcion == "1":
                 self.mostrar_resumen_general()
             
             elif opcion == "2":
-                self.crear_dashboard_completo()
+                preview = input("¿Vista previa rápida en baja resolución? (s/N): ").strip().lower() == "s"
+                self.crear_dashboard_completo(preview=preview)
             
             elif opcion == "3":
-                if self.df_acciones is not None:
-                    tickers_disponibles = self.df_acciones['NEMOTECNICO'].tolist()
+                if self.info_acciones:
+                    tickers_disponibles = list(self.info_acciones)
                     print(f"\nTickers disponibles: {', '.join(tickers_disponibles[:10])}...")
                     ticker = input("Ingresa el ticker a analizar: ").strip().upper()
-                    if ticker in tickers_disponibles:
+                    if ticker in self.info_acciones:
                         self.analizar_ticker_especifico(ticker)
                     else:
                         print("❌ Ticker no encontrado")
@@ -320,24 +505,27 @@ class VisualizadorCondor:
                     print("❌ No hay datos de acciones disponibles")
             
             elif opcion == "4":
-                if self.df_tecnico is not None and 'rsi' in self.df_tecnico.columns:
-                    rsi_promedio = self.df_tecnico.groupby('ticker')['rsi'].mean().sort_values(ascending=False)
+                df_tecnico = self.tabla('tecnico', [COLUMNA_RSI])
+                if df_tecnico is not None and COLUMNA_RSI in df_tecnico.columns:
+                    rsi_promedio = df_tecnico.groupby('ticker', observed=True)[COLUMNA_RSI].mean().sort_values(ascending=False)
                     print("\n📈 TOP 10 ACCIONES POR RSI PROMEDIO:")
                     print(rsi_promedio.head(10).to_string())
                 else:
                     print("❌ No hay datos técnicos disponibles")
             
             elif opcion == "5":
-                if self.df_fundamental is not None and 'roe' in self.df_fundamental.columns:
-                    roe_ultimo = self.df_fundamental.groupby('ticker')['roe'].last().sort_values(ascending=False)
+                df_fundamental = self.tabla('fundamental', ['roe'])
+                if df_fundamental is not None and 'roe' in df_fundamental.columns:
+                    roe_ultimo = df_fundamental.groupby('ticker', observed=True)['roe'].last().sort_values(ascending=False)
                     print("\n💰 TOP 10 ACCIONES POR ROE (ÚLTIMO AÑO):")
                     print(roe_ultimo.head(10).to_string())
                 else:
                     print("❌ No hay datos fundamentales disponibles")
             
             elif opcion == "6":
-                if self.df_perfiles is not None and 'personalidad' in self.df_perfiles.columns:
-                    perfiles = self.df_perfiles['personalidad'].value_counts()
+                df_perfiles = self.tabla('perfiles', ['personalidad'])
+                if df_perfiles is not None and 'personalidad' in df_perfiles.columns:
+                    perfiles = df_perfiles['personalidad'].value_counts()
                     print("\n🎭 DISTRIBUCIÓN DE PERFILES:")
                     for perfil, count in perfiles.items():
                         print(f"   {perfil}: {count} acciones")
@@ -345,12 +533,13 @@ class VisualizadorCondor:
                     print("❌ No hay datos de perfiles disponibles")
             
             elif opcion == "7":
-                if self.df_oportunidades is not None:
-                    print(f"\n🎯 OPORTUNIDADES DETECTADAS: {len(self.df_oportunidades)}")
-                    if not self.df_oportunidades.empty:
-                        cols = ['date', 'ticker', 'rsi', 'close']
-                        cols_disponibles = [col for col in cols if col in self.df_oportunidades.columns]
-                        print(self.df_oportunidades[cols_disponibles].head(10).to_string())
+                cols = ['date', 'ticker', COLUMNA_RSI, 'close']
+                df_oportunidades = self.tabla('oportunidades', cols)
+                if df_oportunidades is not None:
+                    print(f"\n🎯 OPORTUNIDADES DETECTADAS: {len(df_oportunidades)}")
+                    if not df_oportunidades.empty:
+                        cols_disponibles = [col for col in cols if col in df_oportunidades.columns]
+                        print(self.en_orden_original('oportunidades', df_oportunidades)[cols_disponibles].head(10).to_string())
                 else:
                     print("❌ No hay oportunidades detectadas")
             
@@ -359,6 +548,14 @@ class VisualizadorCondor:
                 self.crear_dashboard_completo()
                 print("✓ Visualizaciones guardadas")
             
+            elif opcion == "9":
+                ticker = input("Ingresa el ticker: ").strip().upper()
+                self.mostrar_correlacionados(ticker)
+            
+            elif opcion == "10":
+                ticker = input("Ingresa el ticker: ").strip().upper()
+                self.graficar_ticker(ticker)
+            
             elif opcion == "0":
                 print("\n👋 ¡Hasta luego! Gracias por usar el Agente Cóndor Andino")
                 break
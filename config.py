@@ -13,13 +13,69 @@ ARCHIVO_FUNDAMENTAL_DB = 'output/database_fundamental.csv'
 ARCHIVO_MACRO = 'output/database_macro_expandida.csv'
 ARCHIVO_PERFILES = 'output/acciones_con_perfil.csv'
 ARCHIVO_OPORTUNIDADES = 'output/oportunidades_de_divergencia.csv'
+ARCHIVO_REGIMENES = 'output/historial_regimenes.csv'
+MODELO_REGIMENES = 'output/modelo_regimenes.pkl'
+MODELO_PERFILES = 'output/modelo_perfiles.json'
+ARCHIVO_CORRELACIONES_MACRO = 'output/correlaciones_macro.npz'
+ARCHIVO_LEAD_LAG = 'output/lead_lag_macro.csv'
+ARCHIVO_INDICE_CORRELACIONES = 'output/indice_correlaciones.csv'
+ARCHIVO_HUELLAS = 'output/huellas_etapas.json'
+DIRECTORIO_TRAZAS = 'output/trazas'
+DIRECTORIO_CHECKPOINTS = 'output/checkpoints'
+CHECKPOINTS_POR_TICKER = True  # Parcial por ticker en descarga e indicadores para retomar con --resume (False: solo al correr con --resume)
+ARCHIVO_METRICAS = 'output/metricas.prom'
+DIRECTORIO_CUBO_TECNICO = 'output/cubo_tecnico'  # Base técnica como cubo float32 (ticker × fecha × campo) para numpy.memmap
+FECHAS_RESERVA_CUBO = 252  # Fechas reservadas en el cubo para agregar barras sin reescribirlo
+
+# Modo streaming de motor_condor (--streaming): el master se reparte por ticker y se calcula por bloques
+DIRECTORIO_MASTER_PARTICIONADO = 'output/master_particionado'
+DIRECTORIO_TECNICO_PARTICIONADO = 'output/tecnico_particionado'
+MB_POR_PARTICION_STREAMING = 2  # Tamaño objetivo de cada partición del master (por hash del ticker); su número sale del tamaño del master
+FILAS_POR_BLOQUE_STREAMING = 5000  # Barras de un ticker que se calculan y escriben juntas
+LOOKBACK_STREAMING = 500  # Barras previas de cada bloque: SMA 200, Ichimoku (52 + 25) y convergencia de EMA/RSI/ADX/ATR
 
 # Configuración de Yahoo Finance
 YF_SANTIAGO_SUFFIX = '.SN'  # Sufijo para acciones chilenas
 FECHA_INICIO = "2025-04-01"
 
+# Barras intradía (barras_intradia.py): base descargada y marcos remuestreados, por ticker y mes
+DIRECTORIO_INTRADIA = 'output/intradia'
+INTERVALO_INTRADIA = '5m'  # Barra base: '1m', '5m' o '15m'
+DIAS_HISTORIA_INTRADIA = {'1m': 7, '5m': 59, '15m': 59}  # Historia que entrega Yahoo Finance por intervalo
+MARCOS_INTRADIA = ('15m', '1h', '1d', '1w')  # Marcos que se construyen desde la barra base
+
+# Universos para la ejecución fragmentada (ejecucion_fragmentada.py): lista de tickers, sufijo de
+# Yahoo Finance y, opcionalmente, rutas de salida ('master', 'tecnico'); sin rutas se usa
+# output/universos/<nombre>/
+UNIVERSOS = {
+    'ipsa': {'csv': CSV_ACCIONES, 'sufijo': YF_SANTIAGO_SUFFIX,
+             'master': ARCHIVO_ACCIONES_MASTER, 'tecnico': ARCHIVO_TECNICO},
+}
+ARCHIVO_COLA_TRABAJO = 'output/cola_trabajo.sqlite'
+DIRECTORIO_FRAGMENTOS = 'output/fragmentos'
+TICKERS_POR_UNIDAD = 25  # Tickers por unidad de trabajo de la cola
+PLAZO_UNIDAD_MINUTOS = 30  # Una unidad tomada hace más que esto se considera abandonada
+MAX_INTENTOS = 3  # Tomas de una unidad (fallos o plazos vencidos) antes de marcarla como fallida
+
 # Configuración de análisis
 NUMERO_DE_CLUSTERS = 3
+UMBRAL_DERIVA_PERFILES = 1.5  # Reentrenar si la distancia media al centroide crece más de este factor
+FRECUENCIA_REGIMENES = 'M'  # Ventana de los regímenes (periodos de pandas: 'M' mensual, 'W' semanal)
+VENTANA_CORRELACION_MACRO = 60  # Días hábiles de la ventana móvil acciones vs macro
+MINIMO_OBSERVACIONES_CORRELACION = 20
+MAX_LAG_LEAD_LAG = 20  # Rezagos evaluados (±días) por el escáner lead-lag
+TOP_K_CORRELACIONES = 10  # Vecinos guardados por ticker en el índice de correlaciones
+ARCHIVO_FACTORES = 'output/factores_transversales.npz'  # Factores transversales (fecha × ticker × factor)
+CUANTILES_FACTORES = 5  # Cubetas de los factores por cuantil (5 = quintiles)
+MINIMO_TICKERS_FACTOR = 5  # Tickers con dato en una fecha para calcular su corte transversal
+MINIMO_TICKERS_SECTOR = 3  # Ídem dentro de un sector (factores neutralizados por INDUSTRIA)
+
+# Configuración del orquestador
+MAX_ETAPAS_PARALELAS = 4  # Etapas independientes que pueden correr a la vez
+INTERVALO_DAEMON_MINUTOS = 15  # Minutos entre ciclos del modo daemon (--daemon)
+ZONA_HORARIA_MERCADO = 'America/Santiago'
+HORARIO_MERCADO = ('09:30', '16:00')  # Apertura y cierre de la Bolsa de Santiago (hora local)
+DIAS_MERCADO = (0, 1, 2, 3, 4)  # Lunes a viernes
 
 # Configuración de base de datos MySQL (opcional)
 DB_HOST = 'localhost'
@@ -31,3 +87,14 @@ DB_PASSWORD = ''
 # Configuración de visualización
 FIGURA_TAMANO = (12, 8)
 DPI_FIGURA = 300
+DPI_PREVIEW = 72  # Vista previa rápida de los dashboards (--preview)
+DIRECTORIO_CACHE_GRAFICOS = 'output/cache_graficos'
+DIRECTORIO_REPORTES = 'output/reportes'  # Reportes por ticker (PNG + HTML)
+METODO_DECIMACION = 'lttb'  # 'lttb' o 'minmax': reducción de series largas antes de graficarlas
+
+# Benchmark con mercado sintético (benchmark.py)
+DIRECTORIO_BENCHMARK = 'output/benchmark'
+TOLERANCIA_REGRESION_BENCHMARK = 0.25  # Regresión si una etapa tarda o consume un 25% más que la línea base
+
+# Equivalencia numérica de motores de indicadores (equivalencia_indicadores.py)
+DIRECTORIO_EQUIVALENCIA = 'output/equivalencia'